@@ -0,0 +1,295 @@
+"""
+GEM Museum Award Velocity Checks
+Sliding-window limits on survey point awards per user and per email domain,
+plus a retroactive scan of points_transactions
+"""
+
+import sqlite3
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from loyalty_engine import SURVEY_TYPES
+
+# Each rule: more than max_awards within window_seconds triggers the action.
+# 'hold' parks the award for staff review, 'reject' refuses it outright.
+DEFAULT_VELOCITY_LIMITS = {
+    'user': [
+        {'window_seconds': 600, 'max_awards': 5, 'action': 'hold'},
+        {'window_seconds': 86400, 'max_awards': len(SURVEY_TYPES), 'action': 'reject'},
+    ],
+    'domain': [
+        {'window_seconds': 3600, 'max_awards': 200, 'action': 'hold'},
+    ],
+}
+
+# Shared mail providers are too common to rate-limit as a single sender
+FREE_MAIL_DOMAINS = frozenset({
+    'gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', 'icloud.com', 'live.com', 'aol.com'
+})
+
+SCHEMA_PATH = Path(__file__).parent / 'database' / 'velocity_schema.sql'
+
+# Prune idle keys from the in-memory windows every N checks
+PRUNE_EVERY = 10_000
+
+_schema_applied = set()
+
+
+def ensure_velocity_schema(db_path: str):
+    """Apply the idempotent held_awards schema once per process"""
+    if db_path in _schema_applied:
+        return
+
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        schema_sql = f.read()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(schema_sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+    _schema_applied.add(db_path)
+
+
+def _email_domain(email: Optional[str]) -> Optional[str]:
+    """Lower-cased domain part of an email address"""
+    if not email or '@' not in email:
+        return None
+    return email.rsplit('@', 1)[1].strip().lower() or None
+
+
+class SlidingWindowCounter:
+    """
+    Exact sliding-window counter in O(1) per check
+
+    Each key keeps only its last ``limit`` event times (a bounded deque), which
+    is all that is needed to answer "are there already ``limit`` events inside
+    the window?": the window is full exactly when the oldest of them is recent.
+    """
+
+    def __init__(self, window_seconds: float, limit: int):
+        self.window_seconds = window_seconds
+        self.limit = limit
+        self._events = {}
+
+    def is_full(self, key, now: float) -> bool:
+        """True if recording another event for key would exceed the limit"""
+        events = self._events.get(key)
+        return (events is not None and len(events) == self.limit
+                and events[0] > now - self.window_seconds)
+
+    def record(self, key, now: float):
+        """Add one event for key at time now"""
+        events = self._events.get(key)
+        if events is None:
+            events = self._events[key] = deque(maxlen=self.limit)
+        events.append(now)
+
+    def prune(self, now: float):
+        """Drop keys whose newest event has left the window"""
+        cutoff = now - self.window_seconds
+        for key in [k for k, events in self._events.items() if events[-1] <= cutoff]:
+            del self._events[key]
+
+
+class VelocityLimiter:
+    """In-memory award velocity limits consulted on the survey award path"""
+
+    def __init__(self, limits: Optional[Dict] = None, exempt_domains=FREE_MAIL_DOMAINS):
+        self.limits = limits or DEFAULT_VELOCITY_LIMITS
+        self.exempt_domains = frozenset(exempt_domains)
+        self._counters = []
+        for scope, rules in self.limits.items():
+            if scope not in ('user', 'domain'):
+                raise ValueError(f"Unknown velocity scope: {scope}")
+            for rule in rules:
+                if rule['action'] not in ('hold', 'reject'):
+                    raise ValueError(f"Unknown velocity action: {rule['action']}")
+                counter = SlidingWindowCounter(rule['window_seconds'], rule['max_awards'])
+                self._counters.append((scope, rule, counter))
+
+        self._user_domains = {}
+        self._checks = 0
+
+    def ensure_schema(self, db_path: str):
+        """Make sure held_awards exists in the database this limiter guards"""
+        ensure_velocity_schema(db_path)
+
+    def _domain_for(self, cursor, user_id: int) -> Optional[str]:
+        """Email domain of a user, cached after the first lookup"""
+        if user_id not in self._user_domains:
+            cursor.execute("SELECT email FROM users WHERE user_id = ?", (user_id,))
+            row = cursor.fetchone()
+            domain = _email_domain(row[0]) if row else None
+            self._user_domains[user_id] = None if domain in self.exempt_domains else domain
+        return self._user_domains[user_id]
+
+    def _keys_for(self, cursor, user_id: int) -> Dict[str, object]:
+        """Window keys for an award: the user and (unless exempt) their email domain"""
+        return {'user': user_id, 'domain': self._domain_for(cursor, user_id)}
+
+    def check_award(self, cursor, user_id: int, survey_type: str, survey_id: int,
+                    now: Optional[float] = None, record: bool = True) -> Tuple[str, Optional[str]]:
+        """
+        Decide whether a survey award may proceed
+
+        record=False leaves the windows untouched, for callers that count the
+        award with record_award only once it (or its hold) has committed
+
+        Returns:
+            ('allow' | 'hold' | 'reject', reason)
+        """
+        if survey_type in SURVEY_TYPES:
+            cursor.execute(f"SELECT is_spam FROM {survey_type} WHERE response_id = ?", (survey_id,))
+            row = cursor.fetchone()
+            if row and row[0]:
+                return 'reject', 'Survey response is flagged as spam'
+
+        now = time.time() if now is None else now
+        keys = self._keys_for(cursor, user_id)
+
+        verdict = ('allow', None)
+        for scope, rule, counter in self._counters:
+            key = keys[scope]
+            if key is None or not counter.is_full(key, now):
+                continue
+            reason = (f"More than {rule['max_awards']} awards in {rule['window_seconds']}s "
+                      f"for this {'account' if scope == 'user' else 'email domain'}")
+            if rule['action'] == 'reject':
+                return 'reject', reason
+            verdict = ('hold', reason)
+
+        # Allowed and held attempts both count towards the window
+        if record:
+            self.record_award(cursor, user_id, now)
+        return verdict
+
+    def record_award(self, cursor, user_id: int, now: Optional[float] = None):
+        """Count one allowed or held award towards every window of the user and domain"""
+        now = time.time() if now is None else now
+        keys = self._keys_for(cursor, user_id)
+        for scope, _, counter in self._counters:
+            if keys[scope] is not None:
+                counter.record(keys[scope], now)
+
+        self._checks += 1
+        if self._checks % PRUNE_EVERY == 0:
+            for _, _, counter in self._counters:
+                counter.prune(now)
+
+    def hold_award(self, cursor, user_id: int, survey_type: str, survey_id: int, reason: str) -> int:
+        """Park an award for review (caller commits)"""
+        cursor.execute("""
+            INSERT INTO held_awards (user_id, survey_type, survey_id, reason)
+            VALUES (?, ?, ?, ?)
+        """, (user_id, survey_type, survey_id, reason))
+        return cursor.lastrowid
+
+
+# ============================================================
+# RETROACTIVE SCAN
+# ============================================================
+
+def scan_award_velocity(db_path: str = "visitor_feedback.db", limits: Optional[Dict] = None,
+                        exempt_domains=FREE_MAIL_DOMAINS) -> pd.DataFrame:
+    """
+    Re-check every historical survey award against the velocity limits
+
+    All windows are computed in one pass with SQL window functions over
+    points_transactions, using the live counter's rules: awards are ordered by
+    (created_at, transaction_id) and a window holds the awards strictly after
+    its start. Returns the awards that would have been held or rejected, with
+    one count column per rule (the award itself plus those before it in the window).
+    """
+    limits = limits or DEFAULT_VELOCITY_LIMITS
+    partition_by = {'user': 'user_id', 'domain': 'email_domain'}
+
+    window_columns = []
+    rules = []
+    for scope, scope_rules in limits.items():
+        for rule in scope_rules:
+            column = f"{scope}_{int(rule['window_seconds'])}s"
+            # Rows up to this one, minus those at or before the window start; same-second
+            # peers later in the order are not counted against earlier ones
+            window_columns.append(
+                f"ROW_NUMBER() OVER (PARTITION BY {partition_by[scope]} ORDER BY ts, transaction_id) - "
+                f"COUNT(*) OVER (PARTITION BY {partition_by[scope]} ORDER BY ts "
+                f"RANGE BETWEEN UNBOUNDED PRECEDING AND {int(rule['window_seconds'])} PRECEDING) AS {column}"
+            )
+            rules.append((scope, rule, column))
+
+    survey_flags = "\n                UNION ALL ".join(
+        f"SELECT '{table}' AS survey_type, response_id, is_spam FROM {table}" for table in SURVEY_TYPES
+    )
+
+    query = f"""
+        WITH survey_flags AS (
+                {survey_flags}
+        ),
+        awards AS (
+            SELECT pt.transaction_id, pt.user_id, pt.reference_type AS survey_type,
+                   pt.reference_id AS survey_id, pt.points_change, pt.created_at,
+                   CAST(strftime('%s', pt.created_at) AS INTEGER) AS ts,
+                   CASE WHEN instr(u.email, '@') > 0
+                        THEN lower(substr(u.email, instr(u.email, '@') + 1)) END AS email_domain,
+                   COALESCE(sf.is_spam, 0) AS is_spam
+            FROM points_transactions pt
+            JOIN users u ON u.user_id = pt.user_id
+            LEFT JOIN survey_flags sf
+                ON sf.survey_type = pt.reference_type AND sf.response_id = pt.reference_id
+            WHERE pt.transaction_type = 'SURVEY'
+        )
+        SELECT *, {', '.join(window_columns)}
+        FROM awards
+        ORDER BY ts, transaction_id
+    """
+
+    conn = sqlite3.connect(db_path)
+    try:
+        df = pd.read_sql_query(query, conn)
+    finally:
+        conn.close()
+
+    if df.empty:
+        return df
+
+    exempt = df['email_domain'].isin(set(exempt_domains)) | df['email_domain'].isna()
+    action = pd.Series('allow', index=df.index)
+    reasons = pd.Series('', index=df.index)
+
+    for scope, rule, column in rules:
+        over = df[column] > rule['max_awards']
+        if scope == 'domain':
+            over &= ~exempt
+        if rule['action'] == 'hold':
+            action[over & (action == 'allow')] = 'hold'
+        else:
+            action[over] = 'reject'
+        reasons[over] += f"{column}>{rule['max_awards']} "
+
+    spam = df['is_spam'] == 1
+    action[spam] = 'reject'
+    reasons[spam] += 'is_spam '
+
+    df['action'] = action
+    df['reason'] = reasons.str.strip()
+    return df[df['action'] != 'allow'].reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    flagged = scan_award_velocity()
+    print("=" * 70)
+    print("🚦 RETROACTIVE AWARD VELOCITY SCAN")
+    print("=" * 70)
+    if flagged.empty:
+        print("✅ No survey awards exceed the velocity limits")
+    else:
+        print(flagged['action'].value_counts().to_string())
+        print(f"\nPoints at stake: {int(flagged['points_change'].sum()):,}")
+        print(flagged.groupby('user_id').size().sort_values(ascending=False).head(10).to_string())
@@ -0,0 +1,202 @@
+"""
+GEM Sentiment & Topic Benchmarks
+Throughput, peak memory and label accuracy of each analyzer mode on corpora
+built from the known-polarity comment pools in generate_new_data.py
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from comment_clustering import CLUSTER_BATCH_SIZE, ThemeClusterer
+from generate_new_data import NEGATIVE_COMMENTS, NEUTRAL_COMMENTS, POSITIVE_COMMENTS
+from sentiment_analysis import (
+    ANALYZER_VERSION, AdvancedSentimentAnalyzer, AdvancedTopicModeler, AspectSentimentAnalyzer, TextBlob,
+    analyze_sentiment_parallel
+)
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+# Appended to run after run for tracking over time (the directory is gitignored)
+RESULTS_DIR = Path(__file__).parent / 'benchmark_results'
+RESULTS_PATH = RESULTS_DIR / 'sentiment_benchmarks.csv'
+
+LABELS = ('Positive', 'Negative', 'Neutral')
+
+# Fixed CSV schema, whichever modes ran (timing-only modes leave the accuracy columns empty)
+RESULT_COLUMNS = [
+    'run_at', 'analyzer_version', 'unique_comments', 'mode', 'comments', 'seconds',
+    'comments_per_sec', 'peak_mb', 'accuracy', *(f"{label.lower()}_recall" for label in LABELS)
+]
+
+
+def build_corpus(size: int, seed: int = 42, unique: bool = False) -> pd.DataFrame:
+    """
+    Comments drawn evenly from the three polarity pools, with their known label
+    unique=True appends a reference number so no two comments are identical,
+    which defeats the per-batch dedupe in the fast paths
+    """
+    rng = random.Random(seed)
+    pools = [
+        (label, [c for c in pool if c.strip()])
+        for label, pool in zip(LABELS, (POSITIVE_COMMENTS, NEGATIVE_COMMENTS, NEUTRAL_COMMENTS))
+    ]
+
+    comments = []
+    expected = []
+    for i in range(size):
+        label, pool = pools[i % len(pools)]
+        comment = rng.choice(pool)
+        comments.append(f"{comment} #{i}" if unique else comment)
+        expected.append(label)
+
+    return pd.DataFrame({'comment': comments, 'expected': expected})
+
+
+# Each mode: (callable(comments Series) -> labels or None, largest corpus it is run on)
+def _full_text_labels(comments):
+    analyzer = AdvancedSentimentAnalyzer()
+    return [analyzer.analyze_full_text(c)[1] for c in comments]
+
+
+def _batch_labels(use_textblob):
+    def run(comments):
+        return AdvancedSentimentAnalyzer(use_textblob=use_textblob).analyze_batch(comments)['label'].tolist()
+    return run
+
+
+def _parallel_labels(comments):
+    return analyze_sentiment_parallel(comments, use_textblob=False)['label'].tolist()
+
+
+def _topics_loop(comments):
+    modeler = AdvancedTopicModeler()
+    for comment in comments:
+        modeler.identify_topics(comment)
+
+
+def _topics_vectorized(comments):
+    AdvancedTopicModeler().analyze_multiple_comments_vectorized(comments)
+
+
+def _aspects_shared(comments):
+    sentiments, _ = AspectSentimentAnalyzer(AdvancedSentimentAnalyzer(use_textblob=False)).analyze_batch(comments)
+    return sentiments['label'].tolist()
+
+
+def _theme_clustering(comments):
+    clusterer = ThemeClusterer()
+    comments = comments.tolist()
+    for start in range(0, len(comments), CLUSTER_BATCH_SIZE):
+        clusterer.partial_fit(comments[start:start + CLUSTER_BATCH_SIZE])
+
+
+BENCHMARK_MODES = {
+    'full_text': (_full_text_labels, 100_000),
+    'batch_textblob': (_batch_labels(True), 1_000_000),
+    'batch_lexicon': (_batch_labels(False), 1_000_000),
+    'parallel_lexicon': (_parallel_labels, 1_000_000),
+    'topics_loop': (_topics_loop, 100_000),
+    'topics_vectorized': (_topics_vectorized, 1_000_000),
+    'aspects_shared': (_aspects_shared, 1_000_000),
+    'theme_clustering': (_theme_clustering, 1_000_000),
+}
+
+
+def label_accuracy(expected: List[str], predicted: List[str]) -> Dict:
+    """Overall accuracy and per-label recall against the known polarity"""
+    frame = pd.DataFrame({'expected': expected, 'predicted': predicted})
+    correct = frame['expected'] == frame['predicted']
+    result = {'accuracy': round(correct.mean(), 4)}
+    for label in LABELS:
+        mask = frame['expected'] == label
+        result[f"{label.lower()}_recall"] = round(correct[mask].mean(), 4) if mask.any() else None
+    return result
+
+
+def run_mode(mode: str, corpus: pd.DataFrame, track_memory: bool = True) -> Dict:
+    """Time one mode on one corpus (and measure peak memory in a second run)"""
+    run, _ = BENCHMARK_MODES[mode]
+    comments = corpus['comment']
+
+    started = time.perf_counter()
+    labels = run(comments)
+    elapsed = time.perf_counter() - started
+
+    result = {
+        'mode': mode,
+        'comments': len(corpus),
+        'seconds': round(elapsed, 3),
+        'comments_per_sec': int(len(corpus) / elapsed) if elapsed else None,
+        'peak_mb': None,
+    }
+
+    if track_memory:
+        # Separate run: tracemalloc slows Python code down too much to time under it
+        tracemalloc.start()
+        run(comments)
+        result['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        tracemalloc.stop()
+
+    if labels is not None:
+        result.update(label_accuracy(corpus['expected'].tolist(), labels))
+
+    return result
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, modes: Optional[List[str]] = None, unique: bool = False,
+                   track_memory: bool = True, results_path: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Run every mode at every corpus size it supports
+    results_path appends the rows (with timestamp and analyzer version) for tracking over time
+    """
+    modes = modes or [m for m in BENCHMARK_MODES if TextBlob is not None or 'textblob' not in m]
+    if TextBlob is None and 'full_text' in modes:
+        print("⚠️ TextBlob not installed: full_text runs lexicon-only")
+
+    rows = []
+    for size in sizes:
+        corpus = build_corpus(size, unique=unique)
+        for mode in modes:
+            if size > BENCHMARK_MODES[mode][1]:
+                continue
+            row = run_mode(mode, corpus, track_memory)
+            rows.append(row)
+            print(f"  {mode:<18} {size:>9,} comments  {row['comments_per_sec'] or 0:>10,}/s  "
+                  f"peak {row['peak_mb'] if row['peak_mb'] is not None else '-':>7} MB  "
+                  f"accuracy {row.get('accuracy', '-')}")
+
+    results = pd.DataFrame(rows)
+    results.insert(0, 'unique_comments', unique)
+    results.insert(0, 'analyzer_version', ANALYZER_VERSION)
+    results.insert(0, 'run_at', datetime.now().isoformat(timespec='seconds'))
+    results = results.reindex(columns=RESULT_COLUMNS)
+
+    if results_path is not None:
+        results_path = Path(results_path)
+        if results_path.exists():
+            header = pd.read_csv(results_path, nrows=0).columns.tolist()
+            if header != RESULT_COLUMNS:
+                raise ValueError(f"{results_path} has a different column layout; pass another results path")
+        results_path.parent.mkdir(parents=True, exist_ok=True)
+        results.to_csv(results_path, mode='a', header=not results_path.exists(), index=False)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sentiment & topic benchmarks")
+    parser.add_argument('--output', type=Path, default=RESULTS_PATH,
+                        help=f"CSV the results are appended to (default: {RESULTS_PATH})")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("⏱️ SENTIMENT & TOPIC BENCHMARKS")
+    print("=" * 70)
+    run_benchmarks(results_path=args.output)
+    print(f"\n✅ Results appended to {args.output}")
@@ -0,0 +1,258 @@
+"""
+GEM Museum Point Campaign Rules
+Time-boxed point multipliers and bonuses compiled into lookup tables
+for the survey award path
+"""
+
+import random
+import sqlite3
+import time
+from bisect import bisect_right
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from loyalty_engine import POINTS_PER_SURVEY, SURVEY_TYPES, TIER_NAMES, TIER_THRESHOLDS
+
+SCHEMA_PATH = Path(__file__).parent / 'database' / 'campaign_schema.sql'
+
+# Slot for survey types outside SURVEY_TYPES: only unfiltered campaigns apply
+_OTHER_SURVEY = len(SURVEY_TYPES)
+
+
+def _parse_list(value) -> Optional[List[str]]:
+    """Accept a list or a comma-separated string; None/empty means 'match all'"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = [v.strip() for v in value.split(',')]
+    items = [str(v) for v in value if str(v).strip()]
+    return items or None
+
+
+def _parse_time(value) -> Optional[datetime]:
+    """Accept a datetime or ISO string; None/empty means 'no bound'"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+class CompiledCampaigns:
+    """
+    Campaign rules compiled into per-time-segment lookup tables
+
+    Campaign start/end times split the timeline into segments where the set of
+    running campaigns is constant. Each segment holds a table indexed by
+    [weekday][tier][survey type] with the final (points, campaign label), so
+    evaluating an award is a segment check plus three list lookups.
+    """
+
+    def __init__(self, campaigns: List[Dict], base_points: int = POINTS_PER_SURVEY):
+        self.base_points = base_points
+        self.campaigns = [self._normalize(c) for c in campaigns]
+        self._survey_index = {s: i for i, s in enumerate(SURVEY_TYPES)}
+        self._compile()
+
+    def _normalize(self, campaign: Dict) -> Dict:
+        """Validate one campaign definition and resolve its filters to index sets"""
+        name = campaign.get('name') or campaign.get('campaign_name')
+        if not name:
+            raise ValueError("Campaign requires a name")
+
+        starts_at = _parse_time(campaign.get('starts_at'))
+        ends_at = _parse_time(campaign.get('ends_at'))
+        if starts_at and ends_at and ends_at <= starts_at:
+            raise ValueError(f"Campaign '{name}' ends before it starts")
+
+        weekdays = _parse_list(campaign.get('weekdays'))
+        survey_types = _parse_list(campaign.get('survey_types'))
+        tiers = _parse_list(campaign.get('tiers'))
+
+        unknown_weekdays = {d.strip() for d in weekdays or []} - {str(day) for day in range(7)}
+        if unknown_weekdays:
+            raise ValueError(f"Campaign '{name}' has unknown weekdays (0=Monday ... 6=Sunday): "
+                             f"{sorted(unknown_weekdays)}")
+
+        unknown_tiers = set(tiers or []) - set(TIER_NAMES)
+        if unknown_tiers:
+            raise ValueError(f"Campaign '{name}' has unknown tiers: {sorted(unknown_tiers)}")
+
+        unknown_surveys = set(survey_types or []) - set(SURVEY_TYPES)
+        if unknown_surveys:
+            raise ValueError(f"Campaign '{name}' has unknown survey types: {sorted(unknown_surveys)}")
+
+        return {
+            'name': name,
+            'starts_at': starts_at.timestamp() if starts_at else float('-inf'),
+            'ends_at': ends_at.timestamp() if ends_at else float('inf'),
+            'weekdays': {int(d) for d in weekdays} if weekdays else set(range(7)),
+            'survey_types': ({SURVEY_TYPES.index(s) for s in survey_types}
+                             if survey_types else set(range(len(SURVEY_TYPES) + 1))),
+            'tiers': {TIER_NAMES.index(t) for t in tiers} if tiers else set(range(len(TIER_NAMES))),
+            'multiplier': float(campaign.get('multiplier', 1.0)),
+            'bonus_points': int(campaign.get('bonus_points', campaign.get('bonus', 0)))
+        }
+
+    def _compile(self):
+        """Build one lookup table per time segment"""
+        boundaries = sorted({c['starts_at'] for c in self.campaigns} |
+                            {c['ends_at'] for c in self.campaigns} |
+                            {float('-inf')})
+        boundaries = [b for b in boundaries if b != float('inf')]
+
+        self._segment_starts = boundaries
+        self._segment_ends = boundaries[1:] + [float('inf')]
+        self._tables = []
+
+        for seg_start in boundaries:
+            running = [c for c in self.campaigns if c['starts_at'] <= seg_start < c['ends_at']]
+            self._tables.append(self._build_table(running))
+
+        # Cached segment for the fast path: most events land in the current one
+        self._cached_segment = (float('inf'), float('-inf'), None)
+
+    def _build_table(self, running: List[Dict]):
+        """[weekday][tier][survey] -> (points, label) for one set of running campaigns"""
+        table = []
+        for weekday in range(7):
+            by_tier = []
+            for tier in range(len(TIER_NAMES)):
+                by_survey = []
+                for survey in range(len(SURVEY_TYPES) + 1):
+                    multiplier = 1.0
+                    bonus = 0
+                    names = []
+                    for c in running:
+                        if weekday in c['weekdays'] and tier in c['tiers'] and survey in c['survey_types']:
+                            multiplier *= c['multiplier']
+                            bonus += c['bonus_points']
+                            names.append(c['name'])
+                    points = int(round(self.base_points * multiplier)) + bonus
+                    by_survey.append((points, ', '.join(names) or None))
+                by_tier.append(by_survey)
+            table.append(by_tier)
+        return table
+
+    def evaluate(self, survey_type: str, total_points_earned: int = 0,
+                 when: Optional[datetime] = None) -> Tuple[int, Optional[str]]:
+        """Return (points, campaign label) for one survey award"""
+        if when is None:
+            when = datetime.now()
+        ts = when.timestamp()
+
+        seg_start, seg_end, table = self._cached_segment
+        if not (seg_start <= ts < seg_end):
+            i = bisect_right(self._segment_starts, ts) - 1
+            seg_start, seg_end, table = self._segment_starts[i], self._segment_ends[i], self._tables[i]
+            self._cached_segment = (seg_start, seg_end, table)
+
+        return table[when.weekday()][bisect_right(TIER_THRESHOLDS, total_points_earned)][
+            self._survey_index.get(survey_type, _OTHER_SURVEY)]
+
+    def active_campaigns(self, when: Optional[datetime] = None) -> List[str]:
+        """Names of campaigns running at a point in time"""
+        ts = (when or datetime.now()).timestamp()
+        return [c['name'] for c in self.campaigns if c['starts_at'] <= ts < c['ends_at']]
+
+
+# ============================================================
+# LOADING
+# ============================================================
+
+def load_campaigns(db_path: str = "visitor_feedback.db", base_points: int = POINTS_PER_SURVEY) -> CompiledCampaigns:
+    """Compile the active rows of point_campaigns"""
+    conn = sqlite3.connect(db_path)
+    try:
+        with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+            conn.executescript(f.read())
+
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT campaign_name, starts_at, ends_at, weekdays, survey_types, tiers, multiplier, bonus_points
+            FROM point_campaigns
+            WHERE is_active = 1 AND (ends_at IS NULL OR ends_at > datetime('now', 'localtime'))
+        """)
+        campaigns = [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+    return CompiledCampaigns(campaigns, base_points)
+
+
+def save_campaign(campaign: Dict, db_path: str = "visitor_feedback.db") -> Dict:
+    """Insert or replace a campaign definition"""
+    def as_csv(value):
+        items = _parse_list(value)
+        return ','.join(items) if items else None
+
+    try:
+        # Validate before writing
+        CompiledCampaigns([campaign])
+
+        conn = sqlite3.connect(db_path)
+        with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+            conn.executescript(f.read())
+
+        conn.execute("""
+            INSERT OR REPLACE INTO point_campaigns
+            (campaign_name, starts_at, ends_at, weekdays, survey_types, tiers, multiplier, bonus_points)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            campaign['name'],
+            campaign.get('starts_at'),
+            campaign.get('ends_at'),
+            as_csv(campaign.get('weekdays')),
+            as_csv(campaign.get('survey_types')),
+            as_csv(campaign.get('tiers')),
+            campaign.get('multiplier', 1.0),
+            campaign.get('bonus_points', 0)
+        ))
+        conn.commit()
+        conn.close()
+        return {"success": True, "message": f"Campaign '{campaign['name']}' saved"}
+    except Exception as e:
+        print(f"Error saving campaign: {e}")
+        return {"success": False, "error": str(e)}
+
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+
+def benchmark(n_events: int = 100_000, seed: int = 7) -> Dict:
+    """Measure evaluator throughput on random award events"""
+    rng = random.Random(seed)
+    compiled = CompiledCampaigns([
+        {'name': 'Weekday Double Points', 'starts_at': '2026-01-01', 'ends_at': '2026-07-01',
+         'weekdays': [0, 1, 2, 3, 4], 'multiplier': 2.0},
+        {'name': "Children's Museum Bonus", 'starts_at': '2026-03-01', 'ends_at': '2026-04-01',
+         'survey_types': ['survey_childrens_museum'], 'bonus_points': 10},
+        {'name': 'Legend Boost', 'tiers': ['Legend'], 'multiplier': 1.5},
+    ])
+
+    # Events arrive in time order, as they do on the award path
+    start = datetime(2026, 1, 1).timestamp()
+    timestamps = sorted(rng.uniform(start, start + 180 * 86400) for _ in range(n_events))
+    events = [(rng.choice(SURVEY_TYPES), rng.randint(0, 200), datetime.fromtimestamp(ts))
+              for ts in timestamps]
+
+    started = time.perf_counter()
+    for survey_type, earned, when in events:
+        compiled.evaluate(survey_type, earned, when)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "events": n_events,
+        "seconds": round(elapsed, 4),
+        "events_per_second": int(n_events / elapsed) if elapsed else float('inf'),
+        "microseconds_per_event": round(elapsed / n_events * 1e6, 3)
+    }
+
+
+if __name__ == "__main__":
+    result = benchmark()
+    print(f"⚡ Campaign evaluator: {result['events_per_second']:,} events/sec "
+          f"({result['microseconds_per_event']} µs/event over {result['events']:,} events)")
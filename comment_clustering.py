@@ -0,0 +1,454 @@
+"""
+GEM Theme Discovery
+Unsupervised clustering of comments (hashed TF-IDF + mini-batch k-means in
+NumPy) to surface themes outside the fixed AdvancedTopicModeler taxonomy
+"""
+
+import heapq
+import re
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from loyalty_engine import SURVEY_TYPES
+from sentiment_analysis import DOCUMENT_SEPARATOR, AdvancedTopicModeler
+
+N_FEATURES = 1 << 16
+NUM_CLUSTERS = 12
+CLUSTER_BATCH_SIZE = 4_096
+REPRESENTATIVES = 3
+REPRESENTATIVE_POOL = 4 * REPRESENTATIVES  # candidates kept per cluster, re-ranked on read
+TOP_TERMS = 8
+
+SCHEMA_PATH = Path(__file__).parent / 'database' / 'clustering_schema.sql'
+
+_schema_applied = set()
+
+
+def ensure_clustering_schema(db_path: str):
+    """Apply the idempotent clustering schema once per process"""
+    if db_path in _schema_applied:
+        return
+
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        schema_sql = f.read()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(schema_sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+    _schema_applied.add(db_path)
+
+
+class SparseRows:
+    """L2-normalized TF-IDF rows in coordinate form, sorted by row"""
+
+    def __init__(self, rows: np.ndarray, cols: np.ndarray, vals: np.ndarray, n_rows: int):
+        self.rows = rows
+        self.cols = cols
+        self.vals = vals
+        self.n_rows = n_rows
+
+    def dot(self, matrix: np.ndarray) -> np.ndarray:
+        """(n_rows x n_features) @ (n_features x k), without densifying the rows"""
+        result = np.zeros((self.n_rows, matrix.shape[1]))
+        if len(self.rows):
+            present, starts = np.unique(self.rows, return_index=True)
+            result[present] = np.add.reduceat(self.vals[:, None] * matrix[self.cols], starts)
+        return result
+
+    def non_empty(self) -> np.ndarray:
+        """Rows with at least one feature"""
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.rows] = True
+        return mask
+
+
+class HashedTfidfVectorizer:
+    """
+    Unigram + bigram TF-IDF over a fixed number of hashed features
+    Document frequencies are updated batch by batch, so no vocabulary pass is needed
+    """
+
+    def __init__(self, n_features: int = N_FEATURES, stop_words=None):
+        self.n_features = n_features
+        self.stop_words = set(stop_words if stop_words is not None else AdvancedTopicModeler().stop_words)
+        self.doc_freq = np.zeros(n_features, dtype=np.int64)
+        self.n_docs = 0
+        # One readable term per feature (first seen), for naming clusters
+        self.feature_terms: Dict[int, str] = {}
+        self.new_terms: Dict[int, str] = {}
+
+    def _hash(self, terms) -> np.ndarray:
+        """Feature index of each term"""
+        return np.fromiter((zlib.crc32(t.encode('utf-8')) % self.n_features for t in terms),
+                           dtype=np.int64, count=len(terms))
+
+    def _remember_terms(self, features: np.ndarray, terms):
+        """Keep the first term seen for each feature"""
+        for feature, term in zip(features.tolist(), terms):
+            if feature not in self.feature_terms:
+                self.feature_terms[feature] = term
+                self.new_terms[feature] = term
+
+    def transform(self, documents: List[str], weights: Optional[np.ndarray] = None,
+                  update_idf: bool = True) -> SparseRows:
+        """
+        TF-IDF rows for distinct documents
+        weights = how many comments each document stands for (IDF counts comments)
+        """
+        n_docs = len(documents)
+        weights = np.ones(n_docs, dtype=np.int64) if weights is None else np.asarray(weights)
+        empty = SparseRows(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0), n_docs)
+        if not n_docs:
+            return empty
+
+        # Tokenize every document in one regex pass, as in the vectorized topic path
+        text = DOCUMENT_SEPARATOR.join(str(d).replace(DOCUMENT_SEPARATOR, ' ') for d in documents).lower()
+        token_codes, vocabulary = pd.factorize(
+            np.array(re.findall(r'[a-z0-9]+|' + DOCUMENT_SEPARATOR, text), dtype=object))
+        vocabulary = pd.Index(vocabulary)
+
+        is_separator = (vocabulary == DOCUMENT_SEPARATOR)[token_codes]
+        doc = np.cumsum(is_separator)[~is_separator]
+        token_codes = token_codes[~is_separator]
+
+        # Content words only: no stop words, single letters or bare numbers
+        keep_word = (~vocabulary.isin(self.stop_words) & (vocabulary.str.len().to_numpy() > 1)
+                     & ~np.asarray(vocabulary.str.isdigit(), dtype=bool))
+        keep = keep_word[token_codes]
+        doc, token_codes = doc[keep], token_codes[keep]
+
+        word_features = np.full(len(vocabulary), -1, dtype=np.int64)
+        word_features[keep_word] = self._hash(vocabulary[keep_word])
+        if update_idf:
+            self._remember_terms(word_features[keep_word], vocabulary[keep_word])
+
+        # Bigrams of adjacent content words in the same document
+        same_doc = doc[1:] == doc[:-1]
+        pair_keys = token_codes[:-1][same_doc].astype(np.int64) * len(vocabulary) + token_codes[1:][same_doc]
+        pair_codes, pairs = pd.factorize(pair_keys)
+        first, second = np.divmod(np.asarray(pairs, dtype=np.int64), len(vocabulary))
+        pair_terms = [f"{a} {b}" for a, b in zip(vocabulary[first], vocabulary[second])]
+        pair_features = self._hash(pair_terms)
+        if update_idf:
+            self._remember_terms(pair_features, pair_terms)
+
+        entry_doc = np.concatenate([doc, doc[1:][same_doc]]).astype(np.int64)
+        entry_feature = np.concatenate([word_features[token_codes], pair_features[pair_codes]])
+        if not len(entry_doc):
+            if update_idf:
+                self.n_docs += int(weights.sum())
+            return empty
+
+        keys, counts = np.unique(entry_doc * self.n_features + entry_feature, return_counts=True)
+        rows, cols = np.divmod(keys, self.n_features)
+
+        if update_idf:
+            self.doc_freq += np.bincount(cols, weights=weights[rows], minlength=self.n_features).astype(np.int64)
+            self.n_docs += int(weights.sum())
+
+        # Sublinear term frequency, smoothed IDF, unit-length rows
+        idf = np.log((1 + self.n_docs) / (1 + self.doc_freq[cols])) + 1
+        vals = (1 + np.log(counts)) * idf
+        norms = np.sqrt(np.bincount(rows, weights=vals ** 2, minlength=n_docs))
+        return SparseRows(rows, cols, vals / norms[rows], n_docs)
+
+
+class ThemeClusterer:
+    """
+    Spherical mini-batch k-means over hashed TF-IDF vectors
+    partial_fit() folds in each new batch of comments; nothing is re-read
+    """
+
+    def __init__(self, num_clusters: int = NUM_CLUSTERS, n_features: int = N_FEATURES, seed: int = 1):
+        self.num_clusters = num_clusters
+        self.n_features = n_features
+        self.seed = seed
+        self.vectorizer = HashedTfidfVectorizer(n_features)
+        # Feature-major (n_features x num_clusters) so sparse rows gather contiguous centroid rows
+        self.centroids = np.zeros((n_features, num_clusters))
+        self.center_counts = np.zeros(num_clusters, dtype=np.int64)
+        self.candidates: List[Dict[str, float]] = [{} for _ in range(num_clusters)]
+        self._rng = np.random.default_rng(seed)
+
+    def _normalized_centroids(self) -> np.ndarray:
+        """Unit-length centroids (unseeded clusters stay zero)"""
+        norms = np.linalg.norm(self.centroids, axis=0)
+        return np.divide(self.centroids, norms, out=np.zeros_like(self.centroids), where=norms > 0)
+
+    def _seed_clusters(self, batch: SparseRows, weights: np.ndarray):
+        """k-means++ seeding of still-empty clusters from this batch's documents"""
+        seeded = np.linalg.norm(self.centroids, axis=0) > 0
+        available = batch.non_empty()
+        if seeded.all() or not available.any():
+            return
+
+        if seeded.any():
+            distance = 1 - batch.dot(self._normalized_centroids()[:, seeded]).max(axis=1)
+        else:
+            distance = np.ones(batch.n_rows)
+
+        for cluster in np.flatnonzero(~seeded):
+            probabilities = np.where(available, np.clip(distance, 0, None) ** 2 * weights, 0.0)
+            if probabilities.sum() <= 0:
+                break
+            choice = self._rng.choice(batch.n_rows, p=probabilities / probabilities.sum())
+            in_row = batch.rows == choice
+            self.centroids[batch.cols[in_row], cluster] = batch.vals[in_row]
+            available[choice] = False
+
+            column = np.zeros((self.n_features, 1))
+            column[batch.cols[in_row], 0] = batch.vals[in_row]
+            distance = np.minimum(distance, 1 - batch.dot(column)[:, 0])
+
+    def _assign(self, batch: SparseRows):
+        """Closest centroid (cosine) and its similarity per row; -1 for empty rows"""
+        similarities = batch.dot(self._normalized_centroids())
+        labels = similarities.argmax(axis=1)
+        best = similarities[np.arange(batch.n_rows), labels]
+        labels[~batch.non_empty()] = -1
+        return labels, best
+
+    def partial_fit(self, comments) -> pd.DataFrame:
+        """
+        Assign a batch of comments and move the centroids toward it
+        Returns: DataFrame (comment, cluster_id, similarity) in input order; cluster_id -1 = no content
+        """
+        comments = list(comments)
+        codes, documents = pd.factorize(pd.Series(comments, dtype=object))
+        documents = [str(d) for d in documents]
+        weights = np.bincount(codes[codes >= 0], minlength=len(documents))
+
+        batch = self.vectorizer.transform(documents, weights)
+        self._seed_clusters(batch, weights)
+        labels, best = self._assign(batch)
+
+        # Running mean per cluster, weighted by how many comments each document stands for
+        assigned = labels >= 0
+        sums = np.zeros_like(self.centroids)
+        np.add.at(sums, (batch.cols, labels[batch.rows]), batch.vals * weights[batch.rows])
+        new_counts = np.bincount(labels[assigned], weights=weights[assigned],
+                                 minlength=self.num_clusters).astype(np.int64)
+        total = self.center_counts + new_counts
+        updated = new_counts > 0
+        self.centroids[:, updated] = ((self.centroids[:, updated] * self.center_counts[updated] + sums[:, updated])
+                                      / total[updated])
+        self.center_counts = total
+
+        for cluster in np.flatnonzero(updated):
+            members = np.flatnonzero(labels == cluster)
+            closest = members[np.argsort(-best[members], kind='stable')[:REPRESENTATIVE_POOL]]
+            pool = self.candidates[cluster]
+            pool.update((documents[i], float(best[i])) for i in closest)
+            self.candidates[cluster] = dict(heapq.nlargest(REPRESENTATIVE_POOL, pool.items(),
+                                                           key=lambda item: item[1]))
+
+        return self._frame(comments, codes, labels, best)
+
+    def predict(self, comments) -> pd.DataFrame:
+        """Assign comments to the current clusters without updating anything"""
+        comments = list(comments)
+        codes, documents = pd.factorize(pd.Series(comments, dtype=object))
+        labels, best = self._assign(self.vectorizer.transform([str(d) for d in documents], update_idf=False))
+        return self._frame(comments, codes, labels, best)
+
+    @staticmethod
+    def _frame(comments, codes, labels, best) -> pd.DataFrame:
+        """Per-comment result from per-document labels"""
+        labels = np.append(labels, -1)  # code -1 (missing comment)
+        best = np.append(best, 0.0)
+        return pd.DataFrame({
+            'comment': comments,
+            'cluster_id': labels[codes],
+            'similarity': np.where(labels[codes] >= 0, best[codes], 0.0)
+        })
+
+    def top_terms(self, cluster: int, n: int = TOP_TERMS) -> List[str]:
+        """Highest-weighted terms of a centroid"""
+        column = self.centroids[:, cluster]
+        features = np.argsort(-column, kind='stable')[:n]
+        return [self.vectorizer.feature_terms.get(int(f), f"#{f}") for f in features if column[f] > 0]
+
+    def representatives(self, cluster: int, n: int = REPRESENTATIVES) -> List[str]:
+        """Candidate comments closest to the current centroid"""
+        pool = list(self.candidates[cluster])
+        if not pool:
+            return []
+        scored = self.predict(pool)
+        scored = scored[scored['cluster_id'] == cluster].sort_values('similarity', ascending=False, kind='stable')
+        return scored['comment'].head(n).tolist()
+
+    def summary(self) -> pd.DataFrame:
+        """
+        One row per non-empty cluster, largest first
+        Returns: DataFrame (cluster_id, size, top_terms, representatives)
+        """
+        rows = [{
+            'cluster_id': cluster,
+            'size': int(self.center_counts[cluster]),
+            'top_terms': ', '.join(self.top_terms(cluster)),
+            'representatives': self.representatives(cluster)
+        } for cluster in np.flatnonzero(self.center_counts)]
+        columns = ['cluster_id', 'size', 'top_terms', 'representatives']
+        return pd.DataFrame(rows, columns=columns).sort_values('size', ascending=False).reset_index(drop=True)
+
+    # ============================================================
+    # PERSISTENCE
+    # ============================================================
+
+    def save(self, cursor):
+        """Write the model on the caller's cursor, inside its transaction"""
+        cursor.execute("""
+            INSERT OR REPLACE INTO theme_cluster_model
+                (model_id, num_clusters, n_features, seed, n_docs, centroids, center_counts, doc_freq, updated_at)
+            VALUES (1, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, (self.num_clusters, self.n_features, self.seed, self.vectorizer.n_docs,
+              self.centroids.astype(np.float32).tobytes(), self.center_counts.tobytes(),
+              self.vectorizer.doc_freq.tobytes()))
+
+        cursor.executemany("INSERT OR IGNORE INTO theme_cluster_terms (feature, term) VALUES (?, ?)",
+                           self.vectorizer.new_terms.items())
+        self.vectorizer.new_terms = {}
+
+        cursor.execute("DELETE FROM theme_cluster_representatives")
+        cursor.executemany("""
+            INSERT INTO theme_cluster_representatives (cluster_id, comment, similarity) VALUES (?, ?, ?)
+        """, [(cluster, comment, similarity) for cluster, pool in enumerate(self.candidates)
+              for comment, similarity in pool.items()])
+
+    @classmethod
+    def load(cls, cursor) -> Optional['ThemeClusterer']:
+        """Model saved by an earlier run, or None"""
+        cursor.execute("""
+            SELECT num_clusters, n_features, seed, n_docs, centroids, center_counts, doc_freq
+            FROM theme_cluster_model WHERE model_id = 1
+        """)
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        num_clusters, n_features, seed, n_docs, centroids, center_counts, doc_freq = row
+        clusterer = cls(num_clusters, n_features, seed)
+        clusterer.centroids = np.frombuffer(centroids, dtype=np.float32).reshape(
+            n_features, num_clusters).astype(np.float64)
+        clusterer.center_counts = np.frombuffer(center_counts, dtype=np.int64).copy()
+        clusterer.vectorizer.doc_freq = np.frombuffer(doc_freq, dtype=np.int64).copy()
+        clusterer.vectorizer.n_docs = n_docs
+
+        cursor.execute("SELECT feature, term FROM theme_cluster_terms")
+        clusterer.vectorizer.feature_terms = dict(cursor.fetchall())
+        cursor.execute("SELECT cluster_id, comment, similarity FROM theme_cluster_representatives")
+        for cluster, comment, similarity in cursor.fetchall():
+            clusterer.candidates[cluster][comment] = similarity
+        return clusterer
+
+
+# ============================================================
+# INCREMENTAL RUNS OVER THE SURVEY TABLES
+# ============================================================
+
+def cluster_new_comments(db_path: str = "visitor_feedback.db", batch_size: int = CLUSTER_BATCH_SIZE,
+                         clusterer: Optional[ThemeClusterer] = None) -> Dict[str, int]:
+    """
+    Fold comments past each table's clustering watermark into the saved model
+    Spam is skipped; returns comments clustered per table
+    """
+    ensure_clustering_schema(db_path)
+    conn = sqlite3.connect(db_path, timeout=10)
+    try:
+        cursor = conn.cursor()
+        clusterer = clusterer or ThemeClusterer.load(cursor) or ThemeClusterer()
+
+        processed = {}
+        for table_name in SURVEY_TYPES:
+            total = 0
+            while True:
+                cursor.execute("SELECT last_rowid FROM theme_clustering_watermarks WHERE survey_type = ?",
+                               (table_name,))
+                row = cursor.fetchone()
+                cursor.execute(f"""
+                    SELECT rowid, response_id, additional_comments, is_spam FROM {table_name}
+                    WHERE rowid > ?
+                    ORDER BY rowid
+                    LIMIT ?
+                """, (row[0] if row else 0, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+
+                kept = [(response_id, comment) for _, response_id, comment, is_spam in rows
+                        if comment is not None and comment.strip() and not is_spam]
+                if kept:
+                    result = clusterer.partial_fit([comment for _, comment in kept])
+                    cursor.executemany("""
+                        INSERT OR REPLACE INTO survey_comment_themes (survey_type, response_id, cluster_id, similarity)
+                        VALUES (?, ?, ?, ?)
+                    """, zip([table_name] * len(kept), [response_id for response_id, _ in kept],
+                             result['cluster_id'].tolist(), result['similarity'].tolist()))
+                    clusterer.save(cursor)
+
+                cursor.execute("""
+                    INSERT INTO theme_clustering_watermarks (survey_type, last_rowid, updated_at)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(survey_type) DO UPDATE SET
+                        last_rowid = excluded.last_rowid,
+                        updated_at = excluded.updated_at
+                """, (table_name, rows[-1][0]))
+                conn.commit()
+
+                total += len(kept)
+                if len(rows) < batch_size:
+                    break
+            processed[table_name] = total
+        return processed
+    finally:
+        conn.close()
+
+
+def load_theme_summary(db_path: str = "visitor_feedback.db") -> pd.DataFrame:
+    """Cluster summary of the saved model (empty if clustering never ran)"""
+    ensure_clustering_schema(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        clusterer = ThemeClusterer.load(conn.cursor())
+    finally:
+        conn.close()
+    return clusterer.summary() if clusterer else pd.DataFrame()
+
+
+def run_clustering_worker(db_path: str = "visitor_feedback.db", poll_seconds: float = 60.0,
+                          batch_size: int = CLUSTER_BATCH_SIZE, max_idle_polls: Optional[int] = None):
+    """Continuously fold newly inserted comments into the theme clusters"""
+    idle_polls = 0
+
+    while max_idle_polls is None or idle_polls < max_idle_polls:
+        total = sum(cluster_new_comments(db_path, batch_size).values())
+
+        if total:
+            print(f"✅ Clustered {total} comments")
+            idle_polls = 0
+        else:
+            idle_polls += 1
+
+        time.sleep(poll_seconds)
+
+
+if __name__ == "__main__":
+    cluster_new_comments()
+    themes = load_theme_summary()
+    print("=" * 70)
+    print("🧭 DISCOVERED COMMENT THEMES")
+    print("=" * 70)
+    for theme in themes.itertuples(index=False):
+        print(f"\nCluster {theme.cluster_id} ({theme.size} comments): {theme.top_terms}")
+        for comment in theme.representatives:
+            print(f"   • {comment}")
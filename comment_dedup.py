@@ -0,0 +1,179 @@
+"""
+GEM Near-Duplicate Comment Detection
+MinHash signatures with LSH banding group pasted and lightly edited comments
+into clusters without comparing every pair
+"""
+
+import re
+import sqlite3
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from loyalty_engine import SURVEY_TYPES
+
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16  # 16 bands x 4 rows: a pair at 0.7 similarity shares a bucket ~99% of the time
+SHINGLE_SIZE = 4
+SIMILARITY_THRESHOLD = 0.7  # estimated Jaccard of 4-character shingles
+
+# Universal hashing modulo a Mersenne prime; a * crc32 + b stays inside uint64
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def normalize_comment(text) -> str:
+    """Lower-cased alphanumeric words separated by single spaces"""
+    if text is None or (isinstance(text, float) and np.isnan(text)):
+        return ''
+    return ' '.join(re.sub(r'[^a-z0-9\s]', ' ', str(text).lower()).split())
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH clustering of comments by character-shingle similarity"""
+
+    def __init__(self, num_perm: int = NUM_PERMUTATIONS, bands: int = LSH_BANDS,
+                 shingle_size: int = SHINGLE_SIZE, threshold: float = SIMILARITY_THRESHOLD, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, normalized: str) -> np.ndarray:
+        """MinHash signature of a normalized comment"""
+        k = self.shingle_size
+        if len(normalized) <= k:
+            shingles = {normalized}
+        else:
+            shingles = {normalized[i:i + k] for i in range(len(normalized) - k + 1)}
+
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        return (((self._a * hashes + self._b) % _MERSENNE_PRIME) & _MAX_HASH).min(axis=1)
+
+    def cluster(self, comments) -> pd.DataFrame:
+        """
+        Cluster comments into near-duplicate groups
+        Returns: DataFrame (comment, cluster_id, cluster_size, is_representative), in input order
+        """
+        comments = list(comments)
+        # Exact duplicates (after normalization) share one signature
+        codes, texts = pd.factorize(pd.Series([normalize_comment(c) for c in comments], dtype=object))
+        n_texts = len(texts)
+
+        parent = list(range(n_texts))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        if n_texts:
+            signatures = np.vstack([self.signature(t) for t in texts])
+            rows = self.num_perm // self.bands
+
+            # Within a bucket, compare each member to the bucket's first member only:
+            # linear per bucket, and union-find links clusters across buckets
+            for band in range(self.bands):
+                buckets = {}
+                block = signatures[:, band * rows:(band + 1) * rows]
+                for i in range(n_texts):
+                    key = block[i].tobytes()
+                    first = buckets.setdefault(key, i)
+                    if first != i and find(first) != find(i):
+                        if np.mean(signatures[first] == signatures[i]) >= self.threshold:
+                            parent[find(i)] = find(first)
+
+        text_cluster = np.array([find(i) for i in range(n_texts)], dtype=np.int64)
+        comment_cluster = text_cluster[codes]
+        sizes = np.bincount(comment_cluster, minlength=n_texts)
+
+        # First occurrence of each cluster represents it
+        is_representative = ~pd.Series(comment_cluster).duplicated().to_numpy()
+
+        return pd.DataFrame({
+            'comment': comments,
+            'cluster_id': comment_cluster,
+            'cluster_size': sizes[comment_cluster],
+            'is_representative': is_representative
+        })
+
+
+def analyze_cluster_representatives(comments, analyzer, index: NearDuplicateIndex = None) -> pd.DataFrame:
+    """
+    Score one representative per near-duplicate cluster and share its result
+    analyzer is anything with analyze_batch (e.g. AdvancedSentimentAnalyzer)
+    Returns: analyze_batch columns plus cluster_id/cluster_size, in input order
+    """
+    clusters = (index or NearDuplicateIndex()).cluster(comments)
+    representatives = clusters[clusters['is_representative']]
+
+    scored = analyzer.analyze_batch(representatives['comment'].tolist())
+    scored.index = representatives['cluster_id'].to_numpy()
+
+    result = scored.drop(columns='comment').loc[clusters['cluster_id']].reset_index(drop=True)
+    result.insert(0, 'comment', clusters['comment'])
+    result['cluster_id'] = clusters['cluster_id']
+    result['cluster_size'] = clusters['cluster_size']
+    return result
+
+
+# ============================================================
+# SPAM FEATURE SCAN
+# ============================================================
+
+def scan_duplicate_comments(db_path: str = "visitor_feedback.db", min_cluster_size: int = 2,
+                            index: NearDuplicateIndex = None) -> pd.DataFrame:
+    """
+    Near-duplicate clusters across every survey table
+    duplicate_cluster_size is a spam feature: how many responses share this comment
+    Returns the responses in clusters of at least min_cluster_size
+    """
+    union = " UNION ALL ".join(
+        f"SELECT '{table}' AS survey_type, response_id, user_id, additional_comments AS comment, "
+        f"is_spam FROM {table} WHERE additional_comments IS NOT NULL AND TRIM(additional_comments) != ''"
+        for table in SURVEY_TYPES
+    )
+
+    conn = sqlite3.connect(db_path)
+    try:
+        df = pd.read_sql_query(union, conn)
+    finally:
+        conn.close()
+
+    if df.empty:
+        return df
+
+    clusters = (index or NearDuplicateIndex()).cluster(df['comment'])
+    df['cluster_id'] = clusters['cluster_id'].to_numpy()
+    df['duplicate_cluster_size'] = clusters['cluster_size'].to_numpy()
+    df['distinct_users_in_cluster'] = df.groupby('cluster_id')['user_id'].transform('nunique')
+
+    flagged = df[df['duplicate_cluster_size'] >= min_cluster_size]
+    return flagged.sort_values(['duplicate_cluster_size', 'cluster_id'], ascending=[False, True]).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    duplicates = scan_duplicate_comments()
+    print("=" * 70)
+    print("🧬 NEAR-DUPLICATE COMMENT SCAN")
+    print("=" * 70)
+    if duplicates.empty:
+        print("✅ No near-duplicate comments found")
+    else:
+        summary = duplicates.groupby('cluster_id').agg(
+            size=('duplicate_cluster_size', 'first'),
+            users=('distinct_users_in_cluster', 'first'),
+            spam_share=('is_spam', 'mean'),
+            example=('comment', 'first')
+        ).sort_values('size', ascending=False)
+        print(summary.head(15).to_string())
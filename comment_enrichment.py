@@ -0,0 +1,406 @@
+"""
+GEM Museum Comment Enrichment
+Scores newly inserted survey comments once, at ingest time, so dashboards
+read precomputed sentiment and topics instead of analyzing on every view
+"""
+
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+import pandas as pd
+
+from loyalty_engine import SURVEY_TYPES
+from sentiment_analysis import (
+    AdvancedTopicModeler, LanguageRoutedAnalyzer, analyze_comments_advanced, ensure_sentiment_schema,
+    generate_recommendations, generate_segment_recommendations
+)
+from topic_trends import TopicTrendTracker
+from trending_phrases import PhraseTrendTracker
+
+COMMENT_COLUMN = 'additional_comments'
+SEGMENT_COLUMNS = ('nationality', 'language', 'gender', 'survey_type')
+ENRICHMENT_BATCH_SIZE = 1_000
+
+SCHEMA_PATH = Path(__file__).parent / 'database' / 'enrichment_schema.sql'
+
+_schema_applied = set()
+
+
+def ensure_enrichment_schema(db_path: str):
+    """Apply the idempotent enrichment and sentiment schemas once per process"""
+    ensure_sentiment_schema(db_path)
+    if db_path in _schema_applied:
+        return
+
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        schema_sql = f.read()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(schema_sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+    _schema_applied.add(db_path)
+
+
+class CommentEnricher:
+    """Enrich survey rows past each table's rowid watermark"""
+
+    def __init__(self, db_path: str = "visitor_feedback.db", analyzer=None, topic_modeler=None):
+        self.db_path = db_path
+        # Sentiment is routed by the visitor's language (users.language)
+        self.analyzer = analyzer or LanguageRoutedAnalyzer()
+        self.topic_modeler = topic_modeler or AdvancedTopicModeler()
+        ensure_enrichment_schema(db_path)
+        # Hourly/daily topic counts for emerging-topic detection, fed as rows are enriched
+        self.trends = TopicTrendTracker(db_path)
+        # Fixed-memory phrase counts per survey for the trending-phrases panel
+        self.phrases = PhraseTrendTracker(db_path, self.topic_modeler)
+
+    def _get_connection(self):
+        """Get database connection"""
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _get_watermark(self, cursor, table_name: str) -> int:
+        """Last enriched rowid, or 0 if the table must be (re-)enriched from the start"""
+        cursor.execute("""
+            SELECT last_rowid, analyzer_version FROM enrichment_watermarks WHERE survey_type = ?
+        """, (table_name,))
+        row = cursor.fetchone()
+        if not row or row[1] != self.analyzer.version:
+            return 0
+        return row[0]
+
+    def enrich_table(self, table_name: str, batch_size: int = ENRICHMENT_BATCH_SIZE) -> int:
+        """Enrich one batch of new rows in a survey table; returns rows consumed"""
+        if table_name not in SURVEY_TYPES:
+            raise ValueError(f"Unknown survey table: {table_name}")
+
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            watermark = self._get_watermark(cursor, table_name)
+
+            cursor.execute(f"""
+                SELECT s.rowid, s.response_id, s.{COMMENT_COLUMN}, u.language, s.submitted_at
+                FROM {table_name} s
+                LEFT JOIN users u ON u.user_id = s.user_id
+                WHERE s.rowid > ?
+                ORDER BY s.rowid
+                LIMIT ?
+            """, (watermark, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                return 0
+
+            commented = [(response_id, comment, language) for _, response_id, comment, language, _ in rows
+                         if comment is not None]
+            submitted = [submitted_at for _, _, comment, _, submitted_at in rows if comment is not None]
+            scored = self.analyzer.analyze_batch([c for _, c, _ in commented], [l for _, _, l in commented])
+
+            cursor.executemany("""
+                INSERT OR REPLACE INTO survey_comment_sentiment
+                    (survey_type, response_id, comment_column, analyzer_version,
+                     score, label, confidence, rating)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, zip([table_name] * len(commented), [response_id for response_id, _, _ in commented],
+                     [COMMENT_COLUMN] * len(commented), scored['analyzer_version'].tolist(),
+                     scored['score'].astype(float).tolist(), scored['label'].tolist(),
+                     scored['confidence'].astype(float).tolist(),
+                     scored['rating'].astype(int).tolist()))
+
+            topic_rows = []
+            trend_events = []
+            for (response_id, comment, _), submitted_at in zip(commented, submitted):
+                topics = self.topic_modeler.identify_topics(comment)
+                for rank, (topic, score, _) in enumerate(topics, 1):
+                    topic_rows.append((table_name, response_id, COMMENT_COLUMN, topic, score, rank))
+                trend_events.append((submitted_at, [topic for topic, _, _ in topics]))
+
+            if watermark == 0:
+                # Fresh start (or new analyzer version): drop stale topics and trend counts for the table
+                cursor.execute("DELETE FROM survey_comment_topics WHERE survey_type = ?", (table_name,))
+                self.trends.rebuild(cursor, survey_type=table_name)
+                self.phrases.reset(cursor, table_name)
+            cursor.executemany("""
+                INSERT OR REPLACE INTO survey_comment_topics
+                    (survey_type, response_id, comment_column, topic, score, topic_rank)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, topic_rows)
+            self.trends.record_batch(cursor, table_name, trend_events)
+            self.phrases.record_batch(cursor, table_name, [comment for _, comment, _ in commented])
+
+            cursor.execute("""
+                INSERT INTO enrichment_watermarks (survey_type, last_rowid, analyzer_version, updated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(survey_type) DO UPDATE SET
+                    last_rowid = excluded.last_rowid,
+                    analyzer_version = excluded.analyzer_version,
+                    updated_at = excluded.updated_at
+            """, (table_name, rows[-1][0], self.analyzer.version))
+
+            conn.commit()
+            return len(rows)
+        except Exception:
+            conn.rollback()
+            # Detector and sketch state moved ahead of the rolled-back rows
+            self.trends.load()
+            self.phrases.discard()
+            raise
+        finally:
+            conn.close()
+
+    def enrich_all(self, batch_size: int = ENRICHMENT_BATCH_SIZE) -> Dict[str, int]:
+        """Drain every survey table; returns rows consumed per table"""
+        processed = {}
+        for table_name in SURVEY_TYPES:
+            total = 0
+            while True:
+                count = self.enrich_table(table_name, batch_size)
+                total += count
+                if count < batch_size:
+                    break
+            processed[table_name] = total
+
+        # Tables drain one after another, so a later table's older timestamps reach the
+        # detectors after their clocks moved on; replay the stored buckets in time order
+        if any(detector.late_mentions for detector in self.trends.detectors.values()):
+            conn = self._get_connection()
+            try:
+                self.trends.rebuild(conn.cursor())
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                self.trends.load()
+                raise
+            finally:
+                conn.close()
+        return processed
+
+
+# ============================================================
+# DASHBOARD READS
+# ============================================================
+
+def _enriched_tables(conn, analyzer_version: Optional[str] = None, tables=SURVEY_TYPES) -> Set[str]:
+    """
+    Survey tables the worker has drained up to their newest row with the current analyzer
+    Side rows of any other table may be partial or from an older version
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if not {'enrichment_watermarks', 'survey_comment_sentiment', 'survey_comment_topics'} <= existing:
+        return set()
+
+    analyzer_version = analyzer_version or LanguageRoutedAnalyzer().version
+    watermarks = {survey_type: (last_rowid, version) for survey_type, last_rowid, version in conn.execute(
+        "SELECT survey_type, last_rowid, analyzer_version FROM enrichment_watermarks")}
+
+    complete = set()
+    for table_name in tables:
+        last_rowid, version = watermarks.get(table_name, (0, None))
+        if version != analyzer_version:
+            continue
+        newest = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table_name}").fetchone()[0]
+        if last_rowid >= newest:
+            complete.add(table_name)
+    return complete
+
+
+def load_enriched_insights(db_path: str, table_name: str, column: str = COMMENT_COLUMN,
+                           include_spam: bool = False,
+                           analyzer_version: Optional[str] = None) -> Optional[Tuple[Dict, pd.DataFrame]]:
+    """
+    Sentiment summary and topic frame for a comment column, from the side tables
+    Same shapes as analyze_comments_advanced; None unless the table is fully enriched
+    with the current analyzer (analyzer_version defaults to the worker's)
+    """
+    if table_name not in SURVEY_TYPES:
+        raise ValueError(f"Unknown survey table: {table_name}")
+
+    spam_filter = "" if include_spam else "AND s.is_spam = 0"
+    conn = sqlite3.connect(db_path)
+    try:
+        if table_name not in _enriched_tables(conn, analyzer_version, [table_name]):
+            return None
+
+        row = conn.execute(f"""
+            SELECT COUNT(*),
+                   SUM(cs.label = 'Positive'), SUM(cs.label = 'Negative'), SUM(cs.label = 'Neutral'),
+                   AVG(cs.score), AVG(cs.rating), AVG(cs.confidence)
+            FROM survey_comment_sentiment cs
+            JOIN {table_name} s ON s.response_id = cs.response_id
+            WHERE cs.survey_type = ? AND cs.comment_column = ? {spam_filter}
+        """, (table_name, column)).fetchone()
+        if not row[0]:
+            return None
+
+        summary = {
+            'total_comments': row[0],
+            'positive': row[1],
+            'negative': row[2],
+            'neutral': row[3],
+            'avg_score': row[4],
+            'avg_rating': row[5],
+            'avg_confidence': row[6]
+        }
+
+        topics_df = pd.read_sql_query(f"""
+            SELECT ct.topic AS Topic, SUM(ct.score) AS Total_Score,
+                   COUNT(*) AS Mentions, AVG(ct.score) AS Avg_Score
+            FROM survey_comment_topics ct
+            JOIN {table_name} s ON s.response_id = ct.response_id
+            WHERE ct.survey_type = ? AND ct.comment_column = ? {spam_filter}
+            GROUP BY ct.topic
+            ORDER BY Total_Score DESC, Topic
+        """, conn, params=(table_name, column))
+
+        return summary, topics_df
+    finally:
+        conn.close()
+
+
+def load_comment_panel(db_path: str, table_name: str, column: str = COMMENT_COLUMN,
+                       include_spam: bool = False) -> Dict:
+    """
+    Everything a dashboard sentiment panel shows: summary, topics and recommendations
+    Reads the side tables once the worker has caught up; until then analyzes the
+    raw comments the way the worker does (routed by the visitor's language)
+    """
+    insights = load_enriched_insights(db_path, table_name, column, include_spam)
+    if insights:
+        summary, topics_df = insights
+    else:
+        conn = sqlite3.connect(db_path)
+        try:
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table_name})")}
+            if column not in columns:
+                raise ValueError(f"Unknown column: {table_name}.{column}")
+            spam_filter = "" if include_spam else "AND s.is_spam = 0"
+            comments = pd.read_sql_query(f"""
+                SELECT s.{column} AS comment, u.language
+                FROM {table_name} s LEFT JOIN users u ON u.user_id = s.user_id
+                WHERE s.{column} IS NOT NULL {spam_filter}
+            """, conn)
+        finally:
+            conn.close()
+        analysis_results = analyze_comments_advanced(comments['comment'], db_path=db_path,
+                                                     languages=comments['language'])
+        summary, topics_df = analysis_results['summary'], analysis_results['topics']
+
+    return {
+        'summary': summary,
+        'topics': topics_df,
+        'recommendations': generate_recommendations(summary, topics_df)
+    }
+
+
+def _analyze_table_at_view_time(conn, table_name: str, column: str, include_spam: bool,
+                                analyzer, topic_modeler) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Per-comment sentiment and topic frames, shaped like the side-table reads"""
+    spam_filter = "" if include_spam else "AND s.is_spam = 0"
+    rows = pd.read_sql_query(f"""
+        SELECT s.response_id, s.{column} AS comment, u.nationality, u.language, u.gender
+        FROM {table_name} s LEFT JOIN users u ON u.user_id = s.user_id
+        WHERE s.{column} IS NOT NULL {spam_filter}
+    """, conn)
+    comment_ids = (table_name + ':' + rows['response_id'].astype(str)).tolist()
+
+    scored = analyzer.analyze_batch(rows['comment'].tolist(), rows['language'].tolist())
+    sentiments = rows[['nationality', 'language', 'gender']].assign(
+        comment_id=comment_ids, survey_type=table_name,
+        score=scored['score'].to_numpy(dtype=float), label=scored['label'].to_numpy(),
+        confidence=scored['confidence'].to_numpy(dtype=float), rating=scored['rating'].to_numpy(dtype=int)
+    )
+    topics = pd.DataFrame(
+        [(comment_id, topic, score) for comment_id, comment in zip(comment_ids, rows['comment'])
+         for topic, score, _ in topic_modeler.identify_topics(comment)],
+        columns=['comment_id', 'topic', 'score']
+    )
+    return sentiments, topics
+
+
+def load_segment_recommendations(db_path: str, segment: str = 'nationality', column: str = COMMENT_COLUMN,
+                                 include_spam: bool = False, min_comments: int = 5,
+                                 analyzer_version: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    Ranked recommendations for every visitor segment, from the enriched per-comment rows
+    Tables the worker has not finished with the current analyzer are analyzed at view time
+    One groupby whatever the number of segments; None if there are no comments at all
+    """
+    if segment not in SEGMENT_COLUMNS:
+        raise ValueError(f"Unknown segment: {segment}")
+
+    conn = sqlite3.connect(db_path)
+    try:
+        with_column = [table for table in SURVEY_TYPES
+                       if column in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}]
+        enriched = _enriched_tables(conn, analyzer_version, with_column)
+
+        sentiment_parts, topic_parts = [], []
+        if enriched:
+            responses = " UNION ALL ".join(
+                f"SELECT '{table}' AS survey_type, response_id, user_id, is_spam FROM {table}"
+                for table in SURVEY_TYPES if table in enriched
+            )
+            spam_filter = "" if include_spam else "AND r.is_spam = 0"
+            sentiment_parts.append(pd.read_sql_query(f"""
+                SELECT cs.survey_type || ':' || cs.response_id AS comment_id, r.survey_type,
+                       u.nationality, u.language, u.gender,
+                       cs.score, cs.label, cs.confidence, cs.rating
+                FROM survey_comment_sentiment cs
+                JOIN ({responses}) r ON r.survey_type = cs.survey_type AND r.response_id = cs.response_id
+                LEFT JOIN users u ON u.user_id = r.user_id
+                WHERE cs.comment_column = ? {spam_filter}
+            """, conn, params=(column,)))
+            placeholders = ', '.join('?' * len(enriched))
+            topic_parts.append(pd.read_sql_query(f"""
+                SELECT survey_type || ':' || response_id AS comment_id, topic, score
+                FROM survey_comment_topics
+                WHERE comment_column = ? AND survey_type IN ({placeholders})
+            """, conn, params=(column, *sorted(enriched))))
+
+        pending = [table for table in with_column if table not in enriched]
+        if pending:
+            analyzer, topic_modeler = LanguageRoutedAnalyzer(), AdvancedTopicModeler()
+            for table_name in pending:
+                sentiments, topics = _analyze_table_at_view_time(
+                    conn, table_name, column, include_spam, analyzer, topic_modeler)
+                sentiment_parts.append(sentiments)
+                topic_parts.append(topics)
+    finally:
+        conn.close()
+
+    sentiment_parts = [part for part in sentiment_parts if not part.empty]
+    if not sentiment_parts:
+        return None
+    sentiments = pd.concat(sentiment_parts, ignore_index=True)
+    topics = pd.concat(topic_parts, ignore_index=True)
+
+    return generate_segment_recommendations(sentiments, topics, segment, min_comments)
+
+
+def run_enrichment_worker(db_path: str = "visitor_feedback.db", poll_seconds: float = 5.0,
+                          batch_size: int = ENRICHMENT_BATCH_SIZE, max_idle_polls: Optional[int] = None):
+    """Continuously enrich newly inserted survey rows"""
+    enricher = CommentEnricher(db_path)
+    idle_polls = 0
+
+    while max_idle_polls is None or idle_polls < max_idle_polls:
+        processed = enricher.enrich_all(batch_size)
+        total = sum(processed.values())
+
+        if total:
+            print(f"✅ Enriched {total} survey rows")
+            idle_polls = 0
+        else:
+            idle_polls += 1
+
+        time.sleep(poll_seconds)
+
+
+if __name__ == "__main__":
+    run_enrichment_worker()
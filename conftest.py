@@ -0,0 +1,55 @@
+"""
+Shared pytest fixtures for the loyalty and comment-analysis tests
+"""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from loyalty_engine import SURVEY_TYPES
+
+DB_PATH = Path(__file__).parent / 'visitor_feedback.db'
+
+
+@pytest.fixture
+def make_loyalty_db(tmp_path):
+    """Factory for a fresh survey + loyalty database with registered users"""
+    def make(users=20, balance=None, name="loyalty.db"):
+        path = tmp_path / name
+        conn = sqlite3.connect(path)
+        with open('database/new_schema.sql', 'r', encoding='utf-8') as f:
+            conn.executescript(f.read())
+        with open('database/loyalty_schema.sql', 'r', encoding='utf-8') as f:
+            conn.executescript(f.read())
+
+        for user_id in range(1, users + 1):
+            conn.execute("""
+                INSERT INTO users (user_id, email, name, nationality, age, language, gender)
+                VALUES (?, ?, ?, 'Egyptian', 30, 'English', 'Female')
+            """, (user_id, f"visitor{user_id}@example.com", f"Visitor {user_id}"))
+            if balance is not None:
+                conn.execute("""
+                    INSERT INTO user_points (user_id, total_points_earned, current_points_balance)
+                    VALUES (?, ?, ?)
+                """, (user_id, balance, balance))
+
+        conn.commit()
+        conn.close()
+        return str(path)
+
+    return make
+
+
+@pytest.fixture
+def survey_comments():
+    """All survey comments from the bundled database (read-only)"""
+    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    try:
+        comments = []
+        for table in SURVEY_TYPES:
+            comments.extend(row[0] for row in conn.execute(
+                f"SELECT additional_comments FROM {table} WHERE additional_comments IS NOT NULL"))
+        return comments
+    finally:
+        conn.close()
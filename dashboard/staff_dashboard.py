@@ -9,15 +9,20 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import sqlite3
+import time
 from io import BytesIO
 import sys
 sys.path.append('.')
+import dashboard_queries
+from dashboard_queries import (
+    PAGE_SIZES, SURVEY_NAMES, PanelCache, ensure_browse_schema, page_cursor, rating_columns, result_bytes, sort_columns
+)
 from sentiment_analysis import (
     AdvancedSentimentAnalyzer, 
-    AdvancedTopicModeler, 
-    analyze_comments_advanced,
-    generate_recommendations
+    AdvancedTopicModeler
 )
+from comment_enrichment import SEGMENT_COLUMNS, load_comment_panel, load_segment_recommendations
+from trending_phrases import load_trending_phrases
 
 # Page configuration
 st.set_page_config(
@@ -59,21 +64,68 @@ st.markdown("""
 # Database connection
 @st.cache_resource
 def get_db_connection():
+    ensure_browse_schema('visitor_feedback.db')
     return sqlite3.connect('visitor_feedback.db', check_same_thread=False)
 
-# Data loading functions
-@st.cache_data(ttl=60)
-def load_data(table_name, include_spam=False):
-    """Load data from specific survey table"""
-    conn = get_db_connection()
-    query = f"SELECT * FROM {table_name}"
-    if not include_spam:
-        query += " WHERE is_spam = 0"
-    df = pd.read_sql_query(query, conn)
-    return df
+def current_data_version():
+    """Database version, checked once per rerun and passed to every cached loader"""
+    return dashboard_queries.data_version(get_db_connection())
+
+# Data loading functions: cached per db_version, so results are reused until the
+# database changes and refreshed on the first rerun after a write (no blind TTL)
+@st.cache_data(max_entries=256, show_spinner=False)
+def load_chart(db_version, query_name, *args):
+    """One aggregate chart query from dashboard_queries (a handful of rows)"""
+    return getattr(dashboard_queries, query_name)(get_db_connection(), *args)
+
+# Per-section render time and bytes read, for this run; last_render_ms survives reruns
+render_stats = {}
+current_section = [None, 0.0]
+last_render_ms = st.session_state.setdefault('last_render_ms', {})
+
+def start_section(name=None):
+    """Stop timing the running section and start timing name (None just stops)"""
+    running, started = current_section
+    now = time.perf_counter()
+    if running is not None:
+        render_stats[running]['ms'] += (now - started) * 1000
+        last_render_ms[running] = render_stats[running]['ms']
+    if name is not None:
+        render_stats.setdefault(name, {'ms': 0.0, 'bytes': 0})
+    current_section[:] = [name, now]
+
+def show_section(name):
+    """Whether name is the active section; starts timing it if so"""
+    if name != active_section:
+        return False
+    start_section(name)
+    return True
+
+def chart_data(query_name, *args):
+    """Cached chart query, counted against the current section"""
+    result = load_chart(db_version, query_name, *args)
+    if current_section[0] is not None:
+        render_stats[current_section[0]]['bytes'] += result_bytes(result)
+    return result
+
+@st.cache_resource
+def get_panel_cache():
+    """Sentiment panels per (table, column, include_spam), shared by all sessions and refreshed off the render path"""
+    return PanelCache(lambda table_name, column, include_spam: load_comment_panel(
+        'visitor_feedback.db', table_name, column, include_spam))
+
+@st.cache_data(max_entries=32)
+def load_trending(db_version, table_name=None, limit=10):
+    """Most frequent comment phrases for one survey (or all), from the enrichment sketches"""
+    return load_trending_phrases('visitor_feedback.db', table_name, limit)
 
-@st.cache_data(ttl=60)
-def load_users():
+@st.cache_data(max_entries=32)
+def load_segment_recs(db_version, segment, include_spam=False):
+    """Recommendations for every visitor segment, from the enrichment side tables where complete"""
+    return load_segment_recommendations('visitor_feedback.db', segment, include_spam=include_spam)
+
+@st.cache_data(max_entries=4)
+def load_users(db_version):
     """Load user demographics"""
     conn = get_db_connection()
     df = pd.read_sql_query("SELECT * FROM users", conn)
@@ -81,26 +133,9 @@ def load_users():
 
 def get_survey_stats():
     """Get statistics for all surveys"""
-    conn = get_db_connection()
-    
-    tables = {
-        'Overall Experience': 'survey_overall_experience',
-        'Service & Operations': 'survey_service_operations',
-        'Tour & Educational': 'survey_tour_educational',
-        'Facilities & Spending': 'survey_facilities_spending',
-        'Marketing & Loyalty': 'survey_marketing_loyalty',
-        'Tut Immersive Experience': 'survey_immersive_experience',
-        "Children's Museum": 'survey_childrens_museum'
-    }
-    
-    stats = {}
-    for name, table in tables.items():
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT COUNT(*) as total, SUM(is_spam) as spam FROM {table}")
-        row = cursor.fetchone()
-        stats[name] = {'total': row[0], 'spam': row[1] or 0, 'valid': row[0] - (row[1] or 0)}
-    
-    return stats
+    return chart_data('survey_stats')
+
+db_version = current_data_version()
 
 # Header
 st.title("📊 GEM Staff Dashboard")
@@ -115,8 +150,8 @@ with st.sidebar:
     st.header("📋 Quick Stats")
     
     try:
-        users_df = load_users()
-        st.metric("Total Visitors", len(users_df))
+        total_visitors = chart_data('visitor_count')
+        st.metric("Total Visitors", total_visitors)
         
         stats = get_survey_stats()
         total_responses = sum(s['total'] for s in stats.values())
@@ -127,14 +162,14 @@ with st.sidebar:
                  delta=f"-{spam_rate:.1f}% spam", 
                  delta_color="inverse")
         
-        avg_responses = total_responses / len(users_df) if len(users_df) > 0 else 0
+        avg_responses = total_responses / total_visitors if total_visitors > 0 else 0
         st.metric("Avg Responses/Visitor", f"{avg_responses:.1f}")
         
     except Exception as e:
         st.error(f"Error: {str(e)}")
 
-# Main tabs
-tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
+# Main navigation: unlike st.tabs, only the active section runs on each rerun
+SECTIONS = [
     "📊 Overview", 
     "👥 Demographics", 
     "⭐ Survey Analysis",
@@ -142,10 +177,11 @@ tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
     "🔍 Spam Detection",
     "📈 Marketing",
     "💾 Export"
-])
+]
+active_section = st.radio("Section", SECTIONS, key='active_section', horizontal=True, label_visibility="collapsed")
 
 # TAB 1: OVERVIEW
-with tab1:
+if show_section("📊 Overview"):
     st.header("Dashboard Overview")
     
     try:
@@ -160,32 +196,32 @@ with tab1:
         st.markdown("---")
         st.subheader("Survey Participation")
         
-        chart_data = pd.DataFrame([{'Survey': name, 'Responses': s['valid']} for name, s in stats.items()])
-        chart_data = chart_data.sort_values('Responses', ascending=False)
+        participation_df = pd.DataFrame([{'Survey': name, 'Responses': s['valid']} for name, s in stats.items()])
+        participation_df = participation_df.sort_values('Responses', ascending=False)
         
-        fig = px.bar(chart_data, x='Survey', y='Responses', color='Responses', color_continuous_scale='Teal')
+        fig = px.bar(participation_df, x='Survey', y='Responses', color='Responses', color_continuous_scale='Teal')
         fig.update_xaxes(tickangle=-45)
         st.plotly_chart(fig, use_container_width=True)
         
         st.subheader("Overall Experience Ratings")
         
-        overall_df = load_data('survey_overall_experience', include_spam)
-        if not overall_df.empty:
+        rating_counts = chart_data('rating_counts', 'survey_overall_experience', 'overall_rating', include_spam)
+        if not rating_counts.empty:
             col1, col2 = st.columns(2)
             
             with col1:
-                rating_counts = overall_df['overall_rating'].value_counts().sort_index()
                 colors = ['#d32f2f', '#ff6f00', '#fbc02d', '#7cb342', '#388e3c']
-                fig = go.Figure(data=[go.Bar(x=rating_counts.index, y=rating_counts.values, marker_color=[colors[int(r)-1] for r in rating_counts.index])])
+                fig = go.Figure(data=[go.Bar(x=rating_counts['rating'], y=rating_counts['count'], marker_color=[colors[int(r)-1] for r in rating_counts['rating']])])
                 fig.update_layout(title='Overall Rating Distribution', xaxis_title='Rating', yaxis_title='Count')
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
-                if 'nps_score' in overall_df.columns:
-                    avg_nps = overall_df['nps_score'].mean()
-                    detractors = len(overall_df[overall_df['nps_score'] <= 6])
-                    passives = len(overall_df[(overall_df['nps_score'] >= 7) & (overall_df['nps_score'] <= 8)])
-                    promoters = len(overall_df[overall_df['nps_score'] >= 9])
+                nps = chart_data('nps_summary', include_spam)
+                if nps['avg_nps'] is not None:
+                    avg_nps = nps['avg_nps']
+                    detractors = nps['detractors']
+                    passives = nps['passives']
+                    promoters = nps['promoters']
                     
                     fig = go.Figure(data=[go.Pie(labels=['Promoters', 'Passives', 'Detractors'], values=[promoters, passives, detractors], hole=.6, marker_colors=['#4caf50', '#ffc107', '#f44336'])])
                     fig.update_layout(title=f'NPS<br><sub>Avg: {avg_nps:.1f}/10</sub>', annotations=[dict(text=f'{avg_nps:.1f}', x=0.5, y=0.5, font_size=40, showarrow=False)])
@@ -195,25 +231,16 @@ with tab1:
         st.error(f"Error: {str(e)}")
 
 # TAB 2: DEMOGRAPHICS
-with tab2:
+if show_section("👥 Demographics"):
     st.header("Visitor Demographics")
     
     try:
-        users_df = load_users()
-        # Remove "Other" gender from data
-        users_df = users_df[users_df['gender'] != 'Other']
-        
+        # Counts exclude the "Other" gender
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("Top 10 Nationalities by Gender")
-            # Get top 10 nationalities
-            top_nationalities = users_df['nationality'].value_counts().head(10).index
-            nat_gender_df = users_df[users_df['nationality'].isin(top_nationalities)]
-            
-            # Create stacked bar data
-            nat_gender_counts = nat_gender_df.groupby(['nationality', 'gender']).size().reset_index(name='count')
-            nat_gender_counts = nat_gender_counts.sort_values('count', ascending=True)
+            nat_gender_counts = chart_data('top_groups_by_gender', 'nationality', 10)
             
             fig = px.bar(nat_gender_counts, y='nationality', x='count', color='gender',
                         orientation='h',
@@ -223,26 +250,21 @@ with tab2:
             st.plotly_chart(fig, use_container_width=True)
             
             st.subheader("Gender Distribution")
-            gender_counts = users_df['gender'].value_counts()
-            fig = px.pie(values=gender_counts.values, names=gender_counts.index, 
+            gender_counts = chart_data('gender_counts')
+            fig = px.pie(values=gender_counts['count'], names=gender_counts['gender'], 
                         hole=0.4, color_discrete_sequence=['#2196f3', '#e91e63'])
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             st.subheader("Age Distribution")
-            fig = px.histogram(users_df, x='age', nbins=20, color_discrete_sequence=['#1f77b4'])
+            age_counts = chart_data('age_counts')
+            fig = px.histogram(age_counts, x='age', y='count', histfunc='sum', nbins=20, color_discrete_sequence=['#1f77b4'])
             fig.update_traces(marker_line_width=2, marker_line_color='white')
             fig.update_layout(bargap=0.2)
             st.plotly_chart(fig, use_container_width=True)
             
             st.subheader("Top 10 Languages by Gender")
-            # Get top 10 languages
-            top_languages = users_df['language'].value_counts().head(10).index
-            lang_gender_df = users_df[users_df['language'].isin(top_languages)]
-            
-            # Create stacked bar data
-            lang_gender_counts = lang_gender_df.groupby(['language', 'gender']).size().reset_index(name='count')
-            lang_gender_counts = lang_gender_counts.sort_values('count', ascending=True)
+            lang_gender_counts = chart_data('top_groups_by_gender', 'language', 10)
             
             fig = px.bar(lang_gender_counts, y='language', x='count', color='gender',
                         orientation='h',
@@ -255,37 +277,14 @@ with tab2:
         st.error(f"Error: {str(e)}")
 
 # TAB 3: SURVEY ANALYSIS
-with tab3:
+if show_section("⭐ Survey Analysis"):
     st.header("Survey Analysis")
     
     try:
-        overall_df = load_data('survey_overall_experience', include_spam)
-        service_df = load_data('survey_service_operations', include_spam)
-        tour_df = load_data('survey_tour_educational', include_spam)
-        facilities_df = load_data('survey_facilities_spending', include_spam)
-        immersive_df = load_data('survey_immersive_experience', include_spam)
-        childrens_df = load_data('survey_childrens_museum', include_spam)
-        
-        ratings_data = []
-        if not overall_df.empty:
-            ratings_data.append({'Category': 'Overall Experience', 'Rating': overall_df['overall_rating'].mean()})
-        if not service_df.empty:
-            ratings_data.append({'Category': 'Staff Hospitality', 'Rating': service_df['staff_hospitality_rating'].mean()})
-            ratings_data.append({'Category': 'Cleanliness', 'Rating': service_df['cleanliness_rating'].mean()})
-            ratings_data.append({'Category': 'Crowd Management', 'Rating': service_df['crowd_management_rating'].mean()})
-        if not tour_df.empty:
-            tour_ratings = tour_df['tour_experience_rating'].dropna()
-            if len(tour_ratings) > 0:
-                ratings_data.append({'Category': 'Tour Experience', 'Rating': tour_ratings.mean()})
-        if not facilities_df.empty:
-            ratings_data.append({'Category': 'Facilities', 'Rating': facilities_df['facilities_rating'].mean()})
-        if not immersive_df.empty:
-            ratings_data.append({'Category': 'Tut Immersive', 'Rating': immersive_df['overall_immersive_rating'].mean()})
-        if not childrens_df.empty:
-            ratings_data.append({'Category': "Children's Museum", 'Rating': childrens_df['overall_experience_rating'].mean()})
-        
-        if ratings_data:
-            ratings_df = pd.DataFrame(ratings_data).sort_values('Rating', ascending=True)
+        ratings_df = chart_data('rating_averages', include_spam)
+        
+        if not ratings_df.empty:
+            ratings_df = ratings_df.sort_values('Rating', ascending=True)
             overall_avg = ratings_df['Rating'].mean()
             
             fig = px.bar(ratings_df, y='Category', x='Rating', orientation='h', color='Rating', color_continuous_scale='RdYlGn', range_x=[0, 5])
@@ -295,94 +294,173 @@ with tab3:
         st.markdown("---")
         st.subheader("Detailed Survey Responses")
         
-        survey_type = st.selectbox("Select Survey", ["Overall Experience", "Service & Operations", "Tour & Educational", "Facilities & Spending", "Marketing & Loyalty", "Tut Immersive Experience", "Children's Museum"])
-        
-        table_map = {"Overall Experience": "survey_overall_experience", "Service & Operations": "survey_service_operations", "Tour & Educational": "survey_tour_educational", "Facilities & Spending": "survey_facilities_spending", "Marketing & Loyalty": "survey_marketing_loyalty", "Tut Immersive Experience": "survey_immersive_experience", "Children's Museum": "survey_childrens_museum"}
-        
-        df = load_data(table_map[survey_type], include_spam)
-        
-        if not df.empty:
-            st.metric("Total Responses", len(df))
-            st.dataframe(df, use_container_width=True)
+        survey_type = st.selectbox("Select Survey", list(SURVEY_NAMES))
+        
+        table_map = SURVEY_NAMES
+        columns = chart_data('survey_columns', table_map[survey_type])
+        
+        # Browse one keyset page at a time; only the visible page is read from SQLite
+        browse_col1, browse_col2, browse_col3, browse_col4 = st.columns(4)
+        with browse_col1:
+            sort_column = st.selectbox("Sort by", sort_columns(columns), format_func=lambda c: c.replace('_', ' ').title())
+        with browse_col2:
+            descending = st.selectbox("Order", ["Descending", "Ascending"]) == "Descending"
+        with browse_col3:
+            page_size = st.selectbox("Page size", PAGE_SIZES, index=1)
+        with browse_col4:
+            spam_filter = st.selectbox("Responses", ["Valid only", "Spam only", "All"], index=2 if include_spam else 0)
+        
+        filter_col1, filter_col2, filter_col3 = st.columns(3)
+        with filter_col1:
+            rating_column = st.selectbox("Filter by rating", [None] + rating_columns(columns),
+                                         format_func=lambda c: "No rating filter" if c is None else c.replace('_', ' ').title())
+        with filter_col2:
+            rating_values = list(range(0, 11)) if rating_column == 'nps_score' else list(range(1, 6))
+            ratings = st.multiselect("Ratings", rating_values, disabled=rating_column is None)
+        with filter_col3:
+            date_range = st.date_input("Submitted between", value=())
+        
+        filters = {
+            'spam': {"Valid only": 0, "Spam only": 1, "All": None}[spam_filter],
+            'rating_column': rating_column,
+            'ratings': tuple(ratings),
+            'start_date': date_range[0].isoformat() if len(date_range) > 0 else None,
+            'end_date': date_range[-1].isoformat() if len(date_range) > 0 else None,
+        }
+        
+        # Cursors of the pages visited so far; a new query starts again at page 1
+        browse_query = (table_map[survey_type], sort_column, descending, page_size, tuple(filters.items()))
+        if st.session_state.get('browse_query') != browse_query:
+            st.session_state.browse_query = browse_query
+            st.session_state.browse_cursors = [None]
+        browse_cursors = st.session_state.browse_cursors
+        
+        total_matching = chart_data('count_responses', table_map[survey_type], filters)
+        page = chart_data('response_page', table_map[survey_type], sort_column, descending,
+                          page_size + 1, browse_cursors[-1], filters)
+        has_next = len(page) > page_size
+        page = page.head(page_size)
+        
+        st.metric("Total Responses", total_matching)
+        if not page.empty:
+            st.dataframe(page, use_container_width=True, hide_index=True)
+        
+        nav_col1, nav_col2, nav_col3 = st.columns([1, 2, 1])
+        with nav_col1:
+            st.button("◀ Previous", disabled=len(browse_cursors) == 1,
+                      on_click=lambda: browse_cursors.pop())
+        with nav_col2:
+            total_pages = max(1, -(-total_matching // page_size))
+            st.caption(f"Page {len(browse_cursors)} of {total_pages}")
+        with nav_col3:
+            next_cursor = page_cursor(page, sort_column)
+            st.button("Next ▶", disabled=not has_next,
+                      on_click=lambda: browse_cursors.append(next_cursor))
+        
+        comment_cols = [col for col in columns if 'comment' in col.lower()]
+        if comment_cols:
+            st.markdown("---")
+            st.subheader("💡 Advanced Insights & Recommendations")
             
-            comment_cols = [col for col in df.columns if 'comment' in col.lower()]
-            if comment_cols:
-                st.markdown("---")
-                st.subheader("💡 Advanced Insights & Recommendations")
-                
-                for col in comment_cols:
-                    comments = df[col].dropna()
-                    if len(comments) > 5:  # Need at least 5 comments for meaningful analysis
-                        st.markdown(f"### {col.replace('_', ' ').title()}")
-                        
-                        # Run advanced sentiment analysis
-                        analysis_results = analyze_comments_advanced(comments)
-                        summary = analysis_results['summary']
-                        topics_df = analysis_results['topics']
-                        
-                        # Display sentiment metrics with ratings
-                        col1, col2, col3, col4 = st.columns(4)
-                        
-                        with col1:
-                            st.metric("😊 Positive", summary['positive'], 
-                                     delta=f"{summary['positive']/summary['total_comments']*100:.1f}%")
-                        with col2:
-                            st.metric("😐 Neutral", summary['neutral'])
-                        with col3:
-                            st.metric("😞 Negative", summary['negative'],
-                                     delta=f"-{summary['negative']/summary['total_comments']*100:.1f}%",
-                                     delta_color="inverse")
-                        with col4:
-                            st.metric("📊 Avg Rating", f"{summary['avg_rating']:.2f}/5",
-                                     delta=f"{summary['avg_confidence']:.0f}% confidence")
-                        
-                        # Display topic analysis
-                        if topics_df is not None and not topics_df.empty:
-                            st.markdown("**🔑 Key Topics Identified:**")
-                            
-                            # Show top 5 topics with bar chart
-                            top_topics = topics_df.head(5)
-                            fig = px.bar(top_topics, x='Total_Score', y='Topic', 
-                                        orientation='h',
-                                        color='Total_Score',
-                                        color_continuous_scale='Viridis',
-                                        text='Mentions')
-                            fig.update_traces(texttemplate='%{text} mentions', textposition='outside')
-                            fig.update_layout(showlegend=False, height=300)
-                            st.plotly_chart(fig, use_container_width=True)
+            for col in comment_cols:
+                if chart_data('comment_count', table_map[survey_type], col, include_spam) > 5:  # Need at least 5 comments for meaningful analysis
+                    st.markdown(f"### {col.replace('_', ' ').title()}")
+                    
+                    # Last panel for this data version; an older one is shown while a background refresh runs
+                    with st.spinner("Analyzing comments..."):
+                        panel, stale = get_panel_cache().get(
+                            (table_map[survey_type], col, include_spam), db_version, wait=True)
+                    if stale:
+                        st.caption("🔄 Refreshing - showing results from before the latest responses; rerun to update")
+                    summary = panel['summary']
+                    topics_df = panel['topics']
+                    
+                    # Display sentiment metrics with ratings
+                    col1, col2, col3, col4 = st.columns(4)
+                    
+                    with col1:
+                        st.metric("😊 Positive", summary['positive'], 
+                                 delta=f"{summary['positive']/summary['total_comments']*100:.1f}%")
+                    with col2:
+                        st.metric("😐 Neutral", summary['neutral'])
+                    with col3:
+                        st.metric("😞 Negative", summary['negative'],
+                                 delta=f"-{summary['negative']/summary['total_comments']*100:.1f}%",
+                                 delta_color="inverse")
+                    with col4:
+                        st.metric("📊 Avg Rating", f"{summary['avg_rating']:.2f}/5",
+                                 delta=f"{summary['avg_confidence']:.0f}% confidence")
+                    
+                    # Display topic analysis
+                    if topics_df is not None and not topics_df.empty:
+                        st.markdown("**🔑 Key Topics Identified:**")
                         
-                        # Generate and display recommendations
-                        recommendations = generate_recommendations(summary, topics_df)
+                        # Show top 5 topics with bar chart
+                        top_topics = topics_df.head(5)
+                        fig = px.bar(top_topics, x='Total_Score', y='Topic', 
+                                    orientation='h',
+                                    color='Total_Score',
+                                    color_continuous_scale='Viridis',
+                                    text='Mentions')
+                        fig.update_traces(texttemplate='%{text} mentions', textposition='outside')
+                        fig.update_layout(showlegend=False, height=300)
+                        st.plotly_chart(fig, use_container_width=True)
+                    
+                    # Trending phrases (count-min sketch, maintained by the enrichment worker)
+                    survey_phrases = load_trending(db_version, table_map[survey_type])
+                    if not survey_phrases.empty:
+                        st.markdown("**🔥 Trending Phrases:**")
+                        phrase_col1, phrase_col2 = st.columns(2)
+                        with phrase_col1:
+                            st.caption(survey_type)
+                            st.dataframe(survey_phrases, use_container_width=True, hide_index=True)
+                        with phrase_col2:
+                            st.caption("All surveys")
+                            st.dataframe(load_trending(db_version), use_container_width=True, hide_index=True)
+                    
+                    # Display recommendations
+                    recommendations = panel['recommendations']
+                    
+                    if recommendations:
+                        st.markdown("**🎯 Actionable Recommendations:**")
                         
-                        if recommendations:
-                            st.markdown("**🎯 Actionable Recommendations:**")
+                        for rec in recommendations:
+                            priority_colors = {
+                                'HIGH': '#ffebee',
+                                'MEDIUM': '#fff3e0',
+                                'OPPORTUNITY': '#e8f5e9'
+                            }
+                            bg_color = priority_colors.get(rec['priority'], '#f5f5f5')
                             
-                            for rec in recommendations:
-                                priority_colors = {
-                                    'HIGH': '#ffebee',
-                                    'MEDIUM': '#fff3e0',
-                                    'OPPORTUNITY': '#e8f5e9'
-                                }
-                                bg_color = priority_colors.get(rec['priority'], '#f5f5f5')
-                                
-                                st.markdown(f"""
-                                <div style="background-color: {bg_color}; padding: 15px; border-radius: 8px; margin: 10px 0; border-left: 4px solid #2196f3;">
-                                    <div style="display: flex; justify-content: space-between;">
-                                        <strong>{rec['icon']} {rec['category']}</strong>
-                                        <span style="background-color: white; padding: 2px 8px; border-radius: 4px; font-size: 12px;">
-                                            {rec['priority']}
-                                        </span>
-                                    </div>
-                                    <p style="margin: 5px 0;"><strong>Issue:</strong> {rec['issue']}</p>
-                                    <p style="margin: 5px 0;"><strong>Action:</strong> {rec['action']}</p>
+                            st.markdown(f"""
+                            <div style="background-color: {bg_color}; padding: 15px; border-radius: 8px; margin: 10px 0; border-left: 4px solid #2196f3;">
+                                <div style="display: flex; justify-content: space-between;">
+                                    <strong>{rec['icon']} {rec['category']}</strong>
+                                    <span style="background-color: white; padding: 2px 8px; border-radius: 4px; font-size: 12px;">
+                                        {rec['priority']}
+                                    </span>
                                 </div>
-                                """, unsafe_allow_html=True)
+                                <p style="margin: 5px 0;"><strong>Issue:</strong> {rec['issue']}</p>
+                                <p style="margin: 5px 0;"><strong>Action:</strong> {rec['action']}</p>
+                            </div>
+                            """, unsafe_allow_html=True)
+    
+        st.markdown("---")
+        st.subheader("🌍 Recommendations by Segment")
+        segment = st.selectbox("Segment by", SEGMENT_COLUMNS, format_func=lambda c: c.replace('_', ' ').title())
+        segment_recs = load_segment_recs(db_version, segment, include_spam)
+        if segment_recs is None:
+            st.info("No visitor comments to segment yet.")
+        elif segment_recs.empty:
+            st.info("No segment needs attention right now.")
+        else:
+            st.dataframe(segment_recs, use_container_width=True, hide_index=True)
         
     except Exception as e:
         st.error(f"Error: {str(e)}")
 
 # TAB 4: LOYALTY POINTS
-with tab4:
+if show_section("🎮 Loyalty Points"):
     st.header("🎮 Loyalty Points System")
     
     try:
@@ -557,11 +635,10 @@ with tab4:
             # Points Balance Distribution
             st.markdown("---")
             st.subheader("📊 Points Balance Distribution")
-            balances_query = "SELECT current_points_balance FROM user_points WHERE current_points_balance > 0"
-            balances_df = pd.read_sql_query(balances_query, conn)
+            balances_df = chart_data('points_balance_counts')
             
             if not balances_df.empty:
-                fig = px.histogram(balances_df, x='current_points_balance', nbins=30, 
+                fig = px.histogram(balances_df, x='current_points_balance', y='count', histfunc='sum', nbins=30, 
                                  title='User Points Balance Distribution',
                                  labels={'current_points_balance': 'Points Balance', 'count': 'Number of Users'})
                 fig.update_layout(showlegend=False)
@@ -574,7 +651,7 @@ with tab4:
         st.error(f"Error loading loyalty data: {str(e)}")
 
 # TAB 5: SPAM DETECTION
-with tab5:
+if show_section("🔍 Spam Detection"):
     st.header("🔍 Spam Detection")
     
     st.markdown('<div class="spam-warning">⚠️ Surveys completed in <10 seconds are flagged as spam.</div>', unsafe_allow_html=True)
@@ -596,19 +673,19 @@ with tab5:
         st.markdown("---")
         st.subheader("Time Distribution Analysis")
         
-        overall_df = load_data('survey_overall_experience', include_spam=True)
+        time_counts = chart_data('completion_time_counts', 'survey_overall_experience')
         
-        if not overall_df.empty:
-            valid_avg = overall_df[overall_df['is_spam'] == 0]['time_spent_seconds'].mean()
-            spam_avg = overall_df[overall_df['is_spam'] == 1]['time_spent_seconds'].mean() if len(overall_df[overall_df['is_spam'] == 1]) > 0 else 0
+        if not time_counts.empty:
+            valid_times = time_counts[time_counts['is_spam'] == 0]
+            spam_times = time_counts[time_counts['is_spam'] == 1]
             
-            valid_times = overall_df[overall_df['is_spam'] == 0]['time_spent_seconds']
-            spam_times = overall_df[overall_df['is_spam'] == 1]['time_spent_seconds']
+            valid_avg = (valid_times['time_spent_seconds'] * valid_times['count']).sum() / valid_times['count'].sum() if len(valid_times) > 0 else 0
+            spam_avg = (spam_times['time_spent_seconds'] * spam_times['count']).sum() / spam_times['count'].sum() if len(spam_times) > 0 else 0
             
             fig = go.Figure()
-            fig.add_trace(go.Histogram(x=valid_times, name='Valid Responses', opacity=0.7, marker_color='green', nbinsx=50))
+            fig.add_trace(go.Histogram(x=valid_times['time_spent_seconds'], y=valid_times['count'], histfunc='sum', name='Valid Responses', opacity=0.7, marker_color='green', nbinsx=50))
             if len(spam_times) > 0:
-                fig.add_trace(go.Histogram(x=spam_times, name='Spam', opacity=0.7, marker_color='red', nbinsx=50))
+                fig.add_trace(go.Histogram(x=spam_times['time_spent_seconds'], y=spam_times['count'], histfunc='sum', name='Spam', opacity=0.7, marker_color='red', nbinsx=50))
             
             fig.add_vline(x=valid_avg, line_color="green", line_width=3, line_dash="dash", annotation_text=f"Valid Avg: {valid_avg:.1f}s")
             if len(spam_times) > 0:
@@ -621,42 +698,42 @@ with tab5:
         st.error(f"Error: {str(e)}")
 
 # TAB 6: MARKETING
-with tab6:
+if show_section("📈 Marketing"):
     st.header("📈 Marketing Insights")
     
     try:
-        marketing_df = load_data('survey_marketing_loyalty', include_spam)
+        marketing_counts = chart_data('category_counts', 'survey_marketing_loyalty', dashboard_queries.MARKETING_FIELDS, include_spam)
         
-        if not marketing_df.empty:
+        if not marketing_counts['heard_about_gem'].empty:
             col1, col2 = st.columns(2)
             
             with col1:
-                heard_counts = marketing_df['heard_about_gem'].value_counts()
-                fig = px.pie(values=heard_counts.values, names=heard_counts.index, hole=0.4)
+                heard_counts = marketing_counts['heard_about_gem']
+                fig = px.pie(values=heard_counts['count'], names=heard_counts['value'], hole=0.4)
                 st.plotly_chart(fig, use_container_width=True)
                 
-                platform_counts = marketing_df['platform_influence'].value_counts()
+                platform_counts = marketing_counts['platform_influence']
                 platform_colors = {'Instagram': '#E4405F', 'Facebook': '#1877F2', 'TikTok': '#000000', 'YouTube': '#FF0000', 'Google': '#4285F4', 'None': '#9E9E9E'}
-                colors = [platform_colors.get(p, '#9E9E9E') for p in platform_counts.index]
+                colors = [platform_colors.get(p, '#9E9E9E') for p in platform_counts['value']]
                 
-                fig = go.Figure(data=[go.Bar(y=platform_counts.index, x=platform_counts.values, orientation='h', marker_color=colors)])
+                fig = go.Figure(data=[go.Bar(y=platform_counts['value'], x=platform_counts['count'], orientation='h', marker_color=colors)])
                 fig.update_layout(title='Platform Influence')
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
-                first_visit_counts = marketing_df['first_visit'].value_counts()
-                fig = px.pie(values=first_visit_counts.values, names=first_visit_counts.index, color_discrete_sequence=['#ff6b6b', '#4ecdc4'])
+                first_visit_counts = marketing_counts['first_visit']
+                fig = px.pie(values=first_visit_counts['count'], names=first_visit_counts['value'], color_discrete_sequence=['#ff6b6b', '#4ecdc4'])
                 st.plotly_chart(fig, use_container_width=True)
                 
-                return_counts = marketing_df['would_visit_again'].value_counts()
-                fig = px.bar(x=return_counts.index, y=return_counts.values, color=return_counts.values, color_continuous_scale='Greens')
+                return_counts = marketing_counts['would_visit_again']
+                fig = px.bar(x=return_counts['value'], y=return_counts['count'], color=return_counts['count'], color_continuous_scale='Greens')
                 st.plotly_chart(fig, use_container_width=True)
         
     except Exception as e:
         st.error(f"Error: {str(e)}")
 
 # TAB 7: EXPORT
-with tab7:
+if show_section("💾 Export"):
     st.header("💾 Data Export")
     
     export_options = st.multiselect("Select tables", ["Users", "Overall", "Service", "Tour", "Facilities", "Marketing", "Tut Immersive", "Children's"], default=["Users"])
@@ -666,7 +743,7 @@ with tab7:
             output = BytesIO()
             with pd.ExcelWriter(output, engine='openpyxl') as writer:
                 if "Users" in export_options:
-                    load_users().to_excel(writer, sheet_name='Users', index=False)
+                    load_users(db_version).to_excel(writer, sheet_name='Users', index=False)
             
             output.seek(0)
             st.download_button("📥 Download", data=output, file_name=f"gem_export_{datetime.now().strftime('%Y%m%d')}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
@@ -674,5 +751,20 @@ with tab7:
         except Exception as e:
             st.error(f"Error: {str(e)}")
 
+start_section()
+with st.expander("⏱️ Render stats (this run)"):
+    skipped = [name for name in SECTIONS if name != active_section]
+    saved_ms = sum(last_render_ms.get(name, 0) for name in skipped)
+    st.caption(f"Only {active_section} ran; skipping the other sections saved ~{saved_ms:.0f} ms "
+               "(their last measured render). Chart bytes are the aggregate query results each section read; "
+               "run dashboard_queries.py for the full-table comparison.")
+    st.dataframe(pd.DataFrame([
+        {'Section': name,
+         'Status': 'rendered' if name in render_stats else 'skipped',
+         'Render ms': round(last_render_ms[name], 1) if name in last_render_ms else None,
+         'Chart KB': round(render_stats[name]['bytes'] / 1024, 1) if name in render_stats else None}
+        for name in SECTIONS
+    ]), use_container_width=True, hide_index=True)
+
 st.markdown("---")
 st.markdown('<div style="text-align: center; color: #666;"><p>GEM Dashboard | {}</p></div>'.format(datetime.now().strftime("%Y-%m-%d %H:%M")), unsafe_allow_html=True)
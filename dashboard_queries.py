@@ -0,0 +1,491 @@
+"""
+GEM Dashboard Chart Queries
+Every staff dashboard chart computed in SQLite (counts, NPS buckets,
+averages), so each chart reads a handful of rows instead of whole tables
+"""
+
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import pandas as pd
+
+SURVEY_NAMES = {
+    'Overall Experience': 'survey_overall_experience',
+    'Service & Operations': 'survey_service_operations',
+    'Tour & Educational': 'survey_tour_educational',
+    'Facilities & Spending': 'survey_facilities_spending',
+    'Marketing & Loyalty': 'survey_marketing_loyalty',
+    'Tut Immersive Experience': 'survey_immersive_experience',
+    "Children's Museum": 'survey_childrens_museum'
+}
+
+# (chart label, survey table, rating column) for the Survey Analysis ratings chart
+RATING_CATEGORIES = [
+    ('Overall Experience', 'survey_overall_experience', 'overall_rating'),
+    ('Staff Hospitality', 'survey_service_operations', 'staff_hospitality_rating'),
+    ('Cleanliness', 'survey_service_operations', 'cleanliness_rating'),
+    ('Crowd Management', 'survey_service_operations', 'crowd_management_rating'),
+    ('Tour Experience', 'survey_tour_educational', 'tour_experience_rating'),
+    ('Facilities', 'survey_facilities_spending', 'facilities_rating'),
+    ('Tut Immersive', 'survey_immersive_experience', 'overall_immersive_rating'),
+    ("Children's Museum", 'survey_childrens_museum', 'overall_experience_rating'),
+]
+
+PAGE_SIZES = (25, 50, 100, 250)
+
+BROWSE_SCHEMA_PATH = Path(__file__).parent / 'database' / 'browse_schema.sql'
+
+MARKETING_FIELDS = ('heard_about_gem', 'platform_influence', 'first_visit', 'would_visit_again')
+DEMOGRAPHIC_GROUPS = ('nationality', 'language')
+
+
+def spam_clause(include_spam: bool, keyword: str = 'WHERE') -> str:
+    """SQL filter excluding spam unless include_spam"""
+    return "" if include_spam else f"{keyword} is_spam = 0"
+
+
+def result_bytes(result) -> int:
+    """In-memory size of a query result (DataFrame/Series, or dict/list of them)"""
+    if isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(index=True, deep=True).sum())
+    if isinstance(result, pd.Series):
+        return int(result.memory_usage(index=True, deep=True))
+    if isinstance(result, dict):
+        return sum(result_bytes(value) for value in result.values())
+    if isinstance(result, (list, tuple)):
+        return sum(result_bytes(value) for value in result)
+    return 8
+
+
+def data_version(conn) -> Tuple[int, int]:
+    """
+    Cache key that changes as soon as the database does
+    PRAGMA data_version moves when another connection commits; total_changes counts this connection's writes
+    """
+    return conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes
+
+
+# ============================================================
+# OVERVIEW / SIDEBAR
+# ============================================================
+
+def survey_stats(conn) -> Dict[str, Dict]:
+    """Total, spam and valid responses per survey, in one query"""
+    union = " UNION ALL ".join(
+        f"SELECT '{table}' AS survey_type, COUNT(*) AS total, COALESCE(SUM(is_spam), 0) AS spam FROM {table}"
+        for table in SURVEY_NAMES.values()
+    )
+    rows = {table: (total, spam) for table, total, spam in conn.execute(union)}
+    return {
+        name: {'total': rows[table][0], 'spam': rows[table][1], 'valid': rows[table][0] - rows[table][1]}
+        for name, table in SURVEY_NAMES.items()
+    }
+
+
+def visitor_count(conn) -> int:
+    """Registered visitors"""
+    return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+
+def rating_counts(conn, table: str, column: str, include_spam: bool = False) -> pd.DataFrame:
+    """Responses per rating value"""
+    if (table, column) not in {(t, c) for _, t, c in RATING_CATEGORIES}:
+        raise ValueError(f"Unknown rating column: {table}.{column}")
+    return pd.read_sql_query(f"""
+        SELECT {column} AS rating, COUNT(*) AS count
+        FROM {table}
+        WHERE {column} IS NOT NULL {spam_clause(include_spam, 'AND')}
+        GROUP BY {column}
+        ORDER BY {column}
+    """, conn)
+
+
+def nps_summary(conn, include_spam: bool = False) -> Dict:
+    """Average NPS and promoter/passive/detractor counts"""
+    row = conn.execute(f"""
+        SELECT AVG(nps_score),
+               COALESCE(SUM(nps_score >= 9), 0),
+               COALESCE(SUM(nps_score BETWEEN 7 AND 8), 0),
+               COALESCE(SUM(nps_score <= 6), 0)
+        FROM survey_overall_experience
+        {spam_clause(include_spam)}
+    """).fetchone()
+    return {'avg_nps': row[0], 'promoters': row[1], 'passives': row[2], 'detractors': row[3]}
+
+
+# ============================================================
+# DEMOGRAPHICS
+# ============================================================
+
+def top_groups_by_gender(conn, group: str, limit: int = 10) -> pd.DataFrame:
+    """Visitors per (group, gender) for the most common values of group, "Other" gender excluded"""
+    if group not in DEMOGRAPHIC_GROUPS:
+        raise ValueError(f"Unknown demographic group: {group}")
+    return pd.read_sql_query(f"""
+        WITH top_groups AS (
+            SELECT {group} FROM users
+            WHERE gender != 'Other'
+            GROUP BY {group}
+            ORDER BY COUNT(*) DESC, {group}
+            LIMIT ?
+        )
+        SELECT u.{group}, u.gender, COUNT(*) AS count
+        FROM users u
+        JOIN top_groups t ON t.{group} = u.{group}
+        WHERE u.gender != 'Other'
+        GROUP BY u.{group}, u.gender
+        ORDER BY count, u.{group}
+    """, conn, params=(limit,))
+
+
+def gender_counts(conn) -> pd.DataFrame:
+    """Visitors per gender, "Other" excluded"""
+    return pd.read_sql_query("""
+        SELECT gender, COUNT(*) AS count FROM users
+        WHERE gender != 'Other'
+        GROUP BY gender
+        ORDER BY count DESC, gender
+    """, conn)
+
+
+def age_counts(conn) -> pd.DataFrame:
+    """Visitors per age, "Other" gender excluded (binned by the chart)"""
+    return pd.read_sql_query("""
+        SELECT age, COUNT(*) AS count FROM users
+        WHERE gender != 'Other'
+        GROUP BY age
+        ORDER BY age
+    """, conn)
+
+
+# ============================================================
+# SURVEY ANALYSIS
+# ============================================================
+
+def rating_averages(conn, include_spam: bool = False) -> pd.DataFrame:
+    """Average rating per chart category, in one query; categories without ratings are left out"""
+    union = " UNION ALL ".join(
+        f"SELECT '{label.replace(chr(39), chr(39) * 2)}' AS Category, AVG({column}) AS Rating "
+        f"FROM {table} {spam_clause(include_spam)}"
+        for label, table, column in RATING_CATEGORIES
+    )
+    return pd.read_sql_query(f"SELECT * FROM ({union}) WHERE Rating IS NOT NULL", conn)
+
+
+# ============================================================
+# LOYALTY / SPAM / MARKETING
+# ============================================================
+
+def points_balance_counts(conn) -> pd.DataFrame:
+    """Users per positive points balance (binned by the chart)"""
+    return pd.read_sql_query("""
+        SELECT current_points_balance, COUNT(*) AS count FROM user_points
+        WHERE current_points_balance > 0
+        GROUP BY current_points_balance
+        ORDER BY current_points_balance
+    """, conn)
+
+
+def completion_time_counts(conn, table: str = 'survey_overall_experience') -> pd.DataFrame:
+    """Responses per (is_spam, time_spent_seconds), spam included"""
+    if table not in SURVEY_NAMES.values():
+        raise ValueError(f"Unknown survey table: {table}")
+    return pd.read_sql_query(f"""
+        SELECT is_spam, time_spent_seconds, COUNT(*) AS count FROM {table}
+        GROUP BY is_spam, time_spent_seconds
+        ORDER BY is_spam, time_spent_seconds
+    """, conn)
+
+
+def category_counts(conn, table: str = 'survey_marketing_loyalty', fields=MARKETING_FIELDS,
+                    include_spam: bool = False) -> Dict[str, pd.DataFrame]:
+    """Responses per value of each categorical field, most common first, in one query"""
+    if table != 'survey_marketing_loyalty' or not set(fields) <= set(MARKETING_FIELDS):
+        raise ValueError(f"Unknown categorical fields: {table}.{fields}")
+    union = " UNION ALL ".join(
+        f"SELECT '{field}' AS field, {field} AS value, COUNT(*) AS count FROM {table} "
+        f"WHERE {field} IS NOT NULL {spam_clause(include_spam, 'AND')} GROUP BY {field}"
+        for field in fields
+    )
+    counts = pd.read_sql_query(f"SELECT * FROM ({union}) ORDER BY field, count DESC, value", conn)
+    groups = {field: group[['value', 'count']].reset_index(drop=True) for field, group in counts.groupby('field')}
+    empty = pd.DataFrame(columns=['value', 'count'])
+    return {field: groups.get(field, empty) for field in fields}
+
+
+# ============================================================
+# DETAILED RESPONSES (KEYSET PAGINATION)
+# ============================================================
+
+_browse_schema_applied = set()
+
+
+def ensure_browse_schema(db_path: str):
+    """Apply the idempotent browsing indexes once per process"""
+    if db_path in _browse_schema_applied:
+        return
+
+    with open(BROWSE_SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        schema_sql = f.read()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(schema_sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+    _browse_schema_applied.add(db_path)
+
+
+def survey_columns(conn, table: str) -> List[str]:
+    """Column names of a survey table"""
+    if table not in SURVEY_NAMES.values():
+        raise ValueError(f"Unknown survey table: {table}")
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def rating_columns(columns: List[str]) -> List[str]:
+    """Numeric score columns a page can be filtered or sorted by"""
+    return [c for c in columns if c.endswith('_rating') or c == 'nps_score']
+
+
+def sort_columns(columns: List[str]) -> List[str]:
+    """Columns a page can be sorted by; response_id breaks ties"""
+    return ['submitted_at', 'response_id', 'time_spent_seconds'] + rating_columns(columns)
+
+
+def _response_filter(columns: List[str], filters: Optional[Dict]) -> Tuple[List[str], List]:
+    """
+    WHERE clauses and parameters for filters:
+    spam (0/1, None for all), rating_column + ratings, start_date/end_date ('YYYY-MM-DD', inclusive)
+    """
+    filters = filters or {}
+    clauses, params = [], []
+    if filters.get('spam') is not None:
+        clauses.append("is_spam = ?")
+        params.append(int(filters['spam']))
+    if filters.get('rating_column') and filters.get('ratings'):
+        if filters['rating_column'] not in rating_columns(columns):
+            raise ValueError(f"Unknown rating column: {filters['rating_column']}")
+        clauses.append(f"{filters['rating_column']} IN ({', '.join('?' * len(filters['ratings']))})")
+        params.extend(filters['ratings'])
+    if filters.get('start_date'):
+        clauses.append("submitted_at >= ?")
+        params.append(str(filters['start_date']))
+    if filters.get('end_date'):
+        clauses.append("submitted_at < date(?, '+1 day')")
+        params.append(str(filters['end_date']))
+    return clauses, params
+
+
+def count_responses(conn, table: str, filters: Optional[Dict] = None) -> int:
+    """Responses matching the filters"""
+    clauses, params = _response_filter(survey_columns(conn, table), filters)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return conn.execute(f"SELECT COUNT(*) FROM {table} {where}", params).fetchone()[0]
+
+
+def response_page(conn, table: str, sort_column: str = 'submitted_at', descending: bool = True,
+                  limit: int = 50, after: Optional[Tuple] = None, filters: Optional[Dict] = None) -> pd.DataFrame:
+    """
+    One page of responses in (sort_column, response_id) order, starting after the
+    (sort value, response_id) cursor of the previous page's last row
+    Only the page is read: no OFFSET, so later pages cost the same as the first
+    """
+    columns = survey_columns(conn, table)
+    if sort_column not in sort_columns(columns):
+        raise ValueError(f"Unknown sort column: {sort_column}")
+    clauses, params = _response_filter(columns, filters)
+
+    direction = 'DESC' if descending else 'ASC'
+    if sort_column == 'response_id':
+        order = f"response_id {direction}"
+        if after is not None:
+            clauses.append(f"response_id {'<' if descending else '>'} ?")
+            params.append(after[1])
+    else:
+        order = f"{sort_column} {direction}, response_id {direction}"
+        if after is not None:
+            # SQLite sorts NULLs first ascending and last descending
+            value, response_id = after
+            past = '<' if descending else '>'
+            if value is None:
+                clauses.append(f"(({sort_column} IS NULL AND response_id {past} ?)"
+                               + ("" if descending else f" OR {sort_column} IS NOT NULL") + ")")
+                params.append(response_id)
+            else:
+                clauses.append(f"({sort_column} {past} ? OR ({sort_column} = ? AND response_id {past} ?)"
+                               + (f" OR {sort_column} IS NULL" if descending else "") + ")")
+                params.extend([value, value, response_id])
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return pd.read_sql_query(f"SELECT * FROM {table} {where} ORDER BY {order} LIMIT ?",
+                             conn, params=params + [limit])
+
+
+def page_cursor(page: pd.DataFrame, sort_column: str) -> Optional[Tuple]:
+    """Keyset cursor (sort value, response_id) of a page's last row, None for an empty page"""
+    if page.empty:
+        return None
+    value = page[sort_column].iloc[-1]
+    if pd.isna(value):
+        value = None
+    elif hasattr(value, 'item'):
+        value = value.item()  # numpy scalar -> Python, so sqlite3 can bind it
+    return value, int(page['response_id'].iloc[-1])
+
+
+def comment_count(conn, table: str, column: str, include_spam: bool = False) -> int:
+    """Non-empty values of a comment column"""
+    if column not in survey_columns(conn, table):
+        raise ValueError(f"Unknown column: {table}.{column}")
+    return conn.execute(f"""
+        SELECT COUNT({column}) FROM {table} {spam_clause(include_spam)}
+    """).fetchone()[0]
+
+
+# ============================================================
+# BACKGROUND-REFRESHED PANELS
+# ============================================================
+
+class PanelCache:
+    """
+    Last computed result per key, recomputed on a background thread when the data version moves
+    Readers get the cached result at once, flagged stale until its refresh lands
+    """
+
+    def __init__(self, compute: Callable, max_workers: int = 2):
+        self._compute = compute
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='panel-refresh')
+        self._lock = threading.Lock()
+        self._results: Dict[Hashable, Tuple[Hashable, object]] = {}  # key -> (version, result)
+        self._pending: Dict[Hashable, Tuple[Hashable, Future]] = {}  # key -> (version, refresh)
+
+    def get(self, key: Tuple, version: Hashable, wait: bool = False) -> Tuple[Optional[object], bool]:
+        """
+        (result, stale) for compute(*key) at version
+        wait=True blocks only when nothing was ever computed for the key (nothing to show meanwhile)
+        """
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1], False
+            refresh = self._refresh(key, version)
+
+        if cached is None:
+            return (refresh.result(), False) if wait else (None, True)
+        return cached[1], True
+
+    def _refresh(self, key: Tuple, version: Hashable) -> Future:
+        """Refresh for key at version, starting it unless one is already running (lock held)"""
+        pending = self._pending.get(key)
+        if pending is not None and pending[0] == version:
+            return pending[1]
+        refresh = self._executor.submit(self._run, key, version)
+        self._pending[key] = (version, refresh)
+        return refresh
+
+    def _run(self, key: Tuple, version: Hashable):
+        """Compute one result and publish it; a failed refresh is retried on the next get"""
+        try:
+            result = self._compute(*key)
+            with self._lock:
+                self._results[key] = (version, result)
+            return result
+        finally:
+            with self._lock:
+                if self._pending.get(key, (None,))[0] == version:
+                    del self._pending[key]
+
+
+# ============================================================
+# BEFORE / AFTER REPORT
+# ============================================================
+
+def _full_table_loaders(conn, include_spam: bool) -> Dict[str, Callable]:
+    """What each tab did before pushdown: read whole tables, aggregate in pandas"""
+    spam = spam_clause(include_spam)
+
+    def load(table, where=spam):
+        return pd.read_sql_query(f"SELECT * FROM {table} {where}", conn)
+
+    def overview():
+        df = load('survey_overall_experience')
+        return [df, df['overall_rating'].value_counts().sort_index(), df['nps_score'].mean()]
+
+    def demographics():
+        users = pd.read_sql_query("SELECT * FROM users", conn)
+        users = users[users['gender'] != 'Other']
+        return [users] + [users[users[g].isin(users[g].value_counts().head(10).index)]
+                          .groupby([g, 'gender']).size() for g in DEMOGRAPHIC_GROUPS]
+
+    def survey_analysis():
+        return [load(table) for table in dict.fromkeys(t for _, t, _ in RATING_CATEGORIES)]
+
+    def loyalty():
+        return [pd.read_sql_query(
+            "SELECT current_points_balance FROM user_points WHERE current_points_balance > 0", conn)]
+
+    def marketing():
+        df = load('survey_marketing_loyalty')
+        return [df] + [df[f].value_counts() for f in MARKETING_FIELDS]
+
+    return {'Overview': overview, 'Demographics': demographics, 'Survey Analysis': survey_analysis,
+            'Loyalty Points': loyalty, 'Spam Detection': lambda: [load('survey_overall_experience', '')],
+            'Marketing': marketing}
+
+
+def _pushdown_loaders(conn, include_spam: bool) -> Dict[str, Callable]:
+    """What each tab does with the aggregate queries"""
+    return {
+        'Overview': lambda: [rating_counts(conn, 'survey_overall_experience', 'overall_rating', include_spam),
+                             nps_summary(conn, include_spam)],
+        'Demographics': lambda: [top_groups_by_gender(conn, g) for g in DEMOGRAPHIC_GROUPS]
+                                + [gender_counts(conn), age_counts(conn)],
+        'Survey Analysis': lambda: [rating_averages(conn, include_spam)],
+        'Loyalty Points': lambda: [points_balance_counts(conn)],
+        'Spam Detection': lambda: [completion_time_counts(conn)],
+        'Marketing': lambda: [category_counts(conn, include_spam=include_spam)],
+    }
+
+
+def compare_chart_loading(db_path: str = "visitor_feedback.db", include_spam: bool = False,
+                          repeats: int = 5) -> pd.DataFrame:
+    """
+    Bytes read and best-of-repeats load time per tab, full-table loads vs aggregate queries
+    Returns: DataFrame (tab, before_bytes, after_bytes, before_ms, after_ms)
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = {}
+        for phase, loaders in (('before', _full_table_loaders(conn, include_spam)),
+                               ('after', _pushdown_loaders(conn, include_spam))):
+            for tab, loader in loaders.items():
+                timings = []
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    result = loader()
+                    timings.append((time.perf_counter() - started) * 1000)
+                row = rows.setdefault(tab, {'tab': tab})
+                row[f'{phase}_bytes'] = result_bytes(result)
+                row[f'{phase}_ms'] = round(min(timings), 2)
+
+        return pd.DataFrame(list(rows.values()),
+                            columns=['tab', 'before_bytes', 'after_bytes', 'before_ms', 'after_ms'])
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    report = compare_chart_loading()
+    print("=" * 70)
+    print("📦 DASHBOARD CHART LOADING: FULL TABLES vs SQL AGGREGATES")
+    print("=" * 70)
+    print(report.to_string(index=False))
+    print(f"\nTotal bytes: {report['before_bytes'].sum():,} -> {report['after_bytes'].sum():,}")
+    print(f"Total time:  {report['before_ms'].sum():.1f} ms -> {report['after_ms'].sum():.1f} ms")
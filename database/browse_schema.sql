@@ -0,0 +1,13 @@
+-- ============================================================
+-- DASHBOARD RESPONSE BROWSING INDEXES FOR GEM MUSEUM FEEDBACK
+-- Idempotent: safe to apply on every start, never drops data
+-- ============================================================
+
+-- Keyset pages sorted/filtered by submission date: (submitted_at, rowid) order
+CREATE INDEX IF NOT EXISTS idx_overall_submitted ON survey_overall_experience(submitted_at);
+CREATE INDEX IF NOT EXISTS idx_service_submitted ON survey_service_operations(submitted_at);
+CREATE INDEX IF NOT EXISTS idx_tour_submitted ON survey_tour_educational(submitted_at);
+CREATE INDEX IF NOT EXISTS idx_facilities_submitted ON survey_facilities_spending(submitted_at);
+CREATE INDEX IF NOT EXISTS idx_marketing_submitted ON survey_marketing_loyalty(submitted_at);
+CREATE INDEX IF NOT EXISTS idx_immersive_submitted ON survey_immersive_experience(submitted_at);
+CREATE INDEX IF NOT EXISTS idx_childrens_submitted ON survey_childrens_museum(submitted_at);
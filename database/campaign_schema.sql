@@ -0,0 +1,22 @@
+-- ============================================================
+-- POINT CAMPAIGNS FOR GEM MUSEUM LOYALTY PROGRAM
+-- Idempotent: safe to apply on every start, never drops data
+-- ============================================================
+
+-- Each active row is one rule. Empty filter columns match everything.
+-- Matching campaigns stack: multipliers multiply, bonus points add.
+CREATE TABLE IF NOT EXISTS point_campaigns (
+    campaign_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    campaign_name TEXT NOT NULL UNIQUE,
+    starts_at TIMESTAMP, -- NULL = already running
+    ends_at TIMESTAMP, -- NULL = open-ended (exclusive bound)
+    weekdays TEXT, -- comma-separated, 0 = Monday ... 6 = Sunday
+    survey_types TEXT, -- comma-separated survey table names
+    tiers TEXT, -- comma-separated badge tiers: None, Explorer, Guardian, Legend
+    multiplier REAL NOT NULL DEFAULT 1.0 CHECK(multiplier >= 0),
+    bonus_points INTEGER NOT NULL DEFAULT 0,
+    is_active INTEGER DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_point_campaigns_active ON point_campaigns(is_active, ends_at);
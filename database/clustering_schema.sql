@@ -0,0 +1,50 @@
+-- ============================================================
+-- THEME DISCOVERY (COMMENT CLUSTERING) FOR GEM MUSEUM FEEDBACK
+-- Idempotent: safe to apply on every start, never drops data
+-- ============================================================
+
+-- Mini-batch k-means state: centroids over hashed TF-IDF features
+CREATE TABLE IF NOT EXISTS theme_cluster_model (
+    model_id INTEGER PRIMARY KEY CHECK(model_id = 1), -- single model
+    num_clusters INTEGER NOT NULL,
+    n_features INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    n_docs INTEGER NOT NULL, -- documents seen by the IDF counts
+    centroids BLOB, -- num_clusters x n_features float32
+    center_counts BLOB NOT NULL, -- comments assigned to each cluster so far, int64
+    doc_freq BLOB NOT NULL, -- documents containing each feature, int64
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- One readable term per hashed feature, for naming clusters
+CREATE TABLE IF NOT EXISTS theme_cluster_terms (
+    feature INTEGER PRIMARY KEY,
+    term TEXT NOT NULL
+);
+
+-- Candidate representative comments, closest to their centroid first
+CREATE TABLE IF NOT EXISTS theme_cluster_representatives (
+    cluster_id INTEGER NOT NULL,
+    comment TEXT NOT NULL,
+    similarity REAL NOT NULL,
+    PRIMARY KEY (cluster_id, comment)
+);
+
+-- Highest survey rowid already clustered, per survey table
+CREATE TABLE IF NOT EXISTS theme_clustering_watermarks (
+    survey_type TEXT PRIMARY KEY,
+    last_rowid INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Cluster of each comment at the time it was clustered
+CREATE TABLE IF NOT EXISTS survey_comment_themes (
+    survey_type TEXT NOT NULL,
+    response_id INTEGER NOT NULL,
+    cluster_id INTEGER NOT NULL,
+    similarity REAL NOT NULL,
+    PRIMARY KEY (survey_type, response_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_survey_comment_themes_cluster
+    ON survey_comment_themes(cluster_id);
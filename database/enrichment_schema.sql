@@ -0,0 +1,27 @@
+-- ============================================================
+-- INGEST-TIME COMMENT ENRICHMENT FOR GEM MUSEUM FEEDBACK
+-- Idempotent: safe to apply on every start, never drops data
+-- Sentiment goes to survey_comment_sentiment (sentiment_schema.sql)
+-- ============================================================
+
+-- Highest survey rowid already enriched, per survey table
+CREATE TABLE IF NOT EXISTS enrichment_watermarks (
+    survey_type TEXT PRIMARY KEY, -- survey table name
+    last_rowid INTEGER NOT NULL DEFAULT 0,
+    analyzer_version TEXT, -- a different version re-enriches the table from the start
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Every topic matched in a comment, ranked by score within the comment
+CREATE TABLE IF NOT EXISTS survey_comment_topics (
+    survey_type TEXT NOT NULL,
+    response_id INTEGER NOT NULL,
+    comment_column TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    score REAL NOT NULL,
+    topic_rank INTEGER NOT NULL, -- 1 = top topic of the comment
+    PRIMARY KEY (survey_type, response_id, comment_column, topic)
+);
+
+CREATE INDEX IF NOT EXISTS idx_survey_comment_topics_topic
+    ON survey_comment_topics(survey_type, topic);
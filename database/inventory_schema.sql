@@ -0,0 +1,79 @@
+-- ============================================================
+-- REWARD INVENTORY & RESERVATIONS FOR GEM MUSEUM
+-- Idempotent: safe to apply on every start, never drops data
+-- ============================================================
+
+-- ============================================================
+-- REWARD INVENTORY (Stock for Physical & Partner Rewards)
+-- ============================================================
+-- Rewards without a row here (digital badges, experiences) are unlimited.
+-- available = stock_on_hand - reserved_quantity
+CREATE TABLE IF NOT EXISTS reward_inventory (
+    reward_id INTEGER PRIMARY KEY,
+    stock_on_hand INTEGER NOT NULL DEFAULT 0 CHECK(stock_on_hand >= 0),
+    reserved_quantity INTEGER NOT NULL DEFAULT 0 CHECK(reserved_quantity >= 0),
+    low_stock_threshold INTEGER NOT NULL DEFAULT 10,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CHECK(reserved_quantity <= stock_on_hand),
+    FOREIGN KEY (reward_id) REFERENCES rewards_catalog(reward_id) ON DELETE CASCADE
+);
+
+-- ============================================================
+-- REWARD RESERVATIONS (Short-Lived Kiosk Holds)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS reward_reservations (
+    reservation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    reward_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'ACTIVE', -- 'ACTIVE', 'CONFIRMED', 'RELEASED', 'EXPIRED'
+    redemption_id INTEGER, -- set once the reservation is confirmed
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+    FOREIGN KEY (reward_id) REFERENCES rewards_catalog(reward_id),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- Seed stock for physical and partner rewards (existing rows are left alone)
+INSERT OR IGNORE INTO reward_inventory (reward_id, stock_on_hand, low_stock_threshold)
+SELECT reward_id,
+       CASE reward_category
+           WHEN 'Low-Cost Physical' THEN 500
+           WHEN 'Medium-Cost' THEN 200
+           WHEN 'Partner Rewards' THEN 100
+       END,
+       CASE reward_category
+           WHEN 'Low-Cost Physical' THEN 50
+           ELSE 20
+       END
+FROM rewards_catalog
+WHERE reward_category IN ('Low-Cost Physical', 'Medium-Cost', 'Partner Rewards');
+
+-- Rewards added to the catalog later get their stock row straight away, without a restart
+CREATE TRIGGER IF NOT EXISTS trg_reward_inventory_seed
+AFTER INSERT ON rewards_catalog
+WHEN NEW.reward_category IN ('Low-Cost Physical', 'Medium-Cost', 'Partner Rewards')
+BEGIN
+    INSERT OR IGNORE INTO reward_inventory (reward_id, stock_on_hand, low_stock_threshold)
+    VALUES (NEW.reward_id,
+            CASE NEW.reward_category
+                WHEN 'Low-Cost Physical' THEN 500
+                WHEN 'Medium-Cost' THEN 200
+                WHEN 'Partner Rewards' THEN 100
+            END,
+            CASE NEW.reward_category
+                WHEN 'Low-Cost Physical' THEN 50
+                ELSE 20
+            END);
+END;
+
+-- ============================================================
+-- INDEXES FOR PERFORMANCE
+-- ============================================================
+-- Expiry sweep only ever touches ACTIVE holds
+CREATE INDEX IF NOT EXISTS idx_reward_reservations_active
+    ON reward_reservations(expires_at) WHERE status = 'ACTIVE';
+CREATE INDEX IF NOT EXISTS idx_reward_reservations_user
+    ON reward_reservations(user_id, status);
+-- Fulfillment worker scans PENDING redemptions in id order
+CREATE INDEX IF NOT EXISTS idx_redemption_history_pending
+    ON redemption_history(redemption_id) WHERE redemption_status = 'PENDING';
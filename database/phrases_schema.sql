@@ -0,0 +1,26 @@
+-- ============================================================
+-- TRENDING PHRASES FOR GEM MUSEUM FEEDBACK
+-- Idempotent: safe to apply on every start, never drops data
+-- ============================================================
+
+-- Count-min sketch of phrase counts per survey table (fixed size whatever the volume)
+CREATE TABLE IF NOT EXISTS phrase_sketches (
+    survey_type TEXT PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    width INTEGER NOT NULL,
+    seed INTEGER NOT NULL, -- sketches only merge when depth, width and seed match
+    total_phrases INTEGER NOT NULL DEFAULT 0,
+    counts BLOB NOT NULL, -- depth x width int64 counters
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Current top-K phrases per survey table, with their sketch estimates
+CREATE TABLE IF NOT EXISTS trending_phrases (
+    survey_type TEXT NOT NULL,
+    phrase TEXT NOT NULL,
+    estimate INTEGER NOT NULL,
+    PRIMARY KEY (survey_type, phrase)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_trending_phrases_estimate
+    ON trending_phrases(survey_type, estimate DESC);
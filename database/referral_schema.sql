@@ -0,0 +1,28 @@
+-- ============================================================
+-- REFERRAL CODES FOR GEM MUSEUM LOYALTY PROGRAM
+-- Idempotent: safe to apply on every start, never drops data
+-- ============================================================
+
+-- One short shareable code per user. The UNIQUE constraint is the lookup
+-- index: resolving a code to its referrer is a single index probe.
+CREATE TABLE IF NOT EXISTS referral_codes (
+    user_id INTEGER PRIMARY KEY,
+    referral_code TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- Random per-database key of the code permutation (see referral_codes.py);
+-- codes cannot be derived from user ids without it
+CREATE TABLE IF NOT EXISTS referral_code_secret (
+    secret_id INTEGER PRIMARY KEY CHECK(secret_id = 1),
+    secret TEXT NOT NULL, -- hex
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- A visitor can be the completed referral of only one referrer
+CREATE UNIQUE INDEX IF NOT EXISTS idx_referral_tracking_referred_once
+    ON referral_tracking(referred_user_id) WHERE visit_completed = 1;
+
+-- Referral history is also searched by the code a friend used
+CREATE INDEX IF NOT EXISTS idx_referral_tracking_code ON referral_tracking(referral_code);
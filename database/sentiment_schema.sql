@@ -0,0 +1,51 @@
+-- ============================================================
+-- COMMENT SENTIMENT STORAGE FOR GEM MUSEUM FEEDBACK ANALYSIS
+-- Idempotent: safe to apply on every start, never drops data
+-- ============================================================
+
+-- One row per distinct normalized comment text and analyzer version.
+-- Comments never change after submission, so a row is valid until the
+-- lexicon or scoring changes, which bumps ANALYZER_VERSION.
+CREATE TABLE IF NOT EXISTS comment_sentiment (
+    text_hash TEXT NOT NULL, -- sha1 of the normalized comment text
+    analyzer_version TEXT NOT NULL,
+    score REAL NOT NULL,
+    label TEXT NOT NULL, -- 'Positive', 'Neutral', 'Negative'
+    confidence REAL NOT NULL,
+    rating INTEGER NOT NULL CHECK(rating BETWEEN 1 AND 5),
+    num_sentences INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (text_hash, analyzer_version)
+) WITHOUT ROWID;
+
+-- Per-response sentiment owned by the comment enrichment worker (one current row per response)
+CREATE TABLE IF NOT EXISTS survey_comment_sentiment (
+    survey_type TEXT NOT NULL, -- survey table name
+    response_id INTEGER NOT NULL,
+    comment_column TEXT NOT NULL,
+    analyzer_version TEXT NOT NULL,
+    score REAL NOT NULL,
+    label TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    rating INTEGER NOT NULL CHECK(rating BETWEEN 1 AND 5),
+    scored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (survey_type, response_id, comment_column)
+);
+
+CREATE INDEX IF NOT EXISTS idx_survey_comment_sentiment_label
+    ON survey_comment_sentiment(survey_type, label);
+
+-- Per-response sentiment written back by the streaming pipeline; kept apart from the
+-- worker's rows, and per analyzer version so fast and full runs do not overwrite each other
+CREATE TABLE IF NOT EXISTS streamed_comment_sentiment (
+    survey_type TEXT NOT NULL, -- survey table name
+    response_id INTEGER NOT NULL,
+    comment_column TEXT NOT NULL,
+    analyzer_version TEXT NOT NULL,
+    score REAL NOT NULL,
+    label TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    rating INTEGER NOT NULL CHECK(rating BETWEEN 1 AND 5),
+    scored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (survey_type, response_id, comment_column, analyzer_version)
+);
@@ -0,0 +1,32 @@
+-- ============================================================
+-- EMERGING-TOPIC TRACKING FOR GEM MUSEUM FEEDBACK
+-- Idempotent: safe to apply on every start, never drops data
+-- ============================================================
+
+-- Comments mentioning each topic, per time bucket and survey table
+CREATE TABLE IF NOT EXISTS topic_time_buckets (
+    granularity TEXT NOT NULL, -- 'hour' or 'day'
+    bucket_start TIMESTAMP NOT NULL, -- start of the bucket, same clock as submitted_at
+    survey_type TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    mentions INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket_start, survey_type, topic)
+) WITHOUT ROWID;
+
+-- Detector clock: the open bucket and how many buckets the baseline has seen
+CREATE TABLE IF NOT EXISTS topic_trend_clock (
+    granularity TEXT PRIMARY KEY,
+    current_bucket TIMESTAMP,
+    closed_buckets INTEGER NOT NULL DEFAULT 0,
+    late_mentions INTEGER NOT NULL DEFAULT 0, -- arrived after their bucket closed
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- EWMA baseline of mentions per closed bucket, per topic
+CREATE TABLE IF NOT EXISTS topic_trend_baseline (
+    granularity TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    ewma_mean REAL NOT NULL,
+    ewma_var REAL NOT NULL,
+    PRIMARY KEY (granularity, topic)
+) WITHOUT ROWID;
@@ -0,0 +1,22 @@
+-- ============================================================
+-- AWARD VELOCITY CHECKS FOR GEM MUSEUM LOYALTY PROGRAM
+-- Idempotent: safe to apply on every start, never drops data
+-- ============================================================
+
+-- ============================================================
+-- HELD AWARDS (Survey Awards Waiting for Staff Review)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS held_awards (
+    hold_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    survey_type TEXT NOT NULL,
+    survey_id INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'HELD', -- 'HELD', 'RELEASED', 'REJECTED'
+    held_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    reviewed_at TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_held_awards_open ON held_awards(held_at) WHERE status = 'HELD';
+CREATE INDEX IF NOT EXISTS idx_held_awards_user ON held_awards(user_id);
@@ -9,16 +9,46 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import json
 
+from referral_codes import ReferralCodeManager, normalize_code
+from reward_inventory import RewardInventory
+
 # Constants
 POINTS_PER_SURVEY = 20
 POINTS_PER_REFERRAL = 30
 POINTS_PER_PROFILE_COMPLETION = 40
 
+# Badge tiers by lifetime points earned
+TIER_NAMES = ('None', 'Explorer', 'Guardian', 'Legend')
+TIER_THRESHOLDS = (20, 60, 120)
+
+# Survey tables that earn points (survey_type values for award_survey_points)
+SURVEY_TYPES = (
+    'survey_overall_experience',
+    'survey_service_operations',
+    'survey_tour_educational',
+    'survey_facilities_spending',
+    'survey_marketing_loyalty',
+    'survey_immersive_experience',
+    'survey_childrens_museum'
+)
+
 class LoyaltyPointsEngine:
     """Main engine for managing the museum's loyalty program"""
     
-    def __init__(self, db_path: str = "visitor_feedback.db"):
+    def __init__(self, db_path: str = "visitor_feedback.db", campaigns=None, velocity=None):
+        """
+        Args:
+            db_path: SQLite database path
+            campaigns: Optional CompiledCampaigns (see campaign_rules.load_campaigns)
+                       applied to survey awards; None awards POINTS_PER_SURVEY
+            velocity: Optional VelocityLimiter (see award_velocity) that can hold
+                      or reject survey awards; None disables velocity checks
+        """
         self.db_path = db_path
+        self.campaigns = campaigns
+        self.velocity = velocity
+        if velocity is not None:
+            velocity.ensure_schema(db_path)
     
     def _get_connection(self):
         """Get database connection"""
@@ -52,21 +82,46 @@ class LoyaltyPointsEngine:
     # POINT GENERATION
     # ============================================================
     
-    def award_survey_points(self, user_id: int, survey_type: str, survey_id: int) -> Dict:
+    def award_survey_points(self, user_id: int, survey_type: str, survey_id: int,
+                            check_velocity: bool = True) -> Dict:
         """Award points for completing a survey"""
         try:
             conn = self._get_connection()
             cursor = conn.cursor()
             
+            # Spam flag and sliding-window limits; the award only counts once it commits
+            count_velocity = self.velocity is not None and check_velocity
+            if count_velocity:
+                action, reason = self.velocity.check_award(cursor, user_id, survey_type, survey_id, record=False)
+                if action == 'reject':
+                    conn.close()
+                    return {"success": False, "error": f"Award rejected: {reason}"}
+                if action == 'hold':
+                    hold_id = self.velocity.hold_award(cursor, user_id, survey_type, survey_id, reason)
+                    conn.commit()
+                    self.velocity.record_award(cursor, user_id)
+                    conn.close()
+                    return {
+                        "success": False,
+                        "held": True,
+                        "hold_id": hold_id,
+                        "error": f"Award held for review: {reason}"
+                    }
+            
             # Check if user exists in points table
             self.initialize_user_points(user_id)
             
             # Get current balance
-            cursor.execute("SELECT current_points_balance FROM user_points WHERE user_id = ?", (user_id,))
+            cursor.execute("SELECT current_points_balance, total_points_earned FROM user_points WHERE user_id = ?", (user_id,))
             result = cursor.fetchone()
             current_balance = result[0] if result else 0
             
-            new_balance = current_balance + POINTS_PER_SURVEY
+            # Apply running campaigns (precompiled lookup, no per-award rule evaluation)
+            points, campaign = POINTS_PER_SURVEY, None
+            if self.campaigns is not None:
+                points, campaign = self.campaigns.evaluate(survey_type, result[1] if result else 0)
+            
+            new_balance = current_balance + points
             
             # Update user_points
             cursor.execute("""
@@ -77,24 +132,30 @@ class LoyaltyPointsEngine:
                     surveys_completed = surveys_completed + 1,
                     updated_at = CURRENT_TIMESTAMP
                 WHERE user_id = ?
-            """, (POINTS_PER_SURVEY, new_balance, POINTS_PER_SURVEY, user_id))
+            """, (points, new_balance, points, user_id))
             
             # Log transaction
+            description = f"Survey completed: {survey_type}"
+            if campaign:
+                description += f" ({campaign})"
+            
             cursor.execute("""
                 INSERT INTO points_transactions 
                 (user_id, transaction_type, points_change, balance_after, reference_id, reference_type, description)
                 VALUES (?, 'SURVEY', ?, ?, ?, ?, ?)
-            """, (user_id, POINTS_PER_SURVEY, new_balance, survey_id, survey_type, 
-                  f"Survey completed: {survey_type}"))
+            """, (user_id, points, new_balance, survey_id, survey_type, description))
             
             conn.commit()
+            if count_velocity:
+                self.velocity.record_award(cursor, user_id)
             conn.close()
             
             return {
                 "success": True,
-                "points_awarded": POINTS_PER_SURVEY,
+                "points_awarded": points,
                 "new_balance": new_balance,
-                "message": f"Earned {POINTS_PER_SURVEY} points for completing survey!"
+                "campaign": campaign,
+                "message": f"Earned {points} points for completing survey!"
             }
         except Exception as e:
             print(f"Error awarding survey points: {e}")
@@ -103,9 +164,21 @@ class LoyaltyPointsEngine:
     def award_referral_points(self, referrer_user_id: int, referred_user_id: int, referral_code: Optional[str] = None) -> Dict:
         """Award points when a referred friend completes their first visit check-in"""
         try:
+            # Enroll the referrer before this connection takes the write lock
+            self.initialize_user_points(referrer_user_id)
+            
             conn = self._get_connection()
             cursor = conn.cursor()
             
+            # Each visitor counts as a completed referral for one referrer only
+            cursor.execute("""
+                SELECT 1 FROM referral_tracking
+                WHERE referred_user_id = ? AND visit_completed = 1
+            """, (referred_user_id,))
+            if cursor.fetchone():
+                conn.close()
+                return {"success": False, "error": "This visitor was already referred"}
+            
             # Check if referral already exists and is completed
             cursor.execute("""
                 SELECT referral_id, visit_completed 
@@ -116,8 +189,7 @@ class LoyaltyPointsEngine:
             existing = cursor.fetchone()
             
             if existing:
-                if existing[1] == 1:
-                    return {"success": False, "error": "Referral already completed"}
+                # Pending (a completed one was rejected above)
                 referral_id = existing[0]
             else:
                 # Create new referral record
@@ -137,9 +209,6 @@ class LoyaltyPointsEngine:
                 WHERE referral_id = ?
             """, (POINTS_PER_REFERRAL, referral_id))
             
-            # Initialize points for referrer if needed
-            self.initialize_user_points(referrer_user_id)
-            
             # Get current balance
             cursor.execute("SELECT current_points_balance FROM user_points WHERE user_id = ?", (referrer_user_id,))
             current_balance = cursor.fetchone()[0]
@@ -177,6 +246,17 @@ class LoyaltyPointsEngine:
             print(f"Error awarding referral points: {e}")
             return {"success": False, "error": str(e)}
     
+    def award_referral_by_code(self, referral_code: str, referred_user_id: int) -> Dict:
+        """Award referral points to whoever owns the referral code a friend used"""
+        referrer_user_id = ReferralCodeManager(self.db_path).resolve_code(referral_code)
+        
+        if referrer_user_id is None:
+            return {"success": False, "error": "Unknown referral code"}
+        if referrer_user_id == referred_user_id:
+            return {"success": False, "error": "Users cannot refer themselves"}
+        
+        return self.award_referral_points(referrer_user_id, referred_user_id, normalize_code(referral_code))
+    
     def award_profile_completion_points(self, user_id: int) -> Dict:
         """Award points for completing user profile"""
         try:
@@ -231,6 +311,47 @@ class LoyaltyPointsEngine:
             print(f"Error awarding profile completion points: {e}")
             return {"success": False, "error": str(e)}
     
+    def review_held_award(self, hold_id: int, approve: bool) -> Dict:
+        """Release (award) or reject a survey award held by the velocity checks"""
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            
+            # Claim the hold so a second reviewer cannot release it too
+            cursor.execute("""
+                UPDATE held_awards
+                SET status = ?, reviewed_at = CURRENT_TIMESTAMP
+                WHERE hold_id = ? AND status = 'HELD'
+            """, ('RELEASED' if approve else 'REJECTED', hold_id))
+            
+            if cursor.rowcount == 0:
+                conn.close()
+                return {"success": False, "error": "No held award with that id"}
+            
+            cursor.execute("SELECT user_id, survey_type, survey_id FROM held_awards WHERE hold_id = ?", (hold_id,))
+            user_id, survey_type, survey_id = cursor.fetchone()
+            
+            conn.commit()
+            conn.close()
+            
+            if not approve:
+                return {"success": True, "message": "Held award rejected"}
+            
+            result = self.award_survey_points(user_id, survey_type, survey_id, check_velocity=False)
+            if not result["success"]:
+                # The award did not go through: put the hold back for another review
+                conn = self._get_connection()
+                conn.execute("""
+                    UPDATE held_awards SET status = 'HELD', reviewed_at = NULL
+                    WHERE hold_id = ? AND status = 'RELEASED'
+                """, (hold_id,))
+                conn.commit()
+                conn.close()
+            return result
+        except Exception as e:
+            print(f"Error reviewing held award: {e}")
+            return {"success": False, "error": str(e)}
+    
     # ============================================================
     # REWARD REDEMPTION
     # ============================================================
@@ -257,6 +378,13 @@ class LoyaltyPointsEngine:
             if not is_active:
                 return {"success": False, "error": "Reward is no longer available"}
             
+            # Rewards with an inventory row go through the stock-tracked path; the rest are unlimited
+            inventory = RewardInventory(self.db_path)
+            cursor.execute("SELECT 1 FROM reward_inventory WHERE reward_id = ?", (reward_id,))
+            if cursor.fetchone():
+                conn.close()
+                return inventory.redeem_stocked_reward(user_id, reward_name)
+            
             # Get user's current balance
             cursor.execute("SELECT current_points_balance FROM user_points WHERE user_id = ?", (user_id,))
             result = cursor.fetchone()
@@ -616,6 +744,11 @@ def award_points_for_referral(referrer_id: int, referred_id: int, db_path: str =
     engine = LoyaltyPointsEngine(db_path)
     return engine.award_referral_points(referrer_id, referred_id)
 
+def award_points_for_referral_code(referral_code: str, referred_id: int, db_path: str = "visitor_feedback.db"):
+    """Convenience function to award referral points from a shared referral code"""
+    engine = LoyaltyPointsEngine(db_path)
+    return engine.award_referral_by_code(referral_code, referred_id)
+
 def redeem_user_reward(user_id: int, reward_name: str, db_path: str = "visitor_feedback.db"):
     """Convenience function to redeem a reward"""
     engine = LoyaltyPointsEngine(db_path)
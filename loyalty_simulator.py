@@ -0,0 +1,303 @@
+"""
+GEM Museum Loyalty Economics Simulator
+Monte Carlo projection of point earn/burn, outstanding liability and badge tiers
+for candidate point rules, seeded from the live loyalty tables
+"""
+
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from loyalty_engine import (
+    POINTS_PER_SURVEY, POINTS_PER_REFERRAL, POINTS_PER_PROFILE_COMPLETION,
+    TIER_NAMES, TIER_THRESHOLDS
+)
+
+# Used when the database has too little history to estimate a window
+DEFAULT_OBSERVATION_DAYS = 365
+
+
+def _tier_of(earned: np.ndarray) -> np.ndarray:
+    """Badge tier index (0 = None ... 3 = Legend) for lifetime points earned"""
+    return np.searchsorted(np.asarray(TIER_THRESHOLDS), earned, side='right')
+
+
+def _bucket_by_day(event_day: np.ndarray, days: int, *columns: np.ndarray):
+    """Sort event columns by day and return them with per-day slice bounds"""
+    order = np.argsort(event_day, kind='stable')
+    bounds = np.searchsorted(event_day[order], np.arange(days + 1))
+    return (*(column[order] for column in columns), bounds)
+
+
+class LoyaltySimulator:
+    """Vectorized Monte Carlo simulator for loyalty program economics
+
+    Every simulated visitor is a slot in a set of NumPy arrays. Earn events and
+    redemption attempts for the whole horizon are drawn in bulk and bucketed by
+    day, so each simulated day only touches the visitors active that day.
+    """
+
+    def __init__(self, db_path: str = "visitor_feedback.db"):
+        self.db_path = db_path
+        self.seed_data = None
+
+    # ============================================================
+    # SEEDING
+    # ============================================================
+
+    def load_seed_data(self) -> Dict:
+        """Read current behaviour distributions from user_points and redemption_history"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            users = pd.read_sql_query("""
+                SELECT surveys_completed, referrals_completed, profile_completed,
+                       current_points_balance, total_points_earned
+                FROM user_points
+            """, conn)
+
+            redemptions = pd.read_sql_query("""
+                SELECT reward_name, COUNT(*) AS redemptions
+                FROM redemption_history
+                GROUP BY reward_name
+            """, conn)
+
+            catalog = pd.read_sql_query("""
+                SELECT reward_name, points_required
+                FROM rewards_catalog
+                WHERE is_active = 1
+            """, conn)
+
+            cursor = conn.cursor()
+            cursor.execute("SELECT MIN(created_at), MAX(created_at) FROM points_transactions")
+            first, last = cursor.fetchone()
+        finally:
+            conn.close()
+
+        observation_days = DEFAULT_OBSERVATION_DAYS
+        if first and last:
+            span = (datetime.fromisoformat(last) - datetime.fromisoformat(first)).days
+            if span >= 30:
+                observation_days = span
+
+        if users.empty:
+            users = pd.DataFrame({
+                'surveys_completed': [0], 'referrals_completed': [0], 'profile_completed': [0],
+                'current_points_balance': [0], 'total_points_earned': [0]
+            })
+
+        # Daily redemption propensity of a visitor who could afford something
+        min_price = catalog['points_required'].min() if not catalog.empty else 0
+        eligible = max(int((users['total_points_earned'] >= min_price).sum()), 1)
+        total_redemptions = int(redemptions['redemptions'].sum()) if not redemptions.empty else 0
+
+        self.seed_data = {
+            'survey_rates': users['surveys_completed'].to_numpy(dtype=np.float64) / observation_days,
+            'referral_rates': users['referrals_completed'].to_numpy(dtype=np.float64) / observation_days,
+            'profile_completion_rate': float(users['profile_completed'].mean()),
+            'profile_completed': users['profile_completed'].fillna(0).to_numpy(dtype=bool),
+            'start_balances': users['current_points_balance'].to_numpy(dtype=np.int64),
+            'start_earned': users['total_points_earned'].to_numpy(dtype=np.int64),
+            'daily_redeem_probability': total_redemptions / (eligible * observation_days),
+            'reward_choice_counts': dict(zip(redemptions['reward_name'], redemptions['redemptions'])),
+            'catalog_prices': dict(zip(catalog['reward_name'], catalog['points_required'])),
+            'observation_days': observation_days
+        }
+        return self.seed_data
+
+    def baseline_rules(self) -> Dict:
+        """Current point constants and catalog prices as a rule set"""
+        if self.seed_data is None:
+            self.load_seed_data()
+
+        return {
+            'name': 'Current rules',
+            'points_per_survey': POINTS_PER_SURVEY,
+            'points_per_referral': POINTS_PER_REFERRAL,
+            'points_per_profile_completion': POINTS_PER_PROFILE_COMPLETION,
+            'reward_prices': dict(self.seed_data['catalog_prices']),
+            'engagement_multiplier': 1.0
+        }
+
+    # ============================================================
+    # SIMULATION
+    # ============================================================
+
+    def simulate(self, rules: Optional[Dict] = None, n_visitors: int = 100_000, days: int = 365,
+                 start_from_current: bool = True, random_seed: Optional[int] = None) -> Dict:
+        """
+        Project one rule set forward
+
+        Args:
+            rules: Rule set dict; missing keys fall back to baseline_rules()
+            n_visitors: Number of simulated visitors (bootstrapped from current users)
+            days: Simulation horizon in days
+            start_from_current: Start from current balances instead of zero
+            random_seed: Seed for reproducible runs
+
+        Returns:
+            dict with 'daily' DataFrame, 'summary' dict and 'final_tiers' counts
+        """
+        if self.seed_data is None:
+            self.load_seed_data()
+
+        seed = self.seed_data
+        rules = {**self.baseline_rules(), **(rules or {})}
+        rng = np.random.default_rng(random_seed)
+        started = time.perf_counter()
+
+        # Bootstrap visitors jointly from real users so rates and balances stay correlated
+        sample = rng.integers(0, len(seed['survey_rates']), size=n_visitors)
+        engagement = rules['engagement_multiplier']
+        survey_rate = seed['survey_rates'][sample] * engagement
+        referral_rate = seed['referral_rates'][sample] * engagement
+
+        if start_from_current:
+            balance = seed['start_balances'][sample].copy()
+            earned = seed['start_earned'][sample].copy()
+        else:
+            balance = np.zeros(n_visitors, dtype=np.int64)
+            earned = np.zeros(n_visitors, dtype=np.int64)
+
+        visitors = np.arange(n_visitors)
+
+        # Earn events for the whole horizon are drawn up front: a Poisson count per
+        # visitor scattered uniformly over the days is the same daily Poisson process
+        survey_counts = rng.poisson(survey_rate * days)
+        referral_counts = rng.poisson(referral_rate * days)
+        profile_mask = rng.random(n_visitors) < seed['profile_completion_rate']
+        if start_from_current:
+            # The profile bonus is one-off: visitors who already earned it cannot earn it again
+            profile_mask &= ~seed['profile_completed'][sample]
+
+        earn_visitor = np.concatenate([
+            np.repeat(visitors, survey_counts),
+            np.repeat(visitors, referral_counts),
+            visitors[profile_mask]
+        ])
+        earn_points = np.concatenate([
+            np.full(survey_counts.sum(), rules['points_per_survey'], dtype=np.int64),
+            np.full(referral_counts.sum(), rules['points_per_referral'], dtype=np.int64),
+            np.full(profile_mask.sum(), rules['points_per_profile_completion'], dtype=np.int64)
+        ])
+        earn_visitor, earn_points, earn_bounds = _bucket_by_day(
+            rng.integers(0, max(days, 1), size=len(earn_visitor)), days, earn_visitor, earn_points)
+
+        # Redemption attempts: observed shares over the candidate catalog, add-one smoothed
+        reward_names = list(rules['reward_prices'])
+        if reward_names:
+            prices = np.array([rules['reward_prices'][r] for r in reward_names], dtype=np.int64)
+            weights = np.array([seed['reward_choice_counts'].get(r, 0) + 1 for r in reward_names],
+                               dtype=np.float64)
+            choice_cdf = np.cumsum(weights / weights.sum())
+
+            attempt_counts = rng.poisson(seed['daily_redeem_probability'] * days, size=n_visitors)
+            attempt_visitor = np.repeat(visitors, attempt_counts)
+            attempt_cost = prices[np.minimum(np.searchsorted(choice_cdf, rng.random(len(attempt_visitor))),
+                                             len(prices) - 1)]
+        else:
+            # Empty catalog: nothing to redeem
+            attempt_visitor = visitors[:0]
+            attempt_cost = np.zeros(0, dtype=np.int64)
+        attempt_visitor, attempt_cost, attempt_bounds = _bucket_by_day(
+            rng.integers(0, max(days, 1), size=len(attempt_visitor)), days, attempt_visitor, attempt_cost)
+
+        daily_earned = np.zeros(days, dtype=np.int64)
+        daily_burned = np.zeros(days, dtype=np.int64)
+        daily_redemptions = np.zeros(days, dtype=np.int64)
+        tier_counts = np.zeros((days, len(TIER_NAMES)), dtype=np.int64)
+        tier_bins = len(TIER_NAMES)
+        current_tiers = np.bincount(_tier_of(earned), minlength=tier_bins)
+
+        # Each day only touches the visitors with events that day
+        for day in range(days):
+            lo, hi = earn_bounds[day], earn_bounds[day + 1]
+            if hi > lo:
+                ids = earn_visitor[lo:hi]
+                pts = earn_points[lo:hi]
+                touched = np.unique(ids)
+                current_tiers -= np.bincount(_tier_of(earned[touched]), minlength=tier_bins)
+                np.add.at(balance, ids, pts)
+                np.add.at(earned, ids, pts)
+                current_tiers += np.bincount(_tier_of(earned[touched]), minlength=tier_bins)
+                daily_earned[day] = pts.sum()
+
+            lo, hi = attempt_bounds[day], attempt_bounds[day + 1]
+            if hi > lo:
+                # A visitor considers at most one reward per day
+                ids, first = np.unique(attempt_visitor[lo:hi], return_index=True)
+                cost = attempt_cost[lo:hi][first]
+                redeem = balance[ids] >= cost
+                balance[ids[redeem]] -= cost[redeem]
+                daily_burned[day] = cost[redeem].sum()
+                daily_redemptions[day] = redeem.sum()
+
+            tier_counts[day] = current_tiers
+
+        start_liability = int(seed['start_balances'][sample].sum()) if start_from_current else 0
+        liability = start_liability + np.cumsum(daily_earned) - np.cumsum(daily_burned)
+
+        daily = pd.DataFrame({
+            'day': np.arange(1, days + 1),
+            'points_earned': daily_earned,
+            'points_burned': daily_burned,
+            'redemptions': daily_redemptions,
+            'outstanding_liability': liability
+        })
+        for i, tier in enumerate(TIER_NAMES):
+            daily[f'tier_{tier.lower()}'] = tier_counts[:, i]
+
+        total_earned = int(daily_earned.sum())
+        total_burned = int(daily_burned.sum())
+
+        summary = {
+            'rule_set': rules['name'],
+            'visitors': n_visitors,
+            'days': days,
+            'total_points_earned': total_earned,
+            'total_points_burned': total_burned,
+            'burn_rate_percent': round(total_burned / total_earned * 100, 2) if total_earned else 0,
+            'total_redemptions': int(daily_redemptions.sum()),
+            'ending_liability': int(balance.sum()),
+            'avg_balance_per_visitor': round(float(balance.mean()), 2),
+            'runtime_seconds': round(time.perf_counter() - started, 3)
+        }
+
+        return {
+            'daily': daily,
+            'summary': summary,
+            'final_tiers': dict(zip(TIER_NAMES, tier_counts[-1].tolist())) if days else {}
+        }
+
+    def compare_rule_sets(self, rule_sets: List[Dict], n_visitors: int = 100_000, days: int = 365,
+                          random_seed: int = 42) -> pd.DataFrame:
+        """Simulate several candidate rule sets with the same seed and tabulate the outcomes"""
+        rows = []
+        for rules in rule_sets:
+            result = self.simulate(rules, n_visitors=n_visitors, days=days, random_seed=random_seed)
+            rows.append({**result['summary'], **{f'final_{k.lower()}': v for k, v in result['final_tiers'].items()}})
+        return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    simulator = LoyaltySimulator()
+    baseline = simulator.baseline_rules()
+
+    candidates = [
+        baseline,
+        {'name': 'Survey 15 / Referral 40', 'points_per_survey': 15, 'points_per_referral': 40},
+        {'name': 'Physical rewards +20%', 'reward_prices': {
+            name: int(price * 1.2) if name in ('Keychain', 'Postcard', 'Sticker Sheet', 'Mini Papyrus Bookmark')
+            else price
+            for name, price in baseline['reward_prices'].items()
+        }},
+    ]
+
+    print("=" * 70)
+    print("📈 LOYALTY ECONOMICS SIMULATION (100,000 visitors × 365 days)")
+    print("=" * 70)
+    comparison = simulator.compare_rule_sets(candidates)
+    print(comparison.to_string(index=False))
@@ -0,0 +1,195 @@
+"""
+GEM Museum Referral Codes
+Short per-user referral codes, generated collision-free and resolved
+to the referrer with a single index lookup
+"""
+
+import hashlib
+import secrets
+import sqlite3
+from pathlib import Path
+from typing import Dict, Optional
+
+# Crockford base32: no I, L, O or U, so codes survive being read aloud or retyped
+CODE_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+CODE_PREFIX = 'GEM'
+CODE_LENGTH = 6
+CODE_SPACE = len(CODE_ALPHABET) ** CODE_LENGTH
+
+# Keyed Feistel permutation of [0, CODE_SPACE) = 2**30: every round is invertible, so
+# distinct user ids always get distinct codes, and without the per-database secret
+# (referral_code_secret) nobody can compute another user's code from their id
+_FEISTEL_ROUNDS = 4
+_HALF_BITS = 15
+_HALF_MASK = (1 << _HALF_BITS) - 1
+
+# Common misreadings folded onto the canonical alphabet
+_CODE_TRANSLATION = str.maketrans({'O': '0', 'I': '1', 'L': '1', 'U': 'V'})
+
+SCHEMA_PATH = Path(__file__).parent / 'database' / 'referral_schema.sql'
+
+_schema_applied = set()
+
+
+def _round_value(secret: bytes, round_index: int, half: int) -> int:
+    """Keyed round function of the Feistel permutation"""
+    digest = hashlib.blake2b(half.to_bytes(2, 'big') + bytes([round_index]), key=secret, digest_size=2).digest()
+    return int.from_bytes(digest, 'big') & _HALF_MASK
+
+
+def code_for_user(user_id: int, secret: bytes) -> str:
+    """Collision-free referral code for a user id, deterministic for a given secret"""
+    if not 0 <= user_id < CODE_SPACE:
+        raise ValueError(f"user_id out of referral code range: {user_id}")
+
+    left, right = user_id >> _HALF_BITS, user_id & _HALF_MASK
+    for round_index in range(_FEISTEL_ROUNDS):
+        left, right = right, left ^ _round_value(secret, round_index, right)
+    value = (left << _HALF_BITS) | right
+
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, digit = divmod(value, len(CODE_ALPHABET))
+        chars.append(CODE_ALPHABET[digit])
+    return CODE_PREFIX + ''.join(reversed(chars))
+
+
+def normalize_code(code: str) -> Optional[str]:
+    """Canonical form of a typed code, or None if it cannot be a valid code"""
+    if not code:
+        return None
+
+    cleaned = ''.join(code.split()).replace('-', '').upper()
+    if cleaned.startswith(CODE_PREFIX):
+        cleaned = cleaned[len(CODE_PREFIX):]
+    cleaned = cleaned.translate(_CODE_TRANSLATION)
+
+    if len(cleaned) != CODE_LENGTH or any(c not in CODE_ALPHABET for c in cleaned):
+        return None
+    return CODE_PREFIX + cleaned
+
+
+class ReferralCodeManager:
+    """Issue, bulk-generate and resolve referral codes"""
+
+    def __init__(self, db_path: str = "visitor_feedback.db"):
+        self.db_path = db_path
+        self._ensure_schema()
+        self.secret = self._load_secret()
+
+    def _get_connection(self):
+        """Get database connection"""
+        return sqlite3.connect(self.db_path)
+
+    def _ensure_schema(self):
+        """Apply the idempotent referral schema once per process"""
+        if self.db_path in _schema_applied:
+            return
+
+        with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+            schema_sql = f.read()
+
+        conn = self._get_connection()
+        try:
+            conn.executescript(schema_sql)
+            conn.commit()
+        finally:
+            conn.close()
+
+        _schema_applied.add(self.db_path)
+
+    def _load_secret(self) -> bytes:
+        """This database's code secret, created at random on first use"""
+        conn = self._get_connection()
+        try:
+            conn.execute("INSERT OR IGNORE INTO referral_code_secret (secret_id, secret) VALUES (1, ?)",
+                         (secrets.token_hex(16),))
+            conn.commit()
+            return bytes.fromhex(conn.execute(
+                "SELECT secret FROM referral_code_secret WHERE secret_id = 1").fetchone()[0])
+        finally:
+            conn.close()
+
+    def get_or_create_code(self, user_id: int) -> Dict:
+        """Return a user's referral code, issuing it on first request"""
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+
+            cursor.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,))
+            if not cursor.fetchone():
+                conn.close()
+                return {"success": False, "error": "User not found"}
+
+            cursor.execute("""
+                INSERT OR IGNORE INTO referral_codes (user_id, referral_code)
+                VALUES (?, ?)
+            """, (user_id, code_for_user(user_id, self.secret)))
+
+            cursor.execute("SELECT referral_code FROM referral_codes WHERE user_id = ?", (user_id,))
+            referral_code = cursor.fetchone()[0]
+
+            conn.commit()
+            conn.close()
+
+            return {"success": True, "user_id": user_id, "referral_code": referral_code}
+        except Exception as e:
+            print(f"Error creating referral code: {e}")
+            return {"success": False, "error": str(e)}
+
+    def resolve_code(self, referral_code: str) -> Optional[int]:
+        """Referrer user_id for a code (one probe of the unique index), or None"""
+        code = normalize_code(referral_code)
+        if code is None:
+            return None
+
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT user_id FROM referral_codes WHERE referral_code = ?", (code,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+        finally:
+            conn.close()
+
+    def generate_all_codes(self, batch_size: int = 5000) -> Dict:
+        """Issue codes for every user that does not have one yet"""
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT u.user_id
+                FROM users u
+                LEFT JOIN referral_codes rc ON rc.user_id = u.user_id
+                WHERE rc.user_id IS NULL
+                ORDER BY u.user_id
+            """)
+            missing = [row[0] for row in cursor.fetchall()]
+
+            for start in range(0, len(missing), batch_size):
+                batch = missing[start:start + batch_size]
+                cursor.executemany("""
+                    INSERT OR IGNORE INTO referral_codes (user_id, referral_code)
+                    VALUES (?, ?)
+                """, [(user_id, code_for_user(user_id, self.secret)) for user_id in batch])
+
+            conn.commit()
+
+            cursor.execute("SELECT COUNT(*) FROM referral_codes")
+            total = cursor.fetchone()[0]
+            conn.close()
+
+            return {"success": True, "codes_created": len(missing), "total_codes": total}
+        except Exception as e:
+            print(f"Error generating referral codes: {e}")
+            return {"success": False, "error": str(e)}
+
+
+if __name__ == "__main__":
+    manager = ReferralCodeManager()
+    result = manager.generate_all_codes()
+    if result['success']:
+        print(f"✅ Created {result['codes_created']} referral codes ({result['total_codes']} total)")
+    else:
+        print(f"❌ {result['error']}")
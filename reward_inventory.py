@@ -0,0 +1,500 @@
+"""
+GEM Museum Reward Inventory
+Stock tracking, short-lived kiosk reservations and redemption fulfillment
+for physical and partner rewards
+"""
+
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Constants
+RESERVATION_HOLD_SECONDS = 120
+BUSY_TIMEOUT_SECONDS = 10
+FULFILLMENT_BATCH_SIZE = 500
+
+SCHEMA_PATH = Path(__file__).parent / 'database' / 'inventory_schema.sql'
+
+# db paths whose inventory schema has already been applied in this process
+_schema_applied = set()
+
+
+class RewardInventory:
+    """Contention-safe stock, reservations and fulfillment for stocked rewards
+
+    Every write runs inside ``BEGIN IMMEDIATE`` so concurrent kiosks queue on
+    SQLite's write lock instead of reading stale stock, and every decrement is
+    a conditional ``UPDATE`` so stock and balances can never go negative.
+    """
+
+    def __init__(self, db_path: str = "visitor_feedback.db"):
+        self.db_path = db_path
+        self._ensure_schema()
+
+    def _get_connection(self):
+        """Get database connection with explicit transaction control"""
+        return sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+
+    def _ensure_schema(self):
+        """
+        Apply the idempotent inventory schema once per process
+        Existing stocked rewards are seeded here; rewards added to the catalog afterwards
+        are seeded by a trigger, and deleting a reward's row makes it unlimited
+        """
+        if self.db_path in _schema_applied:
+            return
+
+        with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+            schema_sql = f.read()
+
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_SECONDS)
+        try:
+            conn.executescript(schema_sql)
+            conn.commit()
+        finally:
+            conn.close()
+
+        _schema_applied.add(self.db_path)
+
+    def _expire_reservations(self, cursor) -> int:
+        """Release stock held by expired reservations (caller owns the transaction)"""
+        cursor.execute("""
+            UPDATE reward_inventory
+            SET reserved_quantity = reserved_quantity - (
+                    SELECT COUNT(*) FROM reward_reservations rr
+                    WHERE rr.reward_id = reward_inventory.reward_id
+                      AND rr.status = 'ACTIVE' AND rr.expires_at <= datetime('now')
+                ),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE reward_id IN (
+                SELECT reward_id FROM reward_reservations
+                WHERE status = 'ACTIVE' AND expires_at <= datetime('now')
+            )
+        """)
+
+        cursor.execute("""
+            UPDATE reward_reservations
+            SET status = 'EXPIRED'
+            WHERE status = 'ACTIVE' AND expires_at <= datetime('now')
+        """)
+        return cursor.rowcount
+
+    def _get_stocked_reward(self, cursor, reward_name: str):
+        """Return (reward_id, category, points_required, is_active) for a stocked reward"""
+        cursor.execute("""
+            SELECT r.reward_id, r.reward_category, r.points_required, r.is_active
+            FROM rewards_catalog r
+            JOIN reward_inventory i ON i.reward_id = r.reward_id
+            WHERE r.reward_name = ?
+        """, (reward_name,))
+        return cursor.fetchone()
+
+    def _complete_redemption(self, cursor, user_id: int, reward_id: int, reward_name: str,
+                             reward_category: str, points_required: int) -> Dict:
+        """Deduct points, take the item off the shelf and log a PENDING redemption"""
+        cursor.execute("""
+            UPDATE user_points
+            SET total_points_spent = total_points_spent + ?,
+                current_points_balance = current_points_balance - ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE user_id = ? AND current_points_balance >= ?
+        """, (points_required, points_required, user_id, points_required))
+
+        if cursor.rowcount == 0:
+            return {"success": False, "error": f"Insufficient points. Need {points_required}"}
+
+        cursor.execute("""
+            UPDATE reward_inventory
+            SET stock_on_hand = stock_on_hand - 1,
+                reserved_quantity = reserved_quantity - 1,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE reward_id = ? AND reserved_quantity >= 1
+        """, (reward_id,))
+
+        if cursor.rowcount == 0:
+            return {"success": False, "error": "Reward is out of stock"}
+
+        cursor.execute("SELECT current_points_balance FROM user_points WHERE user_id = ?", (user_id,))
+        new_balance = cursor.fetchone()[0]
+
+        cursor.execute("""
+            INSERT INTO redemption_history
+            (user_id, reward_id, reward_name, reward_category, points_spent, remaining_balance, redemption_status)
+            VALUES (?, ?, ?, ?, ?, ?, 'PENDING')
+        """, (user_id, reward_id, reward_name, reward_category, points_required, new_balance))
+
+        redemption_id = cursor.lastrowid
+
+        cursor.execute("""
+            INSERT INTO points_transactions
+            (user_id, transaction_type, points_change, balance_after, reference_id, reference_type, description)
+            VALUES (?, 'REDEMPTION', ?, ?, ?, 'redemption', ?)
+        """, (user_id, -points_required, new_balance, redemption_id,
+              f"Redeemed: {reward_name}"))
+
+        return {
+            "success": True,
+            "redemption_id": redemption_id,
+            "reward_name": reward_name,
+            "points_spent": points_required,
+            "new_balance": new_balance,
+            "redemption_status": "PENDING",
+            "message": f"Successfully redeemed {reward_name}! Collect it at the rewards desk."
+        }
+
+    # ============================================================
+    # RESERVATIONS
+    # ============================================================
+
+    def reserve_reward(self, user_id: int, reward_name: str,
+                       hold_seconds: int = RESERVATION_HOLD_SECONDS) -> Dict:
+        """Hold one unit of a stocked reward for a user until the hold expires"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            self._expire_reservations(cursor)
+
+            reward = self._get_stocked_reward(cursor, reward_name)
+            if not reward:
+                cursor.execute("ROLLBACK")
+                return {"success": False, "error": "Reward not found or not stock-tracked"}
+
+            reward_id, _, points_required, is_active = reward
+            if not is_active:
+                cursor.execute("ROLLBACK")
+                return {"success": False, "error": "Reward is no longer available"}
+
+            cursor.execute("SELECT current_points_balance FROM user_points WHERE user_id = ?", (user_id,))
+            result = cursor.fetchone()
+            if not result:
+                cursor.execute("ROLLBACK")
+                return {"success": False, "error": "User not enrolled in loyalty program"}
+            if result[0] < points_required:
+                cursor.execute("ROLLBACK")
+                return {
+                    "success": False,
+                    "error": f"Insufficient points. Need {points_required}, have {result[0]}"
+                }
+
+            # Atomic: only succeeds while unreserved stock remains
+            cursor.execute("""
+                UPDATE reward_inventory
+                SET reserved_quantity = reserved_quantity + 1,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE reward_id = ? AND stock_on_hand - reserved_quantity >= 1
+            """, (reward_id,))
+
+            if cursor.rowcount == 0:
+                cursor.execute("ROLLBACK")
+                return {"success": False, "error": "Reward is out of stock"}
+
+            cursor.execute("""
+                INSERT INTO reward_reservations (reward_id, user_id, expires_at)
+                VALUES (?, ?, datetime('now', ?))
+            """, (reward_id, user_id, f"+{int(hold_seconds)} seconds"))
+            reservation_id = cursor.lastrowid
+
+            cursor.execute("SELECT expires_at FROM reward_reservations WHERE reservation_id = ?", (reservation_id,))
+            expires_at = cursor.fetchone()[0]
+
+            cursor.execute("COMMIT")
+
+            return {
+                "success": True,
+                "reservation_id": reservation_id,
+                "reward_name": reward_name,
+                "expires_at": expires_at,
+                "message": f"{reward_name} reserved for {int(hold_seconds)} seconds"
+            }
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            print(f"Error reserving reward: {e}")
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
+    def confirm_reservation(self, reservation_id: int) -> Dict:
+        """Turn an active reservation into a PENDING redemption"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            self._expire_reservations(cursor)
+
+            cursor.execute("""
+                SELECT rr.user_id, rr.reward_id, rr.status, r.reward_name, r.reward_category, r.points_required
+                FROM reward_reservations rr
+                JOIN rewards_catalog r ON r.reward_id = rr.reward_id
+                WHERE rr.reservation_id = ?
+            """, (reservation_id,))
+
+            reservation = cursor.fetchone()
+            if not reservation:
+                cursor.execute("ROLLBACK")
+                return {"success": False, "error": "Reservation not found"}
+
+            user_id, reward_id, status, reward_name, reward_category, points_required = reservation
+            if status != 'ACTIVE':
+                # Commit so the expiry sweep above is kept
+                cursor.execute("COMMIT")
+                return {"success": False, "error": f"Reservation is {status.lower()}"}
+
+            result = self._complete_redemption(cursor, user_id, reward_id, reward_name,
+                                               reward_category, points_required)
+            if not result["success"]:
+                cursor.execute("ROLLBACK")
+                return result
+
+            cursor.execute("""
+                UPDATE reward_reservations
+                SET status = 'CONFIRMED', redemption_id = ?
+                WHERE reservation_id = ?
+            """, (result["redemption_id"], reservation_id))
+
+            cursor.execute("COMMIT")
+            return result
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            print(f"Error confirming reservation: {e}")
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
+    def release_reservation(self, reservation_id: int) -> Dict:
+        """Cancel an active reservation and return its unit to stock"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+
+            cursor.execute("""
+                UPDATE reward_reservations
+                SET status = 'RELEASED'
+                WHERE reservation_id = ? AND status = 'ACTIVE'
+            """, (reservation_id,))
+
+            if cursor.rowcount == 0:
+                cursor.execute("ROLLBACK")
+                return {"success": False, "error": "No active reservation to release"}
+
+            cursor.execute("""
+                UPDATE reward_inventory
+                SET reserved_quantity = reserved_quantity - 1,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE reward_id = (SELECT reward_id FROM reward_reservations WHERE reservation_id = ?)
+            """, (reservation_id,))
+
+            cursor.execute("COMMIT")
+            return {"success": True, "message": "Reservation released"}
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            print(f"Error releasing reservation: {e}")
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
+    def expire_reservations(self) -> int:
+        """Expire overdue reservations and return how many were released"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            expired = self._expire_reservations(cursor)
+            cursor.execute("COMMIT")
+            return expired
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            print(f"Error expiring reservations: {e}")
+            return 0
+        finally:
+            conn.close()
+
+    # ============================================================
+    # REDEMPTION
+    # ============================================================
+
+    def redeem_stocked_reward(self, user_id: int, reward_name: str) -> Dict:
+        """Reserve and confirm a stocked reward in a single transaction"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            self._expire_reservations(cursor)
+
+            reward = self._get_stocked_reward(cursor, reward_name)
+            if not reward:
+                cursor.execute("ROLLBACK")
+                return {"success": False, "error": "Reward not found or not stock-tracked"}
+
+            reward_id, reward_category, points_required, is_active = reward
+            if not is_active:
+                cursor.execute("ROLLBACK")
+                return {"success": False, "error": "Reward is no longer available"}
+
+            cursor.execute("SELECT current_points_balance FROM user_points WHERE user_id = ?", (user_id,))
+            result = cursor.fetchone()
+            if not result:
+                cursor.execute("ROLLBACK")
+                return {"success": False, "error": "User not enrolled in loyalty program"}
+            if result[0] < points_required:
+                cursor.execute("ROLLBACK")
+                return {
+                    "success": False,
+                    "error": f"Insufficient points. Need {points_required}, have {result[0]}"
+                }
+
+            cursor.execute("""
+                UPDATE reward_inventory
+                SET reserved_quantity = reserved_quantity + 1
+                WHERE reward_id = ? AND stock_on_hand - reserved_quantity >= 1
+            """, (reward_id,))
+
+            if cursor.rowcount == 0:
+                cursor.execute("ROLLBACK")
+                return {"success": False, "error": "Reward is out of stock"}
+
+            result = self._complete_redemption(cursor, user_id, reward_id, reward_name,
+                                               reward_category, points_required)
+            cursor.execute("COMMIT" if result["success"] else "ROLLBACK")
+            return result
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            print(f"Error redeeming stocked reward: {e}")
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
+    def fulfill_pending_redemptions(self, batch_size: int = FULFILLMENT_BATCH_SIZE) -> int:
+        """Mark the oldest batch of PENDING redemptions as COMPLETED"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                UPDATE redemption_history
+                SET redemption_status = 'COMPLETED'
+                WHERE redemption_id IN (
+                    SELECT redemption_id FROM redemption_history
+                    WHERE redemption_status = 'PENDING'
+                    ORDER BY redemption_id
+                    LIMIT ?
+                )
+            """, (batch_size,))
+            fulfilled = cursor.rowcount
+            cursor.execute("COMMIT")
+            return fulfilled
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            print(f"Error fulfilling redemptions: {e}")
+            return 0
+        finally:
+            conn.close()
+
+    # ============================================================
+    # STOCK MANAGEMENT
+    # ============================================================
+
+    def restock(self, reward_name: str, quantity: int) -> Dict:
+        """Add units to a reward's stock, enrolling it in inventory if needed"""
+        if quantity <= 0:
+            return {"success": False, "error": "Restock quantity must be positive"}
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT reward_id FROM rewards_catalog WHERE reward_name = ?", (reward_name,))
+            reward = cursor.fetchone()
+            if not reward:
+                cursor.execute("ROLLBACK")
+                return {"success": False, "error": "Reward not found"}
+
+            cursor.execute("""
+                INSERT INTO reward_inventory (reward_id, stock_on_hand)
+                VALUES (?, ?)
+                ON CONFLICT(reward_id) DO UPDATE SET
+                    stock_on_hand = stock_on_hand + excluded.stock_on_hand,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (reward[0], quantity))
+
+            cursor.execute("SELECT stock_on_hand FROM reward_inventory WHERE reward_id = ?", (reward[0],))
+            stock_on_hand = cursor.fetchone()[0]
+            cursor.execute("COMMIT")
+
+            return {"success": True, "reward_name": reward_name, "stock_on_hand": stock_on_hand}
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            print(f"Error restocking reward: {e}")
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
+    def get_stock_levels(self) -> List[Dict]:
+        """Get stock, reservations and pending fulfillment per stocked reward"""
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT r.reward_name, r.reward_category, i.stock_on_hand, i.reserved_quantity,
+                       i.stock_on_hand - i.reserved_quantity AS available,
+                       i.low_stock_threshold,
+                       (SELECT COUNT(*) FROM redemption_history rh
+                        WHERE rh.reward_id = i.reward_id AND rh.redemption_status = 'PENDING') AS pending
+                FROM reward_inventory i
+                JOIN rewards_catalog r ON r.reward_id = i.reward_id
+                ORDER BY available ASC
+            """)
+
+            levels = []
+            for row in cursor.fetchall():
+                levels.append({
+                    "reward_name": row[0],
+                    "category": row[1],
+                    "stock_on_hand": row[2],
+                    "reserved": row[3],
+                    "available": row[4],
+                    "low_stock": row[4] <= row[5],
+                    "pending_fulfillment": row[6]
+                })
+            return levels
+        finally:
+            conn.close()
+
+
+# ============================================================
+# FULFILLMENT WORKER
+# ============================================================
+
+def run_fulfillment_worker(db_path: str = "visitor_feedback.db", poll_seconds: float = 5.0,
+                           batch_size: int = FULFILLMENT_BATCH_SIZE, max_idle_polls: Optional[int] = None):
+    """Continuously fulfill PENDING redemptions and sweep expired reservations"""
+    inventory = RewardInventory(db_path)
+    idle_polls = 0
+
+    while max_idle_polls is None or idle_polls < max_idle_polls:
+        expired = inventory.expire_reservations()
+        fulfilled = inventory.fulfill_pending_redemptions(batch_size)
+
+        if fulfilled or expired:
+            print(f"✅ Fulfilled {fulfilled} redemptions, expired {expired} reservations")
+            idle_polls = 0
+            # A full batch means more work is waiting: drain without sleeping
+            if fulfilled == batch_size:
+                continue
+        else:
+            idle_polls += 1
+
+        time.sleep(poll_seconds)
+
+
+if __name__ == "__main__":
+    run_fulfillment_worker()
@@ -5,18 +5,95 @@ Uses transformer-based models for deep sentiment analysis and topic extraction
 
 import pandas as pd
 import numpy as np
-from textblob import TextBlob
 import re
+import sqlite3
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
 from collections import Counter
 import warnings
+
+from loyalty_engine import SURVEY_TYPES
+
 warnings.filterwarnings('ignore')
 
+try:
+    from textblob import TextBlob
+except ImportError:  # lexicon-only scoring still works without TextBlob
+    TextBlob = None
+
+# Sentence score blend when TextBlob is available: custom lexicon vs TextBlob polarity
+CUSTOM_WEIGHT = 0.6
+TEXTBLOB_WEIGHT = 0.4
+
+# Bump whenever the lexicon or scoring changes so cached sentiment is recomputed
+ANALYZER_VERSION = '2'
+
+SENTIMENT_SCHEMA_PATH = Path(__file__).parent / 'database' / 'sentiment_schema.sql'
+
+# Per-language lexicon packs (users.language -> lexicons/<code>.json), merged over
+# the English lexicon since many visitors still write in English
+LEXICON_DIR = Path(__file__).parent / 'lexicons'
+LANGUAGE_PACKS = {
+    'French': 'fr', 'German': 'de', 'Spanish': 'es',
+    'Italian': 'it', 'Portuguese': 'pt', 'Arabic': 'ar'
+}
+DEFAULT_LANGUAGE = 'English'
+# Pack words that are also everyday English; they do not mark a comment as non-English
+SHARED_WITH_ENGLISH = frozenset({'super', 'total', 'non'})
+
+# Hashes per SELECT ... IN (...) lookup against the sentiment cache
+CACHE_LOOKUP_CHUNK = 500
+
+# Rows per fetchmany() batch in the streaming pipeline
+STREAM_BATCH_SIZE = 1_000
+
+# Process-pool scoring: comments per task, and below this many distinct texts stay serial
+PARALLEL_CHUNK_SIZE = 5_000
+PARALLEL_MIN_COMMENTS = 20_000
+
+# analyze_multiple_comments switches to the document-term path at this size
+VECTORIZED_TOPIC_MIN_COMMENTS = 500
+DOCUMENT_SEPARATOR = '\x1e'
+
+_schema_applied = set()
+_worker_analyzer = None
+
+@lru_cache(maxsize=None)
+def load_lexicon_pack(language):
+    """Lexicon pack for a language, read on first use and cached; None if there is none"""
+    code = LANGUAGE_PACKS.get(language)
+    if code is None:
+        return None
+    with open(LEXICON_DIR / f"{code}.json", 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def lexicon_pack_checksum(language=None):
+    """
+    Short content hash of a language's pack file, or of every pack when language is None
+    Part of the analyzer version, so editing a pack invalidates the scores cached with it
+    """
+    codes = [LANGUAGE_PACKS[language]] if language else sorted(LANGUAGE_PACKS.values())
+    digest = hashlib.sha1()
+    for code in codes:
+        digest.update((LEXICON_DIR / f"{code}.json").read_bytes())
+    return digest.hexdigest()[:8]
+
+
 class AdvancedSentimentAnalyzer:
     """
     Advanced sentiment analysis with contextual understanding
     """
     
-    def __init__(self):
+    def __init__(self, use_textblob=True, language=None):
+        # TextBlob is an extra signal; without it sentences are scored from the lexicon alone
+        self.use_textblob = use_textblob and TextBlob is not None
+
         # Sentiment keywords with weights
         self.positive_keywords = {
             'excellent': 1.0, 'amazing': 1.0, 'outstanding': 1.0, 'wonderful': 0.9,
@@ -44,6 +121,51 @@ class AdvancedSentimentAnalyzer:
         
         # Negations
         self.negations = {'not', 'no', 'never', 'neither', 'nobody', 'nothing', "n't", 'hardly', 'barely'}
+        
+        self.language = DEFAULT_LANGUAGE
+        self.pack_words = frozenset()
+        pack = load_lexicon_pack(language) if language else None
+        if pack:
+            self.language = language
+            # Words only this pack knows: a comment without any is scored as English
+            self.pack_words = frozenset(
+                {*pack['positive'], *pack['negative'], *pack['intensifiers'], *pack['negations']}
+            ) - {*self.positive_keywords, *self.negative_keywords, *self.intensifiers,
+                 *self.negations, *SHARED_WITH_ENGLISH}
+            self.positive_keywords.update(pack['positive'])
+            self.negative_keywords.update(pack['negative'])
+            self.intensifiers.update(pack['intensifiers'])
+            self.negations.update(pack['negations'])
+            # TextBlob only understands English
+            self.use_textblob = self.use_textblob and pack.get('textblob', False)
+        
+        self.version = f"{ANALYZER_VERSION}-{'textblob' if self.use_textblob else 'lexicon'}"
+        if pack:
+            self.version += f"-{LANGUAGE_PACKS[language]}-{lexicon_pack_checksum(language)}"
+        
+        self._build_token_tables()
+    
+    def _build_token_tables(self):
+        """Integer ids for every lexicon word plus per-id lookup tables (id 0 = any other word)"""
+        self.vocabulary = {}
+        for word in (*self.positive_keywords, *self.negative_keywords,
+                     *self.intensifiers, *self.negations):
+            self.vocabulary.setdefault(word, len(self.vocabulary) + 1)
+        
+        size = len(self.vocabulary) + 1
+        self._token_weight = np.zeros(size)
+        self._token_intensity = np.ones(size)
+        self._token_negates = np.zeros(size, dtype=bool)
+        
+        # Positive keywords take precedence, as in analyze_sentence_sentiment
+        for word, weight in self.negative_keywords.items():
+            self._token_weight[self.vocabulary[word]] = weight
+        for word, weight in self.positive_keywords.items():
+            self._token_weight[self.vocabulary[word]] = weight
+        for word, factor in self.intensifiers.items():
+            self._token_intensity[self.vocabulary[word]] = factor
+        for word in self.negations:
+            self._token_negates[self.vocabulary[word]] = True
     
     def preprocess_text(self, text):
         """Clean and prepare text"""
@@ -55,6 +177,16 @@ class AdvancedSentimentAnalyzer:
         text = re.sub(r'[^\w\s.,!?-]', '', text)
         return text
     
+    def uses_pack(self, text):
+        """True if text contains a word that only this analyzer's language pack knows"""
+        if not self.pack_words:
+            return False
+        return not self.pack_words.isdisjoint(re.split(r'[\s.!?]+', self.preprocess_text(text)))
+    
+    def normalize_text(self, text):
+        """Preprocessed text with whitespace collapsed; scores the same as the raw comment"""
+        return ' '.join(self.preprocess_text(text).split())
+    
     def extract_sentences(self, text):
         """Split text into sentences"""
         sentences = re.split(r'[.!?]+', text)
@@ -91,11 +223,14 @@ class AdvancedSentimentAnalyzer:
             
             i += 1
         
+        if not self.use_textblob:
+            return sentiment_score
+        
         # Use TextBlob as additional signal
         blob_sentiment = TextBlob(sentence).sentiment.polarity
         
         # Combine custom scoring with TextBlob (weighted average)
-        final_score = (sentiment_score * 0.6 + blob_sentiment * 0.4)
+        final_score = (sentiment_score * CUSTOM_WEIGHT + blob_sentiment * TEXTBLOB_WEIGHT)
         
         return final_score
     
@@ -157,6 +292,296 @@ class AdvancedSentimentAnalyzer:
             return 4
         else:
             return 5
+    
+    # ============================================================
+    # FAST BATCH MODE (token-id arrays)
+    # ============================================================
+    
+    def tokenize_batch(self, texts, sentence_topics=None):
+        """
+        Tokenize comments once into flat integer token-id arrays
+        Uses the same preprocessing and sentence split as analyze_full_text
+        sentence_topics(words) -> topic ids, if given, tags each sentence's
+        aspects from the same words (see AspectSentimentAnalyzer)
+        """
+        lookup = self.vocabulary.get
+        token_ids = []
+        sentence_lengths = []
+        sentence_comment = []
+        sentences = []
+        aspect_sentence = []
+        aspect_topic = []
+        
+        for index, text in enumerate(texts):
+            text = self.preprocess_text(text)
+            if not text:
+                continue
+            for sentence in self.extract_sentences(text):
+                words = sentence.split()
+                if sentence_topics is not None:
+                    for topic in sentence_topics(words):
+                        aspect_sentence.append(len(sentences))
+                        aspect_topic.append(topic)
+                token_ids.extend([lookup(w, 0) for w in words])
+                sentence_lengths.append(len(words))
+                sentence_comment.append(index)
+                sentences.append(sentence)
+        
+        sentence_lengths = np.array(sentence_lengths, dtype=np.int64)
+        starts = np.cumsum(sentence_lengths) - sentence_lengths
+        
+        batch = {
+            'num_comments': len(texts),
+            'token_ids': np.array(token_ids, dtype=np.int32),
+            'token_sentence': np.repeat(np.arange(len(sentence_lengths)), sentence_lengths),
+            'token_position': np.arange(len(token_ids)) - np.repeat(starts, sentence_lengths),
+            'sentence_lengths': sentence_lengths,
+            'sentence_comment': np.array(sentence_comment, dtype=np.int64),
+            'sentences': sentences
+        }
+        if sentence_topics is not None:
+            batch['aspect_sentence'] = np.array(aspect_sentence, dtype=np.int64)
+            batch['aspect_topic'] = np.array(aspect_topic, dtype=np.int64)
+        return batch
+    
+    def score_sentences(self, batch, use_textblob=None):
+        """Score every sentence of a tokenized batch with array operations"""
+        use_textblob = self.use_textblob if use_textblob is None else (use_textblob and TextBlob is not None)
+        ids = batch['token_ids']
+        position = batch['token_position']
+        n_sentences = len(batch['sentence_lengths'])
+        
+        # Previous and second-previous token in the same sentence (0 = none)
+        prev1 = np.zeros_like(ids)
+        prev1[1:] = ids[:-1]
+        prev1[position < 1] = 0
+        prev2 = np.zeros_like(ids)
+        prev2[2:] = ids[:-2]
+        prev2[position < 2] = 0
+        
+        negation = np.where(self._token_negates[prev1] | self._token_negates[prev2], -1.0, 1.0)
+        token_scores = self._token_weight[ids] * self._token_intensity[prev1] * negation
+        sentence_scores = np.bincount(batch['token_sentence'], weights=token_scores, minlength=n_sentences)
+        
+        if use_textblob:
+            blob_scores = np.array([TextBlob(s).sentiment.polarity for s in batch['sentences']])
+            sentence_scores = sentence_scores * CUSTOM_WEIGHT + blob_scores * TEXTBLOB_WEIGHT
+        
+        return sentence_scores
+    
+    def score_token_batch(self, batch, use_textblob=None, sentence_scores=None):
+        """
+        Score a tokenized batch with array operations
+        Returns: (scores, labels, confidences, ratings, num_sentences) arrays, one entry per comment
+        """
+        if sentence_scores is None:
+            sentence_scores = self.score_sentences(batch, use_textblob)
+        n_comments = batch['num_comments']
+        
+        # Comment score = sentence scores weighted by sentence length
+        lengths = batch['sentence_lengths'].astype(float)
+        owner = batch['sentence_comment']
+        weighted = np.bincount(owner, weights=sentence_scores * lengths, minlength=n_comments)
+        total_words = np.bincount(owner, weights=lengths, minlength=n_comments)
+        num_sentences = np.bincount(owner, minlength=n_comments)
+        scores = np.divide(weighted, total_words, out=np.zeros(n_comments), where=total_words > 0)
+        
+        abs_scores = np.abs(scores)
+        labels = np.where(scores > 0.3, 'Positive', np.where(scores < -0.3, 'Negative', 'Neutral'))
+        confidences = np.where(abs_scores > 0.3, np.minimum(abs_scores * 100, 100), 100 - abs_scores * 50)
+        confidences[num_sentences == 0] = 0
+        ratings = np.searchsorted([-0.6, -0.2, 0.2, 0.6], scores, side='left') + 1
+        
+        return scores, labels, confidences, ratings, num_sentences
+    
+    def analyze_batch(self, texts, use_textblob=None):
+        """
+        Fast sentiment for many comments at once
+        Returns: DataFrame with the same columns as analyze_comments_advanced sentiments
+        """
+        texts = list(texts)
+        
+        # Feedback repeats a lot: tokenize and score each distinct comment once
+        codes, unique_texts = pd.factorize(pd.Series(texts, dtype=object))
+        unique_texts = list(unique_texts) + [None]  # code -1 (missing) maps to the empty comment
+        
+        batch = self.tokenize_batch(unique_texts)
+        scores, labels, confidences, ratings, num_sentences = self.score_token_batch(batch, use_textblob)
+        
+        return pd.DataFrame({
+            'comment': texts,
+            'score': scores[codes],
+            'label': labels[codes],
+            'confidence': confidences[codes],
+            'rating': ratings[codes],
+            'num_sentences': num_sentences[codes]
+        })
+
+
+# ============================================================
+# LANGUAGE ROUTING
+# ============================================================
+
+class LanguageRoutedAnalyzer:
+    """
+    Route comments to a per-language analyzer by the visitor's language
+    Analyzers (and their lexicon packs) are only built for languages actually seen;
+    comments written in English keep the English analyzer (and TextBlob) whatever
+    the visitor's language
+    """
+    
+    def __init__(self, use_textblob=True):
+        self.use_textblob = use_textblob and TextBlob is not None
+        self.version = (f"{ANALYZER_VERSION}-{'textblob' if self.use_textblob else 'lexicon'}-routed"
+                        f"-{lexicon_pack_checksum()}")
+        self._analyzers = {}
+    
+    def analyzer_for(self, language):
+        """Analyzer for a language; languages without a pack share the English one"""
+        language = language if language in LANGUAGE_PACKS else DEFAULT_LANGUAGE
+        if language not in self._analyzers:
+            self._analyzers[language] = AdvancedSentimentAnalyzer(
+                use_textblob=self.use_textblob,
+                language=None if language == DEFAULT_LANGUAGE else language
+            )
+        return self._analyzers[language]
+    
+    def route(self, texts, languages):
+        """
+        Language each comment is scored in: the visitor's pack if the comment uses
+        words only that pack knows, otherwise English
+        Returns: list aligned with texts
+        """
+        return [language if language in LANGUAGE_PACKS and self.analyzer_for(language).uses_pack(text)
+                else DEFAULT_LANGUAGE
+                for text, language in zip(texts, languages)]
+    
+    def analyze_batch(self, texts, languages):
+        """
+        analyze_batch per language group, reassembled in input order
+        Returns: DataFrame like AdvancedSentimentAnalyzer.analyze_batch plus language and analyzer_version
+        """
+        texts = list(texts)
+        frame = pd.DataFrame({'comment': texts, 'language': self.route(texts, languages)}, dtype=object)
+        
+        parts = []
+        for language, group in frame.groupby('language', sort=False):
+            analyzer = self.analyzer_for(language)
+            scored = analyzer.analyze_batch(group['comment'].tolist())
+            scored.index = group.index
+            scored['language'] = language
+            scored['analyzer_version'] = analyzer.version
+            parts.append(scored)
+        
+        if not parts:
+            return pd.DataFrame(columns=['comment', 'score', 'label', 'confidence', 'rating',
+                                         'num_sentences', 'language', 'analyzer_version'])
+        return pd.concat(parts).sort_index()
+
+
+# ============================================================
+# PERSISTENT SENTIMENT CACHE
+# ============================================================
+
+def ensure_sentiment_schema(db_path):
+    """Apply the idempotent sentiment schema once per process"""
+    if db_path in _schema_applied:
+        return
+    
+    with open(SENTIMENT_SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        schema_sql = f.read()
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(schema_sql)
+        conn.commit()
+    finally:
+        conn.close()
+    
+    _schema_applied.add(db_path)
+
+
+class SentimentCache:
+    """
+    comment_sentiment table keyed by a hash of the normalized comment text
+    Only never-seen texts are scored; everything else is a lookup
+    """
+    
+    def __init__(self, db_path="visitor_feedback.db", analyzer=None, max_workers=None):
+        self.db_path = db_path
+        self.analyzer = analyzer or AdvancedSentimentAnalyzer()
+        self.analyzer_version = self.analyzer.version
+        self.max_workers = max_workers  # score cache misses across a process pool
+        ensure_sentiment_schema(db_path)
+    
+    @staticmethod
+    def text_hash(normalized_text):
+        """Cache key for a normalized comment"""
+        return hashlib.sha1(normalized_text.encode('utf-8')).hexdigest()
+    
+    def analyze(self, comments):
+        """
+        Sentiment for each comment, scoring only texts missing from the cache
+        Returns: DataFrame with the same columns as AdvancedSentimentAnalyzer.analyze_batch
+        """
+        comments = list(comments)
+        hashes = []
+        texts_by_hash = {}
+        for comment in comments:
+            normalized = self.analyzer.normalize_text(comment)
+            key = self.text_hash(normalized)
+            hashes.append(key)
+            texts_by_hash.setdefault(key, normalized)
+        
+        results = {}
+        conn = sqlite3.connect(self.db_path)
+        try:
+            keys = list(texts_by_hash)
+            for start in range(0, len(keys), CACHE_LOOKUP_CHUNK):
+                chunk = keys[start:start + CACHE_LOOKUP_CHUNK]
+                rows = conn.execute(f"""
+                    SELECT text_hash, score, label, confidence, rating, num_sentences
+                    FROM comment_sentiment
+                    WHERE analyzer_version = ? AND text_hash IN ({','.join('?' * len(chunk))})
+                """, (self.analyzer_version, *chunk))
+                for row in rows:
+                    results[row[0]] = row[1:]
+            
+            missing = [key for key in keys if key not in results]
+            if missing:
+                missing_texts = [texts_by_hash[key] for key in missing]
+                if self.max_workers:
+                    # Workers rebuild this analyzer from its settings, so cached rows stay consistent
+                    language = None if self.analyzer.language == DEFAULT_LANGUAGE else self.analyzer.language
+                    scored = analyze_sentiment_parallel(
+                        pd.Series(missing_texts, dtype=object), use_textblob=self.analyzer.use_textblob,
+                        max_workers=self.max_workers, language=language).reset_index(drop=True)
+                else:
+                    scored = self.analyzer.analyze_batch(missing_texts)
+                new_rows = list(zip(
+                    missing,
+                    scored['score'].astype(float).tolist(),
+                    scored['label'].tolist(),
+                    scored['confidence'].astype(float).tolist(),
+                    scored['rating'].astype(int).tolist(),
+                    scored['num_sentences'].astype(int).tolist()
+                ))
+                conn.executemany("""
+                    INSERT OR IGNORE INTO comment_sentiment
+                        (text_hash, analyzer_version, score, label, confidence, rating, num_sentences)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [(key, self.analyzer_version, *values) for key, *values in new_rows])
+                conn.commit()
+                results.update((key, tuple(values)) for key, *values in new_rows)
+        finally:
+            conn.close()
+        
+        self.last_scored = len(missing)
+        
+        df = pd.DataFrame([results[key] for key in hashes],
+                          columns=['score', 'label', 'confidence', 'rating', 'num_sentences'])
+        df.insert(0, 'comment', comments)
+        return df
 
 
 class AdvancedTopicModeler:
@@ -212,6 +637,8 @@ class AdvancedTopicModeler:
             'too', 'just', 'only', 'also', 'even', 'more', 'most', 'much', 'some',
             'any', 'all', 'both', 'each', 'every', 'no', 'not', 'yes'
         }
+        
+        self._build_topic_index()
     
     def preprocess_text(self, text):
         """Clean text for topic extraction"""
@@ -250,6 +677,34 @@ class AdvancedTopicModeler:
         keywords = [w for w in words if w not in self.stop_words and len(w) > 3]
         return keywords
     
+    def _build_topic_index(self):
+        """
+        Inverted index from keyword to topics, plus a phrase table for
+        multi-word keywords (e.g. "audio guide") keyed by their first word
+        """
+        self._topic_names = list(self.topic_keywords)
+        self._keyword_topics = {}
+        self._phrase_topics = {}
+        
+        for index, keywords in enumerate(self.topic_keywords.values()):
+            for keyword in keywords:
+                words = tuple(keyword.lower().split())
+                if len(words) == 1:
+                    self._keyword_topics.setdefault(words[0], []).append(index)
+                elif words:
+                    self._phrase_topics.setdefault(words[0], []).append((words, index))
+        
+        # Topic vocabulary for the document-term path: one column per keyword
+        # (multi-word keywords included) and a term x topic incidence matrix
+        terms = sorted({' '.join(k.lower().split()) for ks in self.topic_keywords.values() for k in ks} - {''})
+        self._term_index = pd.Index(terms)
+        self._term_topics = np.zeros((len(terms), len(self._topic_names)))
+        for index, keywords in enumerate(self.topic_keywords.values()):
+            for keyword in keywords:
+                term = ' '.join(keyword.lower().split())
+                if term:
+                    self._term_topics[self._term_index.get_loc(term), index] = 1.0
+    
     def identify_topics(self, text):
         """
         Identify topics from text with scoring
@@ -260,38 +715,71 @@ class AdvancedTopicModeler:
         if not text:
             return []
         
-        # Extract keywords and phrases
-        keywords = set(self.extract_keywords(text))
-        phrases = set(self.extract_phrases(text))
-        
-        # Score each topic
-        topic_scores = []
+        words = text.split()
+        count = len(words)
+        content = [w not in self.stop_words for w in words]
         
-        for topic, topic_keywords in self.topic_keywords.items():
-            # Count matches
-            keyword_matches = keywords.intersection(topic_keywords)
-            phrase_words = set()
-            for phrase in phrases:
-                phrase_words.update(phrase.split())
-            phrase_matches = phrase_words.intersection(topic_keywords)
+        # Single pass: a word counts as a keyword match if it is a content word
+        # longer than 3 characters, and as a phrase match if it sits next to
+        # another content word (i.e. it is part of a bigram/trigram phrase)
+        keyword_matches = {}
+        phrase_matches = {}
+        for i, word in enumerate(words):
+            topics = self._keyword_topics.get(word)
+            if topics and content[i]:
+                in_phrase = (i > 0 and content[i - 1]) or (i + 1 < count and content[i + 1])
+                for topic in topics:
+                    if len(word) > 3:
+                        keyword_matches.setdefault(topic, set()).add(word)
+                    if in_phrase:
+                        phrase_matches.setdefault(topic, set()).add(word)
             
-            # Calculate score (phrases weighted higher)
-            score = len(keyword_matches) + (len(phrase_matches) * 1.5)
-            
-            if score > 0:
-                matched = keyword_matches.union(phrase_matches)
-                topic_scores.append((topic, score, list(matched)))
+            for phrase, topic in self._phrase_topics.get(word, ()):
+                if tuple(words[i:i + len(phrase)]) == phrase:
+                    phrase_matches.setdefault(topic, set()).add(' '.join(phrase))
+        
+        # Score each topic (phrases weighted higher)
+        topic_scores = []
+        empty = set()
+        for topic in sorted(keyword_matches.keys() | phrase_matches.keys()):
+            keywords = keyword_matches.get(topic, empty)
+            phrases = phrase_matches.get(topic, empty)
+            score = len(keywords) + (len(phrases) * 1.5)
+            topic_scores.append((self._topic_names[topic], score, list(keywords | phrases)))
         
         # Sort by score
         topic_scores.sort(key=lambda x: x[1], reverse=True)
         
         return topic_scores
     
+    def sentence_topics(self, words):
+        """
+        Topic ids mentioned in one already-split sentence, using the same
+        keyword and phrase rules as identify_topics (aspect tagging)
+        """
+        words = re.sub(r'[^a-z0-9\s]', ' ', ' '.join(words).lower()).split()
+        count = len(words)
+        content = [w not in self.stop_words for w in words]
+        
+        topics = set()
+        for i, word in enumerate(words):
+            matched = self._keyword_topics.get(word)
+            if matched and content[i] and (len(word) > 3 or (i > 0 and content[i - 1]) or
+                                           (i + 1 < count and content[i + 1])):
+                topics.update(matched)
+            for phrase, topic in self._phrase_topics.get(word, ()):
+                if tuple(words[i:i + len(phrase)]) == phrase:
+                    topics.add(topic)
+        return sorted(topics)
+    
     def analyze_multiple_comments(self, comments_series):
         """
         Analyze all comments and return aggregated topics
         Returns: DataFrame with topic statistics
         """
+        if len(comments_series) >= VECTORIZED_TOPIC_MIN_COMMENTS:
+            return self.analyze_multiple_comments_vectorized(comments_series)
+        
         all_topics = []
         
         for comment in comments_series.dropna():
@@ -311,14 +799,353 @@ class AdvancedTopicModeler:
         topic_summary = topic_summary.sort_values('Total_Score', ascending=False)
         
         return topic_summary
+    
+    def analyze_multiple_comments_vectorized(self, comments_series):
+        """
+        Same topic statistics as analyze_multiple_comments, computed from a
+        sparse document-term matrix over the topic vocabulary
+        Returns: DataFrame with topic statistics
+        """
+        comments = comments_series.dropna()
+        codes, documents = pd.factorize(comments)
+        if not len(documents):
+            return pd.DataFrame()
+        # Each distinct comment is one document, weighted by how often it occurs
+        doc_weights = np.bincount(codes, minlength=len(documents))
+        
+        # Tokenize all documents in one pass: same tokens as preprocess_text + split,
+        # with a record separator marking document boundaries
+        documents = np.asarray(documents, dtype=object)
+        text = DOCUMENT_SEPARATOR.join(map(str, documents))
+        if text.count(DOCUMENT_SEPARATOR) != len(documents) - 1:
+            # The separator is whitespace to preprocess_text, so a stray one is just a space
+            text = DOCUMENT_SEPARATOR.join(str(d).replace(DOCUMENT_SEPARATOR, ' ') for d in documents)
+        token_codes, vocabulary = pd.factorize(
+            np.array(re.findall(r'[a-z0-9]+|' + DOCUMENT_SEPARATOR, text.lower()), dtype=object))
+        
+        is_separator = vocabulary[token_codes] == DOCUMENT_SEPARATOR
+        doc = np.cumsum(is_separator)[~is_separator]
+        token_codes = token_codes[~is_separator]
+        if not len(token_codes):
+            return pd.DataFrame()
+        
+        # Per-word properties, computed once per distinct word
+        vocabulary = pd.Index(vocabulary)
+        word_content = ~vocabulary.isin(self.stop_words)
+        word_long = vocabulary.str.len().to_numpy() > 3
+        word_term = self._term_index.get_indexer(vocabulary)
+        
+        content = word_content[token_codes]
+        same_as_prev = np.r_[False, doc[1:] == doc[:-1]]
+        same_as_next = np.r_[same_as_prev[1:], False]
+        
+        # Same token rules as identify_topics: keyword = content word longer
+        # than 3 characters, phrase word = content word next to another one
+        is_keyword = content & word_long[token_codes]
+        in_phrase = content & ((np.r_[False, content[:-1]] & same_as_prev) |
+                               (np.r_[content[1:], False] & same_as_next))
+        term = word_term[token_codes]
+        
+        entry_doc = [doc[term >= 0]]
+        entry_term = [term[term >= 0]]
+        entry_keyword = [is_keyword[term >= 0]]
+        entry_phrase = [in_phrase[term >= 0]]
+        
+        # Multi-word keywords: consecutive tokens in the same document
+        for phrase_term in (t for t in self._term_index if ' ' in t):
+            phrase_codes = vocabulary.get_indexer(phrase_term.split())
+            if (phrase_codes < 0).any():
+                continue
+            match = token_codes == phrase_codes[0]
+            for offset, code in enumerate(phrase_codes[1:], 1):
+                shifted = np.zeros(len(token_codes), dtype=bool)
+                shifted[:-offset] = (token_codes[offset:] == code) & (doc[offset:] == doc[:-offset])
+                match &= shifted
+            entry_doc.append(doc[match])
+            entry_term.append(np.full(match.sum(), self._term_index.get_loc(phrase_term)))
+            entry_keyword.append(np.zeros(match.sum(), dtype=bool))
+            entry_phrase.append(np.ones(match.sum(), dtype=bool))
+        
+        # Collapse repeated words: one (document, term) entry, matched as keyword and/or phrase
+        n_terms = len(self._term_index)
+        keys, entry = np.unique(np.concatenate(entry_doc).astype(np.int64) * n_terms
+                                + np.concatenate(entry_term), return_inverse=True)
+        keyword_hit = np.bincount(entry, weights=np.concatenate(entry_keyword)) > 0
+        phrase_hit = np.bincount(entry, weights=np.concatenate(entry_phrase)) > 0
+        values = keyword_hit * 1.0 + phrase_hit * 1.5
+        
+        # Sparse (document x term) times dense (term x topic) product
+        matrix_doc, matrix_term = np.divmod(keys, n_terms)
+        contributions = values[:, None] * self._term_topics[matrix_term]
+        scores = np.column_stack([
+            np.bincount(matrix_doc, weights=contributions[:, t], minlength=len(documents))
+            for t in range(len(self._topic_names))
+        ])
+        
+        total = doc_weights @ scores
+        mentions = doc_weights @ (scores > 0)
+        mentioned = mentions > 0
+        if not mentioned.any():
+            return pd.DataFrame()
+        
+        topic_summary = pd.DataFrame({
+            'Topic': np.array(self._topic_names, dtype=object)[mentioned],
+            'Total_Score': total[mentioned],
+            'Mentions': mentions[mentioned].astype(np.int64),
+            'Avg_Score': total[mentioned] / mentions[mentioned]
+        })
+        topic_summary = topic_summary.sort_values('Topic').reset_index(drop=True)
+        topic_summary = topic_summary.sort_values('Total_Score', ascending=False)
+        
+        return topic_summary
+
+
+# ============================================================
+# ASPECT-BASED SENTIMENT
+# ============================================================
+
+class AspectSentimentAnalyzer:
+    """
+    Sentiment per topic (aspect) from one tokenization per comment: each
+    sentence is scored once and its score is credited to the topics it mentions
+    """
+    
+    def __init__(self, analyzer=None, topic_modeler=None):
+        self.analyzer = analyzer or AdvancedSentimentAnalyzer()
+        self.topic_modeler = topic_modeler or AdvancedTopicModeler()
+    
+    def analyze_batch(self, texts, use_textblob=None):
+        """
+        Comment sentiment and aspect sentiment for many comments at once
+        Returns: (sentiments, aspects) - sentiments has the analyze_batch columns;
+                 aspects has one row per (comment_index, topic) with score, label, sentences
+        """
+        texts = list(texts)
+        codes, unique_texts = pd.factorize(pd.Series(texts, dtype=object))
+        unique_texts = list(unique_texts) + [None]
+        
+        batch = self.analyzer.tokenize_batch(unique_texts, sentence_topics=self.topic_modeler.sentence_topics)
+        sentence_scores = self.analyzer.score_sentences(batch, use_textblob)
+        scores, labels, confidences, ratings, num_sentences = self.analyzer.score_token_batch(
+            batch, sentence_scores=sentence_scores)
+        
+        sentiments = pd.DataFrame({
+            'comment': texts,
+            'score': scores[codes],
+            'label': labels[codes],
+            'confidence': confidences[codes],
+            'rating': ratings[codes],
+            'num_sentences': num_sentences[codes]
+        })
+        
+        # Aspect score = length-weighted mean of the sentences mentioning the topic
+        n_topics = len(self.topic_modeler._topic_names)
+        sentence = batch['aspect_sentence']
+        keys, entry = np.unique(batch['sentence_comment'][sentence] * n_topics + batch['aspect_topic'],
+                                return_inverse=True)
+        lengths = batch['sentence_lengths'][sentence].astype(float)
+        aspect_scores = (np.bincount(entry, weights=sentence_scores[sentence] * lengths, minlength=len(keys))
+                         / np.bincount(entry, weights=lengths, minlength=len(keys)))
+        aspect_sentences = np.bincount(entry, minlength=len(keys))
+        unique_comment, topic = np.divmod(keys, n_topics)
+        
+        aspects = pd.DataFrame({
+            'unique_comment': unique_comment,
+            'topic': np.array(self.topic_modeler._topic_names, dtype=object)[topic],
+            'score': aspect_scores,
+            'label': np.where(aspect_scores > 0.3, 'Positive', np.where(aspect_scores < -0.3, 'Negative', 'Neutral')),
+            'sentences': aspect_sentences
+        })
+        # Expand distinct comments back to input positions
+        positions = pd.DataFrame({'comment_index': np.arange(len(texts)), 'unique_comment': codes})
+        aspects = positions.merge(aspects, on='unique_comment').drop(columns='unique_comment')
+        aspects = aspects.sort_values(['comment_index', 'topic'], kind='stable').reset_index(drop=True)
+        
+        return sentiments, aspects
+    
+    def summarize(self, aspects):
+        """
+        Aspect sentiment per topic, most negative first
+        Returns: DataFrame (Topic, Mentions, Avg_Sentiment, Positive, Negative, Neutral)
+        """
+        if aspects.empty:
+            return pd.DataFrame()
+        
+        summary = aspects.groupby('topic').agg(
+            Mentions=('score', 'size'),
+            Avg_Sentiment=('score', 'mean'),
+            Positive=('label', lambda l: int((l == 'Positive').sum())),
+            Negative=('label', lambda l: int((l == 'Negative').sum())),
+            Neutral=('label', lambda l: int((l == 'Neutral').sum()))
+        ).reset_index().rename(columns={'topic': 'Topic'})
+        
+        return summary.sort_values('Avg_Sentiment').reset_index(drop=True)
+
+
+# ============================================================
+# PARALLEL BATCH SCORING
+# ============================================================
+
+def _init_sentiment_worker(use_textblob, language=None):
+    """Build the analyzer once per worker process"""
+    global _worker_analyzer
+    _worker_analyzer = AdvancedSentimentAnalyzer(use_textblob=use_textblob, language=language)
+
+
+def _score_sentiment_chunk(texts):
+    """Score one chunk in a worker process"""
+    return _worker_analyzer.analyze_batch(texts)
+
+
+def analyze_sentiment_parallel(comments_series, use_textblob=True, max_workers=None,
+                               chunk_size=PARALLEL_CHUNK_SIZE, min_parallel=PARALLEL_MIN_COMMENTS, language=None):
+    """
+    Score a comments Series across a process pool
+    Distinct texts are split into chunks, scored by per-worker analyzers and
+    reassembled in order; small inputs are scored serially in this process
+    language selects the lexicon pack, as for AdvancedSentimentAnalyzer
+    Returns: DataFrame like analyze_batch, indexed like the non-null comments
+    """
+    comments = comments_series.dropna()
+    codes, unique_texts = pd.factorize(comments)
+    unique_texts = list(unique_texts)
+    max_workers = max_workers or os.cpu_count() or 1
+    
+    if max_workers <= 1 or len(unique_texts) < min_parallel:
+        scored = AdvancedSentimentAnalyzer(use_textblob=use_textblob, language=language).analyze_batch(unique_texts)
+    else:
+        chunks = [unique_texts[i:i + chunk_size] for i in range(0, len(unique_texts), chunk_size)]
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(chunks)),
+                                 initializer=_init_sentiment_worker,
+                                 initargs=(use_textblob, language)) as executor:
+            # map() yields in submission order, so chunks come back in sequence
+            scored = pd.concat(executor.map(_score_sentiment_chunk, chunks), ignore_index=True)
+    
+    result = scored.iloc[codes].reset_index(drop=True)
+    result['comment'] = comments.to_numpy()
+    result.index = comments.index
+    return result
+
+
+# ============================================================
+# STREAMING PIPELINE (constant memory over database cursors)
+# ============================================================
+
+def stream_sentiment(db_path, table_name, column='additional_comments', include_spam=False,
+                     batch_size=STREAM_BATCH_SIZE, analyzer=None, write_back=False):
+    """
+    Score a survey comment column straight from SQLite, one fetchmany() batch at a time
+    Yields one scored DataFrame (response_id + analyze_batch columns) per batch;
+    write_back=True also upserts each batch into streamed_comment_sentiment
+    (survey_comment_sentiment belongs to the comment enrichment worker)
+    """
+    if table_name not in SURVEY_TYPES:
+        raise ValueError(f"Unknown survey table: {table_name}")
+    
+    analyzer = analyzer or AdvancedSentimentAnalyzer()
+    if write_back:
+        ensure_sentiment_schema(db_path)
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table_name})")}
+        if column not in columns or 'response_id' not in columns:
+            raise ValueError(f"{table_name} has no comment column {column}")
+        
+        query = f"SELECT response_id, {column} FROM {table_name} WHERE {column} IS NOT NULL"
+        if not include_spam:
+            query += " AND is_spam = 0"
+        
+        reader = conn.execute(query + " ORDER BY response_id")
+        writer = conn.cursor()
+        
+        while True:
+            rows = reader.fetchmany(batch_size)
+            if not rows:
+                break
+            
+            scored = analyzer.analyze_batch([row[1] for row in rows])
+            scored.insert(0, 'response_id', [row[0] for row in rows])
+            
+            if write_back:
+                writer.executemany("""
+                    INSERT OR REPLACE INTO streamed_comment_sentiment
+                        (survey_type, response_id, comment_column, analyzer_version,
+                         score, label, confidence, rating)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, zip([table_name] * len(rows), scored['response_id'].tolist(),
+                         [column] * len(rows), [analyzer.version] * len(rows),
+                         scored['score'].astype(float).tolist(), scored['label'].tolist(),
+                         scored['confidence'].astype(float).tolist(),
+                         scored['rating'].astype(int).tolist()))
+                conn.commit()
+            
+            yield scored
+    finally:
+        conn.close()
+
+
+class RunningSentimentSummary:
+    """Summary statistics accumulated batch by batch"""
+    
+    def __init__(self):
+        self.total_comments = 0
+        self.label_counts = Counter()
+        self.score_sum = 0.0
+        self.rating_sum = 0.0
+        self.confidence_sum = 0.0
+    
+    def update(self, scored):
+        """Fold one scored batch into the running totals"""
+        self.total_comments += len(scored)
+        self.label_counts.update(scored['label'].tolist())
+        self.score_sum += float(scored['score'].sum())
+        self.rating_sum += float(scored['rating'].sum())
+        self.confidence_sum += float(scored['confidence'].sum())
+    
+    def as_dict(self):
+        """Same keys as the analyze_comments_advanced summary"""
+        if not self.total_comments:
+            return {}
+        
+        return {
+            'total_comments': self.total_comments,
+            'positive': self.label_counts['Positive'],
+            'negative': self.label_counts['Negative'],
+            'neutral': self.label_counts['Neutral'],
+            'avg_score': self.score_sum / self.total_comments,
+            'avg_rating': self.rating_sum / self.total_comments,
+            'avg_confidence': self.confidence_sum / self.total_comments
+        }
 
 
-def analyze_comments_advanced(comments_series):
+def analyze_table_streaming(db_path, table_name, column='additional_comments', include_spam=False,
+                            batch_size=STREAM_BATCH_SIZE, fast=False, write_back=False):
+    """
+    Sentiment summary for a whole comment column without materializing it
+    Returns: summary dict (see analyze_comments_advanced)
+    """
+    analyzer = AdvancedSentimentAnalyzer(use_textblob=not fast)
+    summary = RunningSentimentSummary()
+    
+    for scored in stream_sentiment(db_path, table_name, column, include_spam,
+                                   batch_size, analyzer, write_back):
+        summary.update(scored)
+    
+    return summary.as_dict()
+
+
+def analyze_comments_advanced(comments_series, fast=False, db_path=None, max_workers=None, languages=None):
     """
     Main function to analyze comments with advanced techniques
+    fast=True scores the whole batch from the lexicon alone (no TextBlob)
+    languages (aligned with comments_series) routes each comment to its language's lexicon
+    db_path reads and fills the comment_sentiment cache in that database
+    max_workers scores large inputs (or cache misses) across a process pool
+    The options combine: each language group goes through the cache and/or the pool
     Returns: dict with sentiment and topic analysis
     """
-    sentiment_analyzer = AdvancedSentimentAnalyzer()
+    sentiment_analyzer = AdvancedSentimentAnalyzer(use_textblob=not fast)
     topic_modeler = AdvancedTopicModeler()
     
     results = {
@@ -328,18 +1155,52 @@ def analyze_comments_advanced(comments_series):
     }
     
     # Sentiment analysis
-    for comment in comments_series.dropna():
-        score, label, confidence, sentence_scores = sentiment_analyzer.analyze_full_text(comment)
-        rating = sentiment_analyzer.get_sentiment_rating(score)
-        
-        results['sentiments'].append({
-            'comment': comment,
-            'score': score,
-            'label': label,
-            'confidence': confidence,
-            'rating': rating,
-            'num_sentences': len(sentence_scores)
-        })
+    if languages is not None or db_path or max_workers:
+        present = comments_series.notna().to_numpy()
+        frame = pd.DataFrame({'comment': comments_series[present].tolist()}, dtype=object)
+        if languages is not None:
+            router = LanguageRoutedAnalyzer(use_textblob=not fast)
+            frame['language'] = router.route(frame['comment'], np.asarray(list(languages), dtype=object)[present])
+            groups = [(router.analyzer_for(language), language, group)
+                      for language, group in frame.groupby('language', sort=False)]
+        else:
+            groups = [(sentiment_analyzer, None, frame)]
+        
+        # Each language group goes through the cache and/or the process pool
+        parts = []
+        for analyzer, language, group in groups:
+            if db_path:
+                cache = SentimentCache(db_path, analyzer=analyzer, max_workers=max_workers)
+                scored = cache.analyze(group['comment'])
+            elif max_workers:
+                scored = analyze_sentiment_parallel(
+                    group['comment'], use_textblob=analyzer.use_textblob, max_workers=max_workers,
+                    language=None if analyzer.language == DEFAULT_LANGUAGE else analyzer.language)
+            else:
+                scored = analyzer.analyze_batch(group['comment'].tolist())
+            scored.index = group.index
+            if language is not None:
+                scored['language'] = language
+                scored['analyzer_version'] = analyzer.version
+            parts.append(scored)
+        
+        if parts:
+            results['sentiments'] = pd.concat(parts).sort_index().to_dict('records')
+    elif fast:
+        results['sentiments'] = sentiment_analyzer.analyze_batch(comments_series.dropna()).to_dict('records')
+    else:
+        for comment in comments_series.dropna():
+            score, label, confidence, sentence_scores = sentiment_analyzer.analyze_full_text(comment)
+            rating = sentiment_analyzer.get_sentiment_rating(score)
+            
+            results['sentiments'].append({
+                'comment': comment,
+                'score': score,
+                'label': label,
+                'confidence': confidence,
+                'rating': rating,
+                'num_sentences': len(sentence_scores)
+            })
     
     # Topic modeling
     results['topics'] = topic_modeler.analyze_multiple_comments(comments_series)
@@ -454,3 +1315,70 @@ def generate_recommendations(sentiment_summary, topics_df):
                 })
     
     return recommendations
+
+
+RECOMMENDATION_PRIORITY = {'HIGH': 0, 'MEDIUM': 1, 'OPPORTUNITY': 2}
+
+
+def summarize_segments(sentiments, topics, segment_column):
+    """
+    Sentiment summary and topic statistics for every segment, one groupby each
+    sentiments: one row per comment (comment_id, segment_column, score, label, confidence, rating)
+    topics: one row per matched (comment_id, topic) with its score
+    Returns: dict segment -> (summary, topics_df), same shapes as analyze_comments_advanced
+    """
+    flags = sentiments.assign(
+        positive=sentiments['label'].eq('Positive'),
+        negative=sentiments['label'].eq('Negative'),
+        neutral=sentiments['label'].eq('Neutral')
+    )
+    stats = flags.groupby(segment_column).agg(
+        total_comments=('label', 'size'),
+        positive=('positive', 'sum'),
+        negative=('negative', 'sum'),
+        neutral=('neutral', 'sum'),
+        avg_score=('score', 'mean'),
+        avg_rating=('rating', 'mean'),
+        avg_confidence=('confidence', 'mean')
+    )
+    
+    topic_rows = topics.merge(sentiments[['comment_id', segment_column]], on='comment_id')
+    topic_stats = topic_rows.groupby([segment_column, 'topic'])['score'].agg(['sum', 'count', 'mean']).reset_index()
+    topic_stats.columns = [segment_column, 'Topic', 'Total_Score', 'Mentions', 'Avg_Score']
+    topic_stats = topic_stats.sort_values([segment_column, 'Total_Score', 'Topic'], ascending=[True, False, True])
+    topic_groups = {segment: group.drop(columns=segment_column).reset_index(drop=True)
+                    for segment, group in topic_stats.groupby(segment_column)}
+    
+    segments = {}
+    for segment, row in stats.iterrows():
+        summary = {key: (int(value) if key in ('total_comments', 'positive', 'negative', 'neutral') else value)
+                   for key, value in row.items()}
+        segments[segment] = (summary, topic_groups.get(segment, pd.DataFrame()))
+    return segments
+
+
+def generate_segment_recommendations(sentiments, topics, segment_column, min_comments=5):
+    """
+    generate_recommendations for every segment from per-comment results
+    Returns: DataFrame (segment, rank, priority, category, issue, action, icon, total_comments, negative_pct),
+             most urgent first; rank orders recommendations within a segment
+    """
+    rows = []
+    for segment, (summary, topics_df) in summarize_segments(sentiments, topics, segment_column).items():
+        total = summary['total_comments']
+        if total < min_comments:
+            continue
+        negative_pct = summary['negative'] / total * 100
+        for rec in generate_recommendations(summary, topics_df):
+            rows.append({'segment': segment, **rec, 'total_comments': total, 'negative_pct': round(negative_pct, 1)})
+    
+    columns = ['segment', 'rank', 'priority', 'category', 'issue', 'action', 'icon', 'total_comments', 'negative_pct']
+    if not rows:
+        return pd.DataFrame(columns=columns)
+    
+    result = pd.DataFrame(rows)
+    result['priority_order'] = result['priority'].map(RECOMMENDATION_PRIORITY).fillna(len(RECOMMENDATION_PRIORITY))
+    result = result.sort_values(['priority_order', 'negative_pct', 'total_comments', 'segment'],
+                                ascending=[True, False, False, True], kind='stable')
+    result['rank'] = result.groupby('segment').cumcount() + 1
+    return result[columns].reset_index(drop=True)
@@ -0,0 +1,133 @@
+"""
+Test sliding-window award velocity checks and the held-award review flow
+"""
+
+import sqlite3
+
+import pandas as pd
+
+from award_velocity import SlidingWindowCounter, VelocityLimiter, scan_award_velocity
+from loyalty_engine import POINTS_PER_SURVEY, LoyaltyPointsEngine
+
+
+def add_responses(db_path, responses=6):
+    """Survey responses for user 1 (the last one spam)"""
+    conn = sqlite3.connect(db_path)
+    for response_id in range(1, responses + 1):
+        conn.execute("""
+            INSERT INTO survey_overall_experience (response_id, user_id, overall_rating, time_spent_seconds, is_spam)
+            VALUES (?, 1, 5, 120, ?)
+        """, (response_id, int(response_id == responses)))
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def test_sliding_window_counts_only_recent_events():
+    counter = SlidingWindowCounter(window_seconds=60, limit=2)
+    counter.record('a', 0)
+    counter.record('a', 30)
+    assert counter.is_full('a', 59)
+    assert not counter.is_full('a', 61)
+    assert not counter.is_full('b', 30)
+
+
+def test_awards_over_threshold_are_held_then_rejected_and_reviewed(make_loyalty_db):
+    db_path = add_responses(make_loyalty_db(users=1))
+    limiter = VelocityLimiter({'user': [
+        {'window_seconds': 600, 'max_awards': 2, 'action': 'hold'},
+        {'window_seconds': 600, 'max_awards': 4, 'action': 'reject'},
+    ]})
+    engine = LoyaltyPointsEngine(db_path, velocity=limiter)
+
+    results = [engine.award_survey_points(1, 'survey_overall_experience', i) for i in range(1, 6)]
+    assert [r["success"] for r in results[:2]] == [True, True]
+    assert results[2]["held"] and results[3]["held"]
+    assert not results[4]["success"] and "rejected" in results[4]["error"]
+
+    spam = engine.award_survey_points(1, 'survey_overall_experience', 6, check_velocity=True)
+    assert not spam["success"] and "spam" in spam["error"]
+
+    approved = engine.review_held_award(results[2]["hold_id"], approve=True)
+    assert approved["success"]
+    assert approved["new_balance"] == 3 * POINTS_PER_SURVEY
+
+    denied = engine.review_held_award(results[3]["hold_id"], approve=False)
+    assert denied["success"]
+    assert not engine.review_held_award(results[3]["hold_id"], approve=True)["success"]
+
+    conn = sqlite3.connect(db_path)
+    statuses = dict(conn.execute("SELECT hold_id, status FROM held_awards").fetchall())
+    balance = conn.execute("SELECT current_points_balance FROM user_points WHERE user_id = 1").fetchone()[0]
+    conn.close()
+    assert statuses == {results[2]["hold_id"]: 'RELEASED', results[3]["hold_id"]: 'REJECTED'}
+    assert balance == 3 * POINTS_PER_SURVEY
+
+
+class FailingCampaigns:
+    """Campaign lookup that breaks the award after the velocity check"""
+
+    def evaluate(self, survey_type, points_earned):
+        raise RuntimeError("campaign lookup failed")
+
+
+def test_failed_awards_keep_their_hold_and_velocity_budget(make_loyalty_db):
+    db_path = add_responses(make_loyalty_db(users=1))
+    limiter = VelocityLimiter({'user': [{'window_seconds': 600, 'max_awards': 2, 'action': 'hold'}]})
+    engine = LoyaltyPointsEngine(db_path, velocity=limiter)
+
+    engine.campaigns = FailingCampaigns()
+    failed = [engine.award_survey_points(1, 'survey_overall_experience', i) for i in (1, 2)]
+    assert not any(r["success"] or r.get("held") for r in failed)
+
+    # The failed awards did not use up the window
+    engine.campaigns = None
+    assert all(engine.award_survey_points(1, 'survey_overall_experience', i)["success"] for i in (1, 2))
+    held = engine.award_survey_points(1, 'survey_overall_experience', 3)
+    assert held["held"]
+
+    engine.campaigns = FailingCampaigns()
+    assert not engine.review_held_award(held["hold_id"], approve=True)["success"]
+    conn = sqlite3.connect(db_path)
+    status = conn.execute("SELECT status FROM held_awards WHERE hold_id = ?", (held["hold_id"],)).fetchone()[0]
+    conn.close()
+    assert status == 'HELD'
+
+    engine.campaigns = None
+    released = engine.review_held_award(held["hold_id"], approve=True)
+    assert released["success"] and released["new_balance"] == 3 * POINTS_PER_SURVEY
+
+def test_scan_matches_live_limits_for_bursts_and_domains(make_loyalty_db):
+    db_path = make_loyalty_db(users=3)
+    limits = {
+        'user': [{'window_seconds': 600, 'max_awards': 5, 'action': 'hold'}],
+        'domain': [{'window_seconds': 3600, 'max_awards': 8, 'action': 'hold'}],
+    }
+    # A same-second burst, an award exactly one window later, and a free-mail user
+    awards = [(1, '2026-01-01 10:00:00')] * 7 + [(2, '2026-01-01 10:00:00'), (2, '2026-01-01 10:10:00')]
+    awards += [(3, '2026-01-01 10:20:00')] * 3
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE users SET email = 'visitor3@gmail.com' WHERE user_id = 3")
+    conn.executemany("""
+        INSERT INTO points_transactions (user_id, transaction_type, points_change, balance_after,
+                                         reference_id, reference_type, created_at)
+        VALUES (?, 'SURVEY', 10, 0, ?, 'survey_overall_experience', ?)
+    """, [(user_id, i, created_at) for i, (user_id, created_at) in enumerate(awards, 1)])
+    conn.commit()
+
+    # Replay the same awards through the live limiter, in the scan's order
+    limiter = VelocityLimiter(limits)
+    cursor = conn.cursor()
+    live = {}
+    for transaction_id, (user_id, created_at) in enumerate(awards, 1):
+        action, _ = limiter.check_award(cursor, user_id, 'survey_overall_experience', transaction_id,
+                                        now=pd.Timestamp(created_at).timestamp())
+        if action != 'allow':
+            live[transaction_id] = action
+    conn.close()
+
+    flagged = scan_award_velocity(db_path, limits)
+    assert dict(zip(flagged['transaction_id'], flagged['action'])) == live
+    assert live == {6: 'hold', 7: 'hold', 9: 'hold'}
+    assert flagged.set_index('transaction_id').loc[9, 'reason'] == 'domain_3600s>8'
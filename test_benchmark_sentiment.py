@@ -0,0 +1,30 @@
+"""
+Smoke test for the sentiment benchmarks and their results file
+"""
+
+import pandas as pd
+import pytest
+
+from benchmark_sentiment import RESULT_COLUMNS, run_benchmarks
+
+
+def test_results_file_keeps_one_column_layout(tmp_path):
+    results_path = tmp_path / 'results' / 'benchmarks.csv'
+
+    first = run_benchmarks(sizes=(30,), modes=['batch_lexicon'], track_memory=False,
+                           results_path=results_path)
+    assert first.columns.tolist() == RESULT_COLUMNS
+    assert 0 <= first.loc[0, 'accuracy'] <= 1
+
+    # A timing-only run appends under the same header
+    run_benchmarks(sizes=(30,), modes=['topics_vectorized'], track_memory=False, results_path=results_path)
+    history = pd.read_csv(results_path)
+    assert history.columns.tolist() == RESULT_COLUMNS
+    assert history['mode'].tolist() == ['batch_lexicon', 'topics_vectorized']
+    assert history['accuracy'].isna().tolist() == [False, True]
+
+    # An older layout is never appended to
+    legacy_path = tmp_path / 'legacy.csv'
+    legacy_path.write_text('run_at,mode,seconds\n')
+    with pytest.raises(ValueError):
+        run_benchmarks(sizes=(30,), modes=['batch_lexicon'], track_memory=False, results_path=legacy_path)
@@ -0,0 +1,71 @@
+"""
+Test compiled point campaigns against a per-award rule loop
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from campaign_rules import CompiledCampaigns, save_campaign
+from loyalty_engine import POINTS_PER_SURVEY, SURVEY_TYPES, TIER_NAMES, TIER_THRESHOLDS
+
+CAMPAIGNS = [
+    {'name': 'Weekday Double Points', 'starts_at': '2026-01-01', 'ends_at': '2026-03-01',
+     'weekdays': [0, 1, 2, 3, 4], 'multiplier': 2.0},
+    {'name': "Children's Museum Bonus", 'starts_at': '2026-02-01', 'ends_at': '2026-02-15',
+     'survey_types': 'survey_childrens_museum,survey_tour_educational', 'bonus_points': 10},
+    {'name': 'Legend Boost', 'tiers': ['Legend', 'Guardian'], 'multiplier': 1.5},
+]
+
+
+def evaluate_by_loop(campaigns, survey_type, total_points_earned, when):
+    """Check every campaign's filters for one award, as the engine did before compiling"""
+    tier = TIER_NAMES[sum(total_points_earned >= t for t in TIER_THRESHOLDS)]
+    multiplier, bonus, names = 1.0, 0, []
+    for c in campaigns:
+        surveys = c.get('survey_types')
+        if isinstance(surveys, str):
+            surveys = surveys.split(',')
+        if c.get('starts_at') and when < datetime.fromisoformat(c['starts_at']):
+            continue
+        if c.get('ends_at') and when >= datetime.fromisoformat(c['ends_at']):
+            continue
+        if c.get('weekdays') and when.weekday() not in c['weekdays']:
+            continue
+        if surveys and survey_type not in surveys:
+            continue
+        if c.get('tiers') and tier not in c['tiers']:
+            continue
+        multiplier *= c.get('multiplier', 1.0)
+        bonus += c.get('bonus_points', 0)
+        names.append(c['name'])
+    return int(round(POINTS_PER_SURVEY * multiplier)) + bonus, ', '.join(names) or None
+
+
+def test_evaluate_matches_per_award_loop():
+    compiled = CompiledCampaigns(CAMPAIGNS)
+    rng = random.Random(3)
+    start = datetime(2025, 12, 1)
+
+    # Out of time order too, so the cached segment has to be re-resolved
+    for _ in range(5_000):
+        when = start + timedelta(seconds=rng.uniform(0, 120 * 86400))
+        survey_type = rng.choice(SURVEY_TYPES + ('survey_unknown',))
+        earned = rng.randint(0, 200)
+        assert compiled.evaluate(survey_type, earned, when) == evaluate_by_loop(CAMPAIGNS, survey_type, earned, when)
+
+
+def test_unknown_filters_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="unknown survey types"):
+        CompiledCampaigns([{'name': 'Typo', 'survey_types': ['survey_childrens_musuem']}])
+    with pytest.raises(ValueError, match="unknown tiers"):
+        CompiledCampaigns([{'name': 'Typo', 'tiers': ['Legends']}])
+    with pytest.raises(ValueError, match="unknown weekdays"):
+        CompiledCampaigns([{'name': 'Typo', 'weekdays': [5, 7]}])
+    with pytest.raises(ValueError, match="unknown weekdays"):
+        CompiledCampaigns([{'name': 'Typo', 'weekdays': '-1,Sat'}])
+    assert CompiledCampaigns([{'name': 'Weekend', 'weekdays': '5, 6'}]).campaigns[0]['weekdays'] == {5, 6}
+
+    saved = save_campaign({'name': 'Typo', 'survey_types': 'survey_overall'}, str(tmp_path / "campaigns.db"))
+    assert not saved["success"]
@@ -0,0 +1,48 @@
+"""
+Tests for incremental theme clustering of comments
+"""
+
+import shutil
+import sqlite3
+from pathlib import Path
+
+from comment_clustering import ThemeClusterer, cluster_new_comments, load_theme_summary
+from loyalty_engine import SURVEY_TYPES
+
+DB_PATH = Path(__file__).parent / 'visitor_feedback.db'
+
+
+def test_theme_clustering_separates_themes_incrementally(tmp_path):
+    """Distinct themes land in distinct clusters; later runs only fold in new rows"""
+    themes = [
+        ['The toilets were dirty and smelly', 'Dirty smelly toilets near the gallery', 'Toilets were so dirty'],
+        ['Parking was impossible to find', 'No parking spaces left at noon', 'Parking lot was full'],
+        ['Gift shop souvenirs were lovely', 'Lovely souvenirs in the gift shop', 'Bought souvenirs at the gift shop'],
+    ]
+    clusterer = ThemeClusterer(num_clusters=3)
+    for _ in range(3):
+        result = clusterer.partial_fit([c for theme in themes for c in theme] + [None, '...'])
+    labels = result['cluster_id'].to_numpy()
+    assert len({*labels[0:3]}) == len({*labels[3:6]}) == len({*labels[6:9]}) == 1
+    assert len({labels[0], labels[3], labels[6]}) == 3
+    assert (labels[9:] == -1).all()
+    assert 'toilets' in clusterer.top_terms(labels[0])
+
+    db_path = str(tmp_path / 'feedback.db')
+    shutil.copy(DB_PATH, db_path)
+    first = cluster_new_comments(db_path)
+    assert sum(first.values()) > 0
+    assert sum(cluster_new_comments(db_path).values()) == 0
+
+    table = SURVEY_TYPES[0]
+    conn = sqlite3.connect(db_path)
+    user_id = conn.execute(f"SELECT user_id FROM {table} LIMIT 1").fetchone()[0]
+    conn.execute(f"INSERT INTO {table} (user_id, additional_comments, time_spent_seconds, is_spam) "
+                 "VALUES (?, 'Parking was impossible to find', 60, 0)", (user_id,))
+    conn.commit()
+    conn.close()
+    assert cluster_new_comments(db_path)[table] == 1
+
+    summary = load_theme_summary(db_path)
+    assert summary['size'].sum() == sum(first.values()) + 1
+    assert summary['representatives'].map(len).gt(0).all()
@@ -0,0 +1,33 @@
+"""
+Tests for near-duplicate comment clustering and representative scoring
+"""
+
+from comment_dedup import NearDuplicateIndex, analyze_cluster_representatives
+from sentiment_analysis import AdvancedSentimentAnalyzer
+
+
+def test_near_duplicate_clusters_and_representative_scoring(survey_comments):
+    """Pasted and lightly edited comments share a cluster and one sentiment score"""
+    comments = [
+        'The staff were really helpful and friendly!',
+        'the staff were really helpful and friendly',
+        'The staff were really helpful & friendly :)',
+        'The staff were really helpful and friendly today',
+        'Bathrooms were filthy. Unacceptable for such a major museum.',
+        'ok', 'OK', 'good', None,
+    ] + survey_comments[:200]
+
+    clusters = NearDuplicateIndex().cluster(comments)
+    assert clusters['cluster_id'].iloc[:4].nunique() == 1
+    assert clusters['cluster_size'].iloc[0] >= 4
+    assert clusters['cluster_id'].iloc[5] == clusters['cluster_id'].iloc[6]
+    assert len({clusters['cluster_id'].iloc[i] for i in (0, 4, 5, 7)}) == 4
+    assert clusters.groupby('cluster_id')['is_representative'].sum().eq(1).all()
+
+    analyzer = AdvancedSentimentAnalyzer(use_textblob=False)
+    shared = analyze_cluster_representatives(comments, analyzer)
+    direct = analyzer.analyze_batch(comments)
+    # Exact and normalized duplicates get exactly their own score back
+    exact = ~clusters['cluster_id'].isin(clusters['cluster_id'].iloc[:4])
+    assert shared['label'][exact].tolist() == direct['label'][exact].tolist()
+    assert shared['label'].iloc[:4].nunique() == 1
@@ -0,0 +1,94 @@
+"""
+Tests for comment enrichment side tables and the dashboard readers built on them
+"""
+
+import shutil
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from comment_enrichment import (
+    CommentEnricher, load_comment_panel, load_enriched_insights, load_segment_recommendations
+)
+from loyalty_engine import SURVEY_TYPES
+from sentiment_analysis import analyze_comments_advanced, generate_recommendations
+
+DB_PATH = Path(__file__).parent / 'visitor_feedback.db'
+
+
+def test_enrichment_matches_view_time_analysis(tmp_path):
+    """Side tables reproduce the dashboard's analysis and pick up new rows by watermark"""
+    db_path = str(tmp_path / 'feedback.db')
+    shutil.copy(DB_PATH, db_path)
+    table = SURVEY_TYPES[-1]
+
+    enricher = CommentEnricher(db_path)
+    assert enricher.enrich_all(batch_size=50)[table] > 0
+    assert sum(enricher.enrich_all().values()) == 0
+
+    conn = sqlite3.connect(db_path)
+    comments = pd.read_sql_query(f"""
+        SELECT s.additional_comments, u.language
+        FROM {table} s LEFT JOIN users u ON u.user_id = s.user_id
+        WHERE s.is_spam = 0
+    """, conn)
+    expected = analyze_comments_advanced(comments['additional_comments'], languages=comments['language'])
+
+    summary, topics = load_enriched_insights(db_path, table)
+    for key, value in expected['summary'].items():
+        assert summary[key] == pytest.approx(value)
+    expected_topics = expected['topics'].set_index('Topic').sort_index()
+    assert np.allclose(topics.set_index('Topic').sort_index().to_numpy(dtype=float),
+                       expected_topics.to_numpy(dtype=float))
+
+    user_id = conn.execute(f"SELECT user_id FROM {table} LIMIT 1").fetchone()[0]
+    conn.execute(f"INSERT INTO {table} (user_id, additional_comments, time_spent_seconds, is_spam) "
+                 "VALUES (?, ?, 120, 0)",
+                 (user_id, 'The staff were extremely rude and the toilets were dirty'))
+    conn.commit()
+    conn.close()
+
+    assert enricher.enrich_table(table) == 1
+    assert load_enriched_insights(db_path, table)[0]['total_comments'] == summary['total_comments'] + 1
+
+
+def test_dashboard_reads_wait_for_a_complete_enrichment(tmp_path):
+    """Partial or other-version side tables are not read; the panels analyze at view time"""
+    full_path, partial_path = str(tmp_path / 'full.db'), str(tmp_path / 'partial.db')
+    shutil.copy(DB_PATH, full_path)
+    shutil.copy(DB_PATH, partial_path)
+    table = SURVEY_TYPES[0]
+
+    CommentEnricher(full_path).enrich_all()
+    assert CommentEnricher(partial_path).enrich_table(table, batch_size=50) == 50
+
+    assert load_enriched_insights(partial_path, table) is None
+    assert load_enriched_insights(full_path, table, analyzer_version='older') is None
+    enriched_summary = load_enriched_insights(full_path, table)[0]
+    for key, value in load_comment_panel(partial_path, table)['summary'].items():
+        assert enriched_summary[key] == pytest.approx(value)
+
+    pd.testing.assert_frame_equal(load_segment_recommendations(partial_path, 'nationality'),
+                                  load_segment_recommendations(full_path, 'nationality'))
+
+
+def test_segment_recommendations_match_per_segment_runs(tmp_path):
+    """One grouped pass gives each segment the recommendations of a separate run"""
+    db_path = str(tmp_path / 'feedback.db')
+    shutil.copy(DB_PATH, db_path)
+    CommentEnricher(db_path).enrich_all()
+
+    grouped = load_segment_recommendations(db_path, 'survey_type', min_comments=1)
+    for table in SURVEY_TYPES:
+        expected = generate_recommendations(*load_enriched_insights(db_path, table))
+        actual = grouped[grouped['segment'] == table].sort_values('rank')
+        assert sorted(actual['issue']) == sorted(rec['issue'] for rec in expected)
+        assert actual['rank'].tolist() == list(range(1, len(actual) + 1))
+
+    by_nationality = load_segment_recommendations(db_path, 'nationality', min_comments=20)
+    assert (by_nationality['total_comments'] >= 20).all()
+    priorities = by_nationality['priority'].map({'HIGH': 0, 'MEDIUM': 1, 'OPPORTUNITY': 2})
+    assert priorities.is_monotonic_increasing
@@ -0,0 +1,190 @@
+"""
+Tests for the dashboard's SQL chart aggregates, cache keys, pagination and panel cache
+"""
+
+import ast
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import dashboard_queries
+from comment_enrichment import load_comment_panel
+from sentiment_analysis import generate_recommendations
+
+DB_PATH = Path(__file__).parent / 'visitor_feedback.db'
+DASHBOARD_PATH = Path(__file__).parent / 'dashboard' / 'staff_dashboard.py'
+
+
+
+def test_dashboard_aggregates_match_full_table_pandas():
+    """Each pushed-down chart query gives what pandas computed from the whole table"""
+    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    try:
+        overall = pd.read_sql_query("SELECT * FROM survey_overall_experience WHERE is_spam = 0", conn)
+        counts = dashboard_queries.rating_counts(conn, 'survey_overall_experience', 'overall_rating')
+        expected = overall['overall_rating'].value_counts().sort_index()
+        assert counts['rating'].tolist() == expected.index.tolist()
+        assert counts['count'].tolist() == expected.tolist()
+
+        nps = dashboard_queries.nps_summary(conn)
+        assert nps['avg_nps'] == pytest.approx(overall['nps_score'].mean())
+        assert nps['promoters'] == (overall['nps_score'] >= 9).sum()
+        assert nps['detractors'] == (overall['nps_score'] <= 6).sum()
+
+        users = pd.read_sql_query("SELECT * FROM users WHERE gender != 'Other'", conn)
+        grouped = dashboard_queries.top_groups_by_gender(conn, 'nationality', 10)
+        totals = grouped.groupby('nationality')['count'].sum()
+        assert sorted(totals, reverse=True) == users['nationality'].value_counts().head(10).tolist()
+        assert (users['nationality'].value_counts()[totals.index] == totals).all()
+        assert dashboard_queries.age_counts(conn)['count'].sum() == len(users)
+
+        averages = dashboard_queries.rating_averages(conn).set_index('Category')['Rating']
+        for label, table, column in dashboard_queries.RATING_CATEGORIES:
+            mean = pd.read_sql_query(f"SELECT {column} FROM {table} WHERE is_spam = 0", conn)[column].mean()
+            if pd.notna(mean):
+                assert averages[label] == pytest.approx(mean)
+
+        marketing = pd.read_sql_query("SELECT * FROM survey_marketing_loyalty WHERE is_spam = 0", conn)
+        for field, field_counts in dashboard_queries.category_counts(conn).items():
+            assert dict(zip(field_counts['value'], field_counts['count'])) == marketing[field].value_counts().to_dict()
+
+        stats = dashboard_queries.survey_stats(conn)
+        assert stats['Overall Experience']['valid'] == len(overall)
+        with pytest.raises(ValueError):
+            dashboard_queries.rating_counts(conn, 'users', 'age')
+    finally:
+        conn.close()
+
+
+
+def test_data_version_changes_only_after_writes(tmp_path):
+    """Dashboard cache key: stable across reads, new after any connection's commit"""
+    db_path = str(tmp_path / 'feedback.db')
+    shutil.copy(DB_PATH, db_path)
+    dashboard_conn = sqlite3.connect(db_path)
+    writer = sqlite3.connect(db_path)
+    try:
+        version = dashboard_queries.data_version(dashboard_conn)
+        dashboard_queries.survey_stats(dashboard_conn)
+        assert dashboard_queries.data_version(dashboard_conn) == version
+
+        writer.execute("UPDATE survey_overall_experience SET is_spam = 1 WHERE rowid = 1")
+        writer.commit()
+        after_other = dashboard_queries.data_version(dashboard_conn)
+        assert after_other != version
+
+        dashboard_conn.execute("UPDATE survey_overall_experience SET is_spam = 0 WHERE rowid = 1")
+        dashboard_conn.commit()
+        assert dashboard_queries.data_version(dashboard_conn) != after_other
+    finally:
+        dashboard_conn.close()
+        writer.close()
+
+
+
+def test_keyset_pages_cover_filtered_rows_in_order(tmp_path):
+    """Walking response pages by cursor visits every matching row once, in ORDER BY order"""
+    db_path = str(tmp_path / 'feedback.db')
+    shutil.copy(DB_PATH, db_path)
+    dashboard_queries.ensure_browse_schema(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(survey_tour_educational)")}
+        assert 'idx_tour_submitted' in indexes
+
+        table = 'survey_tour_educational'
+        full = pd.read_sql_query(f"SELECT * FROM {table} WHERE is_spam = 0", conn)
+        assert full['tour_experience_rating'].isna().any()  # NULLs must not break the cursor
+
+        for sort_column in ('tour_experience_rating', 'submitted_at', 'response_id'):
+            for descending in (True, False):
+                visited, after = [], None
+                while True:
+                    page = dashboard_queries.response_page(conn, table, sort_column, descending, 7, after, {'spam': 0})
+                    if page.empty:
+                        break
+                    visited += page['response_id'].tolist()
+                    after = dashboard_queries.page_cursor(page, sort_column)
+                expected = full.sort_values([sort_column, 'response_id'], ascending=not descending,
+                                            na_position='last' if descending else 'first')
+                assert visited == expected['response_id'].tolist()
+
+        filters = {'spam': 0, 'rating_column': 'tour_experience_rating', 'ratings': (4, 5),
+                   'start_date': '2025-10-01', 'end_date': '2025-10-31'}
+        in_october = full['submitted_at'].between('2025-10-01', '2025-11-01', inclusive='left')
+        expected = full[full['tour_experience_rating'].isin([4, 5]) & in_october]
+        assert dashboard_queries.count_responses(conn, table, filters) == len(expected)
+        page = dashboard_queries.response_page(conn, table, limit=len(expected) + 1, filters=filters)
+        assert sorted(page['response_id']) == sorted(expected['response_id'])
+        with pytest.raises(ValueError):
+            dashboard_queries.response_page(conn, table, sort_column='additional_comments')
+    finally:
+        conn.close()
+
+
+
+def test_panel_cache_serves_stale_panel_while_refreshing(tmp_path):
+    """A version change returns the old panel at once and recomputes it once, in the background"""
+    calls, gate = [], threading.Event()
+
+    def compute(table_name, column, include_spam):
+        calls.append(table_name)
+        if len(calls) > 1:
+            assert gate.wait(5)
+        return f"panel {len(calls)}"
+
+    panels = dashboard_queries.PanelCache(compute)
+    key = ('survey_overall_experience', 'additional_comments', False)
+    assert panels.get(key, 1, wait=True) == ("panel 1", False)
+    assert panels.get(key, 1) == ("panel 1", False)
+
+    assert panels.get(key, 2) == ("panel 1", True)
+    assert panels.get(key, 2) == ("panel 1", True)
+    gate.set()
+    deadline = time.time() + 5
+    while panels.get(key, 2)[1] and time.time() < deadline:
+        time.sleep(0.01)
+    assert panels.get(key, 2) == ("panel 2", False)
+    assert len(calls) == 2
+
+    db_path = str(tmp_path / 'feedback.db')
+    shutil.copy(DB_PATH, db_path)
+    panel = load_comment_panel(db_path, 'survey_overall_experience')
+    assert panel['summary']['total_comments'] > 0
+    assert panel['recommendations'] == generate_recommendations(panel['summary'], panel['topics'])
+
+
+def test_dashboard_page_code_does_not_rebind_helpers():
+    """Streamlit runs the page as a module: a page-level variable named like a helper replaces it"""
+    tree = ast.parse(DASHBOARD_PATH.read_text(encoding='utf-8'))
+    helpers = {node.name for node in tree.body if isinstance(node, ast.FunctionDef)}
+
+    def page_level_names(nodes):
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+                continue
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+                yield node.id
+            yield from page_level_names(ast.iter_child_nodes(node))
+
+    assert helpers and not helpers & set(page_level_names(tree.body))
+
+
+def test_dashboard_sections_render_without_errors(tmp_path, monkeypatch):
+    """Every section runs end to end against a copy of the bundled database"""
+    app_testing = pytest.importorskip("streamlit.testing.v1")
+    shutil.copy(DB_PATH, tmp_path / 'visitor_feedback.db')
+    monkeypatch.chdir(tmp_path)
+
+    app = app_testing.AppTest.from_file(str(DASHBOARD_PATH), default_timeout=120)
+    app.run()
+    for section in ["📊 Overview", "👥 Demographics", "⭐ Survey Analysis", "🎮 Loyalty Points",
+                    "🔍 Spam Detection", "📈 Marketing", "💾 Export"]:
+        app.radio(key='active_section').set_value(section).run()
+        assert not app.exception, section
+        assert not [error.value for error in app.error], section
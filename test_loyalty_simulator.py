@@ -0,0 +1,61 @@
+"""
+Test the Monte Carlo loyalty simulator against a small seeded database
+"""
+
+import sqlite3
+
+import pandas as pd
+
+from loyalty_engine import POINTS_PER_PROFILE_COMPLETION, LoyaltyPointsEngine
+from loyalty_simulator import LoyaltySimulator
+
+
+def seed_history(db_path, profile_completed=1, surveys_completed=0):
+    """Give every user the same loyalty history"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        UPDATE user_points SET surveys_completed = ? * (user_id % 4), profile_completed = ?
+    """, (surveys_completed, profile_completed))
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def test_simulation_is_deterministic_for_a_seed(make_loyalty_db):
+    simulator = LoyaltySimulator(seed_history(make_loyalty_db(balance=100), surveys_completed=30))
+
+    first = simulator.simulate(n_visitors=2_000, days=60, random_seed=7)
+    second = simulator.simulate(n_visitors=2_000, days=60, random_seed=7)
+    other = simulator.simulate(n_visitors=2_000, days=60, random_seed=8)
+
+    pd.testing.assert_frame_equal(first['daily'], second['daily'])
+    assert first['final_tiers'] == second['final_tiers']
+    assert not first['daily'].equals(other['daily'])
+
+
+def test_profile_bonus_is_not_awarded_twice(make_loyalty_db):
+    simulator = LoyaltySimulator(seed_history(make_loyalty_db(balance=100), profile_completed=1))
+
+    # Every seeded visitor already completed their profile: nothing left to earn
+    continuing = simulator.simulate(n_visitors=1_000, days=30, random_seed=1)
+    assert continuing['summary']['total_points_earned'] == 0
+
+    # Fresh visitors drawn from the same population each earn the bonus once
+    fresh = simulator.simulate(n_visitors=1_000, days=30, start_from_current=False, random_seed=1)
+    assert fresh['summary']['total_points_earned'] == 1_000 * POINTS_PER_PROFILE_COMPLETION
+
+
+def test_empty_reward_catalog_skips_redemptions(make_loyalty_db):
+    db_path = seed_history(make_loyalty_db(balance=100), surveys_completed=30)
+    engine = LoyaltyPointsEngine(db_path)
+    assert all(engine.redeem_reward(user_id, 'Explorer Badge')['success'] for user_id in range(1, 6))
+
+    # Visitors have redeemed before, but every reward has since been retired
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE rewards_catalog SET is_active = 0")
+    conn.commit()
+    conn.close()
+
+    result = LoyaltySimulator(db_path).simulate(n_visitors=500, days=30, random_seed=3)
+    assert result['daily']['points_burned'].sum() == 0
+    assert result['summary']['total_points_earned'] > 0
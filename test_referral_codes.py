@@ -0,0 +1,69 @@
+"""
+Test referral code generation, resolution and redemption
+"""
+
+from loyalty_engine import POINTS_PER_REFERRAL, LoyaltyPointsEngine
+from referral_codes import ReferralCodeManager, code_for_user, normalize_code
+
+
+def test_codes_are_unique_and_survive_retyping():
+    secret = bytes(range(16))
+    codes = [code_for_user(user_id, secret) for user_id in range(100_000)]
+    assert len(set(codes)) == len(codes)
+
+    # Without the secret a user's code cannot be derived from the id
+    other = [code_for_user(user_id, b'another secret') for user_id in range(1_000)]
+    assert sum(a == b for a, b in zip(codes, other)) <= 1
+
+    code = code_for_user(42, secret)
+    typed = code.lower()[:5] + '-' + code.lower()[5:]
+    assert normalize_code(typed) == code
+    assert normalize_code(code.replace('0', 'O').replace('1', 'I')) == code
+    assert normalize_code('GEM12') is None
+
+
+def test_generate_and_resolve_codes(make_loyalty_db):
+    db_path = make_loyalty_db(users=50)
+    manager = ReferralCodeManager(db_path)
+
+    issued = manager.get_or_create_code(7)
+    assert issued["success"]
+    assert manager.get_or_create_code(7)["referral_code"] == issued["referral_code"]
+    assert not manager.get_or_create_code(999)["success"]
+
+    assert ReferralCodeManager(db_path).secret == manager.secret
+    generated = manager.generate_all_codes(batch_size=16)
+    assert generated["codes_created"] == 49
+    assert generated["total_codes"] == 50
+    assert manager.resolve_code(issued["referral_code"].lower()) == 7
+    assert manager.resolve_code("GEM000000") is None
+
+
+def test_referral_code_redemption_rules(make_loyalty_db):
+    db_path = make_loyalty_db(users=50)
+    code = ReferralCodeManager(db_path).get_or_create_code(1)["referral_code"]
+    engine = LoyaltyPointsEngine(db_path)
+
+    self_referral = engine.award_referral_by_code(code, 1)
+    assert not self_referral["success"]
+    assert "themselves" in self_referral["error"]
+
+    assert not engine.award_referral_by_code("not-a-code", 2)["success"]
+
+    first = engine.award_referral_by_code(code, 2)
+    assert first["success"]
+    assert first["new_balance"] == POINTS_PER_REFERRAL
+
+    again = engine.award_referral_by_code(code, 2)
+    assert not again["success"]
+
+    # A referred visitor cannot go on to credit other referrers' codes
+    manager = ReferralCodeManager(db_path)
+    for referrer in (3, 4):
+        other = engine.award_referral_by_code(manager.get_or_create_code(referrer)["referral_code"], 2)
+        assert not other["success"]
+        assert "already referred" in other["error"]
+        assert engine.get_user_points_summary(referrer)["points_balance"] == 0
+    summary = engine.get_user_points_summary(1)
+    assert summary["points_balance"] == POINTS_PER_REFERRAL
+    assert summary["points_data"]["referrals_completed"] == 1
@@ -0,0 +1,115 @@
+"""
+Test reward inventory, reservations and fulfillment under concurrent redemptions
+"""
+
+import sqlite3
+import threading
+
+from loyalty_engine import LoyaltyPointsEngine
+from reward_inventory import RewardInventory
+
+
+def test_concurrent_redemptions_never_oversell(make_loyalty_db):
+    db_path = make_loyalty_db(balance=500)
+    inventory = RewardInventory(db_path)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        UPDATE reward_inventory SET stock_on_hand = 5
+        WHERE reward_id = (SELECT reward_id FROM rewards_catalog WHERE reward_name = 'Keychain')
+    """)
+    conn.commit()
+    conn.close()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda uid=uid: results.append(inventory.redeem_stocked_reward(uid, "Keychain")))
+        for uid in range(1, 21)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(r["success"] for r in results) == 5
+
+    keychain = next(s for s in inventory.get_stock_levels() if s["reward_name"] == "Keychain")
+    assert keychain["stock_on_hand"] == 0
+    assert keychain["reserved"] == 0
+    assert keychain["pending_fulfillment"] == 5
+
+
+def test_reservation_expiry_returns_stock(make_loyalty_db):
+    db_path = make_loyalty_db(balance=500)
+    inventory = RewardInventory(db_path)
+
+    held = inventory.reserve_reward(1, "Postcard", hold_seconds=0)
+    assert held["success"]
+    assert inventory.expire_reservations() == 1
+
+    confirmed = inventory.confirm_reservation(held["reservation_id"])
+    assert not confirmed["success"]
+
+    postcard = next(s for s in inventory.get_stock_levels() if s["reward_name"] == "Postcard")
+    assert postcard["reserved"] == 0
+
+
+def test_engine_routes_physical_rewards_and_worker_fulfills(make_loyalty_db):
+    db_path = make_loyalty_db(balance=500)
+    engine = LoyaltyPointsEngine(db_path)
+
+    result = engine.redeem_reward(1, "Sticker Sheet")
+    assert result["success"]
+    assert result["redemption_status"] == "PENDING"
+    assert result["new_balance"] == 460
+
+    inventory = RewardInventory(db_path)
+    assert inventory.fulfill_pending_redemptions() == 1
+
+    history = engine.get_user_redemption_history(1)
+    assert history["redemption_history"][0]["reward_name"] == "Sticker Sheet"
+
+
+def test_stocked_category_without_inventory_row_is_unlimited(make_loyalty_db):
+    db_path = make_loyalty_db(balance=500)
+    engine = LoyaltyPointsEngine(db_path)
+    RewardInventory(db_path)
+
+    # A physical reward added after the inventory was seeded has no stock row
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        DELETE FROM reward_inventory
+        WHERE reward_id = (SELECT reward_id FROM rewards_catalog WHERE reward_name = 'Sticker Sheet')
+    """)
+    conn.commit()
+    conn.close()
+
+    result = engine.redeem_reward(1, "Sticker Sheet")
+    assert result["success"]
+    assert result["new_balance"] == 460
+    assert "redemption_status" not in result
+
+    history = engine.get_user_redemption_history(1)
+    assert history["redemption_history"][0]["reward_name"] == "Sticker Sheet"
+
+
+def test_rewards_added_to_the_catalog_later_are_stocked(make_loyalty_db):
+    db_path = make_loyalty_db(balance=500)
+    engine = LoyaltyPointsEngine(db_path)
+    inventory = RewardInventory(db_path)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        INSERT INTO rewards_catalog (reward_name, reward_category, points_required, description)
+        VALUES ('Tote Bag', 'Medium-Cost', 100, 'Canvas tote'), ('Night Tour Badge', 'Digital Rewards', 50, NULL)
+    """)
+    conn.commit()
+    conn.close()
+
+    stock = {s["reward_name"]: s for s in inventory.get_stock_levels()}
+    assert stock["Tote Bag"]["stock_on_hand"] == 200
+    assert "Night Tour Badge" not in stock
+
+    result = engine.redeem_reward(1, "Tote Bag")
+    assert result["success"] and result["redemption_status"] == "PENDING"
+    assert "redemption_status" not in engine.redeem_reward(1, "Night Tour Badge")
@@ -0,0 +1,311 @@
+"""
+Tests for sentiment scoring, topic matching, language routing and aspect sentiment
+"""
+
+import json
+import shutil
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sentiment_analysis
+from loyalty_engine import SURVEY_TYPES
+from sentiment_analysis import (
+    AdvancedSentimentAnalyzer, AdvancedTopicModeler, AspectSentimentAnalyzer, LanguageRoutedAnalyzer,
+    SentimentCache, TextBlob,
+    analyze_comments_advanced, analyze_sentiment_parallel, analyze_table_streaming,
+    lexicon_pack_checksum, load_lexicon_pack, stream_sentiment
+)
+
+DB_PATH = Path(__file__).parent / 'visitor_feedback.db'
+
+EDGE_CASES = [
+    None, '', '   ', '...', 'Not bad at all.', 'The staff were not very friendly',
+    'Absolutely amazing! Never disappointing. So crowded though...',
+    'no. good', 'Really really long wait, extremely rude staff!!!'
+]
+
+
+def reference_results(analyzer, texts):
+    """Per-comment results from the original analyze_full_text loop"""
+    results = [analyzer.analyze_full_text(t) for t in texts]
+    return (np.array([r[0] for r in results], dtype=float),
+            [r[1] for r in results],
+            np.array([r[2] for r in results], dtype=float),
+            [analyzer.get_sentiment_rating(r[0]) for r in results],
+            [len(r[3]) for r in results])
+
+
+@pytest.mark.parametrize('use_textblob', [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(TextBlob is None, reason='textblob not installed'))
+])
+def test_batch_matches_full_text(use_textblob, survey_comments):
+    """Batch mode reproduces analyze_full_text exactly for the same scorer"""
+    texts = survey_comments + EDGE_CASES
+    analyzer = AdvancedSentimentAnalyzer(use_textblob=use_textblob)
+
+    scores, labels, confidences, ratings, num_sentences = reference_results(analyzer, texts)
+    batch = analyzer.analyze_batch(texts)
+
+    assert np.allclose(batch['score'], scores)
+    assert batch['label'].tolist() == labels
+    assert np.allclose(batch['confidence'], confidences)
+    assert batch['rating'].tolist() == ratings
+    assert batch['num_sentences'].tolist() == num_sentences
+
+
+@pytest.mark.skipif(TextBlob is None, reason='textblob not installed')
+def test_lexicon_only_label_agreement(survey_comments):
+    """Lexicon-only fast mode agrees with the TextBlob-blended labels on real comments"""
+    texts = survey_comments
+    _, labels, _, _, _ = reference_results(AdvancedSentimentAnalyzer(), texts)
+
+    fast = AdvancedSentimentAnalyzer(use_textblob=False).analyze_batch(texts)
+    agreement = np.mean(fast['label'].to_numpy() == np.array(labels))
+
+    assert agreement >= 0.95
+
+
+def test_sentiment_cache_scores_each_text_once(tmp_path, survey_comments):
+    """Repeated and re-analyzed comments are served from comment_sentiment"""
+    texts = survey_comments[:300] + EDGE_CASES
+    analyzer = AdvancedSentimentAnalyzer(use_textblob=False)
+    cache = SentimentCache(str(tmp_path / 'cache.db'), analyzer=analyzer)
+
+    first = cache.analyze(texts)
+    distinct = len({analyzer.normalize_text(t) for t in texts})
+    assert cache.last_scored == distinct
+
+    second = cache.analyze(texts + [t.upper() for t in texts if t])
+    assert cache.last_scored == 0
+
+    expected = analyzer.analyze_batch(texts)
+    for frame in (first, second.iloc[:len(texts)]):
+        assert np.allclose(frame['score'], expected['score'])
+        assert frame['label'].tolist() == expected['label'].tolist()
+        assert frame['rating'].tolist() == expected['rating'].tolist()
+
+
+def test_parallel_scoring_matches_serial(survey_comments):
+    """Process-pool chunks reassemble in the original order"""
+    comments = pd.Series(survey_comments[:400] + EDGE_CASES)
+    serial = AdvancedSentimentAnalyzer(use_textblob=False).analyze_batch(comments.dropna())
+
+    parallel = analyze_sentiment_parallel(comments, use_textblob=False, max_workers=2,
+                                          chunk_size=25, min_parallel=0)
+
+    assert parallel.index.tolist() == comments.dropna().index.tolist()
+    assert parallel['comment'].tolist() == serial['comment'].tolist()
+    assert np.allclose(parallel['score'], serial['score'])
+    assert parallel['label'].tolist() == serial['label'].tolist()
+
+
+def legacy_identify_topics(modeler, text):
+    """identify_topics as it was before the inverted index"""
+    text = modeler.preprocess_text(text)
+    if not text:
+        return []
+    keywords = set(modeler.extract_keywords(text))
+    phrases = set(modeler.extract_phrases(text))
+    topic_scores = []
+    for topic, topic_keywords in modeler.topic_keywords.items():
+        keyword_matches = keywords.intersection(topic_keywords)
+        phrase_words = set()
+        for phrase in phrases:
+            phrase_words.update(phrase.split())
+        phrase_matches = phrase_words.intersection(topic_keywords)
+        score = len(keyword_matches) + (len(phrase_matches) * 1.5)
+        if score > 0:
+            topic_scores.append((topic, score, list(keyword_matches.union(phrase_matches))))
+    topic_scores.sort(key=lambda x: x[1], reverse=True)
+    return topic_scores
+
+
+def test_topic_index_matches_legacy_scoring(survey_comments):
+    """The single-pass topic matcher scores exactly like the per-topic loop"""
+    modeler = AdvancedTopicModeler()
+    texts = survey_comments + EDGE_CASES + [
+        'Long wait in the ticket line, the staff were helpful',
+        'clean', 'very clean toilet', 'the museum cafe was too crowded and expensive'
+    ]
+
+    for text in texts:
+        expected = legacy_identify_topics(modeler, text)
+        actual = modeler.identify_topics(text)
+        assert [(t, s) for t, s, _ in actual] == [(t, s) for t, s, _ in expected]
+        assert [set(m) for _, _, m in actual] == [set(m) for _, _, m in expected]
+
+
+def test_topic_index_matches_multi_word_keywords():
+    """Multi-word keywords match as consecutive words and score like phrases"""
+    modeler = AdvancedTopicModeler()
+    modeler.topic_keywords['Staff & Service'].add('audio guide')
+    modeler._build_topic_index()
+
+    topics = {t: (s, set(m)) for t, s, m in modeler.identify_topics('The audio guide kept cutting out')}
+    # 'guide': keyword 1 + phrase 1.5, 'audio guide': phrase 1.5
+    assert topics['Staff & Service'] == (4.0, {'guide', 'audio guide'})
+
+    topics = {t: (s, set(m)) for t, s, m in modeler.identify_topics('audio and guide were fine')}
+    assert topics['Staff & Service'] == (1.0, {'guide'})
+
+
+def test_streaming_summary_and_write_back(tmp_path):
+    """Streaming batches give the in-memory summary and persist every scored row"""
+    db_path = str(tmp_path / 'feedback.db')
+    shutil.copy(DB_PATH, db_path)
+    table = SURVEY_TYPES[0]
+
+    conn = sqlite3.connect(db_path)
+    comments = pd.read_sql_query(f"SELECT additional_comments FROM {table} WHERE is_spam = 0", conn)
+    conn.close()
+    expected = analyze_comments_advanced(comments['additional_comments'], fast=True)['summary']
+
+    summary = analyze_table_streaming(db_path, table, batch_size=17, fast=True, write_back=True)
+
+    assert summary.keys() == expected.keys()
+    for key, value in expected.items():
+        assert summary[key] == pytest.approx(value)
+
+    # Written to its own table, never over the enrichment worker's rows
+    conn = sqlite3.connect(db_path)
+    stored = conn.execute("SELECT COUNT(*) FROM streamed_comment_sentiment WHERE survey_type = ?",
+                          (table,)).fetchone()[0]
+    worker_rows = conn.execute("SELECT COUNT(*) FROM survey_comment_sentiment").fetchone()[0]
+    conn.close()
+    assert stored == expected['total_comments']
+    assert worker_rows == 0
+
+
+def test_vectorized_topic_summary_matches_loop(survey_comments):
+    """The document-term path returns the same topic frame as the per-comment loop"""
+    modeler = AdvancedTopicModeler()
+    comments = pd.Series(survey_comments + EDGE_CASES + ['very clean toilet toilet', 'Wait\x1ewait'])
+
+    all_topics = [(t, s) for c in comments.dropna() for t, s, _ in modeler.identify_topics(c)]
+    expected = pd.DataFrame(all_topics, columns=['Topic', 'Score']).groupby('Topic').agg({
+        'Score': ['sum', 'count', 'mean']
+    }).reset_index()
+    expected.columns = ['Topic', 'Total_Score', 'Mentions', 'Avg_Score']
+    expected = expected.sort_values('Total_Score', ascending=False)
+
+    pd.testing.assert_frame_equal(modeler.analyze_multiple_comments_vectorized(comments), expected)
+    assert modeler.analyze_multiple_comments_vectorized(pd.Series([None, '', 'the'])).empty
+
+
+def test_language_routing_loads_packs_lazily():
+    """Packs load on first use, route by language and keep input order"""
+    load_lexicon_pack.cache_clear()
+    router = LanguageRoutedAnalyzer(use_textblob=False)
+    assert load_lexicon_pack.cache_info().currsize == 0
+
+    texts = ['Le musée était magnifique', 'Das Personal war sehr unfreundlich',
+             'Great museum', 'Le musée était magnifique', None]
+    languages = ['French', 'German', 'Japanese', 'English', 'French']
+    scored = router.analyze_batch(texts, languages)
+
+    assert scored['comment'].tolist()[:4] == texts[:4]
+    assert scored['language'].tolist() == ['French', 'German', 'English', 'English', 'English']
+    assert scored['label'].tolist() == ['Positive', 'Negative', 'Positive', 'Neutral', 'Neutral']
+    assert '-fr-' in scored['analyzer_version'].iloc[0]
+    assert load_lexicon_pack.cache_info().currsize == 2
+
+    english = AdvancedSentimentAnalyzer(use_textblob=False)
+    assert router.analyzer_for('Thai') is router.analyzer_for('English')
+    assert router.analyzer_for('English').positive_keywords == english.positive_keywords
+
+
+def test_language_routing_composes_with_cache_and_pool(tmp_path, survey_comments):
+    """languages, db_path and max_workers combine instead of excluding each other"""
+    texts = ['Le musée était magnifique', 'Das Personal war sehr unfreundlich',
+             None, 'Great museum', 'Le musée était magnifique'] + survey_comments[:50]
+    languages = ['French', 'German', 'French', 'Japanese', 'English'] + ['English'] * 50
+    comments = pd.Series(texts, index=range(100, 100 + len(texts)))
+    routed = analyze_comments_advanced(comments, fast=True, languages=languages)['sentiments']
+
+    db_path = str(tmp_path / 'cache.db')
+    for options in ({'db_path': db_path}, {'max_workers': 2}, {'db_path': db_path, 'max_workers': 2}):
+        combined = analyze_comments_advanced(comments, fast=True, languages=languages, **options)['sentiments']
+        assert [r['comment'] for r in combined] == [r['comment'] for r in routed]
+        assert [r['label'] for r in combined] == [r['label'] for r in routed]
+        assert [r['language'] for r in combined] == [r['language'] for r in routed]
+        assert np.allclose([r['score'] for r in combined], [r['score'] for r in routed])
+
+    with sqlite3.connect(db_path) as conn:
+        versions = {row[0] for row in conn.execute("SELECT DISTINCT analyzer_version FROM comment_sentiment")}
+    assert any('-fr-' in v for v in versions) and any('-de-' in v for v in versions)
+
+
+def test_editing_a_lexicon_pack_changes_the_analyzer_version(tmp_path, monkeypatch):
+    """Scores cached under a pack are not reused once the pack file changes"""
+    before = AdvancedSentimentAnalyzer(language='French').version
+    german = AdvancedSentimentAnalyzer(language='German').version
+    routed_before = LanguageRoutedAnalyzer().version
+
+    lexicons = tmp_path / 'lexicons'
+    shutil.copytree(Path(__file__).parent / 'lexicons', lexicons)
+    pack = json.loads((lexicons / 'fr.json').read_text(encoding='utf-8'))
+    pack['positive']['chouette'] = 0.8
+    (lexicons / 'fr.json').write_text(json.dumps(pack), encoding='utf-8')
+
+    monkeypatch.setattr(sentiment_analysis, 'LEXICON_DIR', lexicons)
+    load_lexicon_pack.cache_clear()
+    lexicon_pack_checksum.cache_clear()
+    try:
+        assert AdvancedSentimentAnalyzer(language='French').version != before
+        assert AdvancedSentimentAnalyzer(language='German').version == german
+        assert LanguageRoutedAnalyzer().version != routed_before
+    finally:
+        load_lexicon_pack.cache_clear()
+        lexicon_pack_checksum.cache_clear()
+
+
+def test_streaming_rejects_unknown_tables():
+    with pytest.raises(ValueError, match="Unknown survey table"):
+        next(stream_sentiment(str(DB_PATH), 'users; DROP TABLE users'))
+
+
+def test_english_comments_keep_the_english_analyzer(survey_comments):
+    """A visitor's language pack only scores comments written in that language"""
+    router = LanguageRoutedAnalyzer()
+    english = AdvancedSentimentAnalyzer()
+    texts = survey_comments[:100]
+
+    routed = router.analyze_batch(texts, ['French'] * len(texts))
+    expected = english.analyze_batch(texts)
+    assert set(routed['language']) == {'English'}
+    assert np.allclose(routed['score'], expected['score'])
+    assert (routed['analyzer_version'] == english.version).all()
+
+    # "personne" (a person) is not a negation
+    french = router.analyze_batch(['Une personne très aimable', "Il n'y a personne, pas aimable"],
+                                  ['French', 'French'])
+    assert french['label'].tolist() == ['Positive', 'Negative']
+    assert set(french['language']) == {'French'}
+
+
+def test_aspect_sentiment_shares_one_tokenization(survey_comments):
+    """Aspects carry their own sentence's sentiment; comment scores and topics are unchanged"""
+    analyzer = AdvancedSentimentAnalyzer(use_textblob=False)
+    modeler = AdvancedTopicModeler()
+    aspect_analyzer = AspectSentimentAnalyzer(analyzer, modeler)
+
+    comments = survey_comments[:500] + EDGE_CASES + ['The toilets were dirty. The exhibition was amazing!']
+    sentiments, aspects = aspect_analyzer.analyze_batch(comments)
+    pd.testing.assert_frame_equal(sentiments, analyzer.analyze_batch(comments))
+
+    topics = aspects.groupby('comment_index')['topic'].apply(set)
+    for index, comment in enumerate(comments):
+        assert topics.get(index, set()) == {t for t, _, _ in modeler.identify_topics(comment)}
+
+    last = aspects[aspects['comment_index'] == len(comments) - 1].set_index('topic')
+    assert last.loc['Cleanliness', 'label'] == 'Negative'
+    assert last.loc['Experience', 'label'] == 'Positive'
+
+    summary = aspect_analyzer.summarize(aspects)
+    assert summary['Mentions'].sum() == len(aspects)
+    assert summary['Avg_Sentiment'].is_monotonic_increasing
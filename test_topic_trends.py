@@ -0,0 +1,63 @@
+"""
+Tests for incremental emerging-topic detection
+"""
+
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from comment_enrichment import CommentEnricher
+from loyalty_engine import SURVEY_TYPES
+from topic_trends import TopicTrendDetector, TopicTrendTracker, detect_emerging_topics
+
+DB_PATH = Path(__file__).parent / 'visitor_feedback.db'
+
+
+def test_emerging_topic_detection_is_incremental(tmp_path):
+    """A burst of wait-time complaints flags in its hour; state survives a restart"""
+    detector = TopicTrendDetector('hour', warmup_buckets=3)
+    start = pd.Timestamp('2025-12-01 00:00:00').to_pydatetime()
+    for hour in range(6):
+        detector.record(['Wait Time', 'Exhibits'], start + pd.Timedelta(hours=hour, minutes=5))
+    for _ in range(8):
+        detector.record(['Wait Time'], start + pd.Timedelta(hours=6, minutes=30))
+    assert not detector.record(['Exhibits'], start)  # its bucket already closed
+
+    trends = detector.emerging().set_index('topic')
+    assert trends.loc['Wait Time', 'is_emerging']
+    assert 'Exhibits' not in trends.index
+    assert detector.closed_buckets == 6 and detector.late_mentions == 1
+
+    db_path = str(tmp_path / 'feedback.db')
+    shutil.copy(DB_PATH, db_path)
+    table = SURVEY_TYPES[0]
+    enricher = CommentEnricher(db_path)
+    enricher.enrich_all()
+
+    # The table-by-table backfill ends with the same baseline as a time-ordered replay
+    for granularity in enricher.trends.granularities:
+        assert enricher.trends.detectors[granularity].late_mentions == 0
+        pd.testing.assert_frame_equal(enricher.trends.emerging(granularity),
+                                      detect_emerging_topics(db_path, granularity))
+
+    conn = sqlite3.connect(db_path)
+    user_id = conn.execute(f"SELECT user_id FROM {table} LIMIT 1").fetchone()[0]
+    conn.executemany(f"INSERT INTO {table} (user_id, additional_comments, time_spent_seconds, is_spam, "
+                     "submitted_at) VALUES (?, ?, 60, 0, ?)",
+                     [(user_id, 'The queue was so long, a terrible wait', f'2026-01-01 10:{m:02d}:00')
+                      for m in range(10)])
+    conn.commit()
+    conn.close()
+    enricher.enrich_table(table)
+
+    hourly = enricher.trends.emerging('hour').set_index('topic')
+    assert hourly.loc['Wait Time', 'mentions'] == 10
+    assert hourly.loc['Wait Time', 'is_emerging']
+
+    # A new process resumes from the saved state; replaying the stored buckets agrees
+    restored = TopicTrendTracker(db_path).emerging('hour')
+    pd.testing.assert_frame_equal(restored, enricher.trends.emerging('hour'))
+    replayed = detect_emerging_topics(db_path, 'hour').set_index('topic')
+    assert replayed.loc['Wait Time', 'is_emerging']
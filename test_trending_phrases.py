@@ -0,0 +1,53 @@
+"""
+Tests for heavy-hitter tracking of trending comment phrases
+"""
+
+import shutil
+import sqlite3
+from collections import Counter
+from pathlib import Path
+
+import pandas as pd
+
+from comment_enrichment import CommentEnricher
+from loyalty_engine import SURVEY_TYPES
+from trending_phrases import PhraseTrendTracker, load_trending_phrases
+
+DB_PATH = Path(__file__).parent / 'visitor_feedback.db'
+
+
+def test_trending_phrases_track_heavy_hitters(tmp_path):
+    """Sketch estimates never undercount, and the most frequent phrases make the top-K"""
+    db_path = str(tmp_path / 'feedback.db')
+    shutil.copy(DB_PATH, db_path)
+    enricher = CommentEnricher(db_path)
+    enricher.enrich_all(batch_size=100)
+
+    tracker = PhraseTrendTracker(db_path)
+    conn = sqlite3.connect(db_path)
+    exact_by_table = {}
+    for table in SURVEY_TYPES:
+        exact_by_table[table] = Counter(
+            phrase for (comment,) in conn.execute(
+                f"SELECT additional_comments FROM {table} WHERE additional_comments IS NOT NULL")
+            for phrase in tracker.comment_phrases(comment))
+    conn.close()
+
+    table = SURVEY_TYPES[0]
+    trending = load_trending_phrases(db_path, table, limit=10)
+    for phrase, estimate in trending.itertuples(index=False):
+        assert estimate >= exact_by_table[table][phrase]
+    assert {p for p, _ in exact_by_table[table].most_common(3)} <= set(load_trending_phrases(db_path, table)['phrase'])
+
+    exact = sum(exact_by_table.values(), Counter())
+    overall = load_trending_phrases(db_path, limit=5)
+    assert overall['phrase'].iloc[0] == exact.most_common(1)[0][0]
+    assert (overall['estimate'].to_numpy() >= [exact[p] for p in overall['phrase']]).all()
+
+    # Re-enriching from scratch resets the counts instead of doubling them
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM enrichment_watermarks")
+    conn.commit()
+    conn.close()
+    CommentEnricher(db_path).enrich_all()
+    pd.testing.assert_frame_equal(load_trending_phrases(db_path, limit=5), overall)
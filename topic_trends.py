@@ -0,0 +1,293 @@
+"""
+GEM Emerging-Topic Detection
+Per-topic mention counts in hourly and daily buckets, maintained as comments
+are enriched, with an EWMA baseline and z-score flagging of topic spikes
+"""
+
+import math
+import sqlite3
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+GRANULARITIES = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+EWMA_ALPHA = 0.1  # weight of the newest closed bucket in the baseline
+Z_THRESHOLD = 3.0
+MIN_MENTIONS = 3
+WARMUP_BUCKETS = {'hour': 24, 'day': 7}  # closed buckets before anything is flagged
+MIN_STD = 1.0  # a topic that was always quiet does not flag on a single mention
+MAX_GAP_BUCKETS = 500  # past this, further empty buckets barely move the baseline
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+SCHEMA_PATH = Path(__file__).parent / 'database' / 'trends_schema.sql'
+
+_schema_applied = set()
+
+
+def ensure_trends_schema(db_path: str):
+    """Apply the idempotent trends schema once per process"""
+    if db_path in _schema_applied:
+        return
+
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        schema_sql = f.read()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(schema_sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+    _schema_applied.add(db_path)
+
+
+def bucket_start(timestamp, granularity: str) -> datetime:
+    """Start of the hour or day containing a timestamp (datetime or SQLite text)"""
+    if not isinstance(timestamp, datetime):
+        timestamp = datetime.fromisoformat(str(timestamp))
+    if granularity == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+class TopicTrendDetector:
+    """
+    Streaming spike detector for one bucket granularity
+    Only the open bucket's counts and one (mean, variance) pair per topic are kept
+    """
+
+    def __init__(self, granularity: str = 'hour', alpha: float = EWMA_ALPHA,
+                 z_threshold: float = Z_THRESHOLD, min_mentions: int = MIN_MENTIONS,
+                 warmup_buckets: Optional[int] = None):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+
+        self.granularity = granularity
+        self.step = GRANULARITIES[granularity]
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_mentions = min_mentions
+        self.warmup_buckets = WARMUP_BUCKETS[granularity] if warmup_buckets is None else warmup_buckets
+
+        self.current_bucket: Optional[datetime] = None
+        self.current_counts = Counter()
+        self.baseline: Dict[str, Tuple[float, float]] = {}  # topic -> (ewma_mean, ewma_var)
+        self.closed_buckets = 0
+        self.late_mentions = 0
+
+    def record(self, topics: Iterable[str], timestamp) -> bool:
+        """Count one comment's topics; False if its bucket has already closed"""
+        return self.add_bucket_counts(bucket_start(timestamp, self.granularity), Counter(set(topics)))
+
+    def add_bucket_counts(self, bucket: datetime, counts: Dict[str, int]) -> bool:
+        """Add mention counts to a bucket, closing every earlier bucket first"""
+        if self.current_bucket is None:
+            self.current_bucket = bucket
+        elif bucket > self.current_bucket:
+            self._advance_to(bucket)
+        elif bucket < self.current_bucket:
+            # Still stored per bucket by the tracker; rebuild() folds it into the baseline
+            self.late_mentions += sum(counts.values())
+            return False
+
+        self.current_counts.update(counts)
+        return True
+
+    def _advance_to(self, bucket: datetime):
+        """Close the open bucket, and any empty ones, up to a new bucket"""
+        gaps = int((bucket - self.current_bucket) / self.step) - 1
+        self._close_bucket(self.current_counts)
+        for _ in range(min(gaps, MAX_GAP_BUCKETS)):
+            self._close_bucket({})
+        self.closed_buckets += max(gaps - MAX_GAP_BUCKETS, 0)
+
+        self.current_bucket = bucket
+        self.current_counts = Counter()
+
+    def _close_bucket(self, counts: Dict[str, int]):
+        """O(1) per-topic EWMA mean and variance update"""
+        for topic in self.baseline.keys() | counts.keys():
+            mean, var = self.baseline.get(topic, (0.0, 0.0))
+            diff = counts.get(topic, 0) - mean
+            increment = self.alpha * diff
+            self.baseline[topic] = (mean + increment, (1 - self.alpha) * (var + diff * increment))
+        self.closed_buckets += 1
+
+    def z_score(self, topic: str, mentions: int) -> float:
+        """Standard deviations of the mention count above the topic's baseline"""
+        mean, var = self.baseline.get(topic, (0.0, 0.0))
+        return (mentions - mean) / max(math.sqrt(var), MIN_STD)
+
+    def emerging(self) -> pd.DataFrame:
+        """
+        Topics in the open bucket scored against their baseline, highest z-score first
+        Returns: DataFrame (topic, bucket_start, mentions, baseline_mean, baseline_std, z_score, is_emerging)
+        """
+        warmed_up = self.closed_buckets >= self.warmup_buckets
+        rows = []
+        for topic, mentions in self.current_counts.items():
+            mean, var = self.baseline.get(topic, (0.0, 0.0))
+            z = self.z_score(topic, mentions)
+            rows.append({
+                'topic': topic,
+                'bucket_start': self.current_bucket,
+                'mentions': mentions,
+                'baseline_mean': round(mean, 3),
+                'baseline_std': round(math.sqrt(var), 3),
+                'z_score': round(z, 3),
+                'is_emerging': warmed_up and mentions >= self.min_mentions and z >= self.z_threshold
+            })
+
+        columns = ['topic', 'bucket_start', 'mentions', 'baseline_mean', 'baseline_std', 'z_score', 'is_emerging']
+        return pd.DataFrame(rows, columns=columns).sort_values(
+            ['z_score', 'topic'], ascending=[False, True]).reset_index(drop=True)
+
+
+class TopicTrendTracker:
+    """Bucket counts and detector state for every granularity, persisted in SQLite"""
+
+    def __init__(self, db_path: str = "visitor_feedback.db", granularities=tuple(GRANULARITIES)):
+        self.db_path = db_path
+        self.granularities = granularities
+        ensure_trends_schema(db_path)
+        self.load()
+
+    def load(self):
+        """Restore detector state saved by an earlier run"""
+        self.detectors = {g: TopicTrendDetector(g) for g in self.granularities}
+
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            for granularity, detector in self.detectors.items():
+                row = conn.execute("""
+                    SELECT current_bucket, closed_buckets, late_mentions
+                    FROM topic_trend_clock WHERE granularity = ?
+                """, (granularity,)).fetchone()
+                if not row or row[0] is None:
+                    continue
+
+                detector.current_bucket = datetime.fromisoformat(row[0])
+                detector.closed_buckets, detector.late_mentions = row[1], row[2]
+                detector.baseline = {
+                    topic: (mean, var) for topic, mean, var in conn.execute("""
+                        SELECT topic, ewma_mean, ewma_var FROM topic_trend_baseline WHERE granularity = ?
+                    """, (granularity,))
+                }
+                # The open bucket's counts are the stored bucket rows
+                detector.current_counts = Counter(dict(conn.execute("""
+                    SELECT topic, SUM(mentions) FROM topic_time_buckets
+                    WHERE granularity = ? AND bucket_start = ?
+                    GROUP BY topic
+                """, (granularity, row[0]))))
+        finally:
+            conn.close()
+
+    def record_batch(self, cursor, table_name: str, events: Iterable[Tuple[str, Iterable[str]]]):
+        """
+        Count (submitted_at, topics) events on the caller's cursor, inside its transaction
+        Bucket rows are upserted and the detector state is saved alongside
+        """
+        increments = Counter()
+        for submitted_at, topics in events:
+            topics = set(topics)
+            if not topics or submitted_at is None:
+                continue
+            for granularity, detector in self.detectors.items():
+                bucket = bucket_start(submitted_at, granularity)
+                detector.add_bucket_counts(bucket, Counter(topics))
+                for topic in topics:
+                    increments[(granularity, bucket.strftime(TIMESTAMP_FORMAT), topic)] += 1
+
+        cursor.executemany("""
+            INSERT INTO topic_time_buckets (granularity, bucket_start, survey_type, topic, mentions)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(granularity, bucket_start, survey_type, topic) DO UPDATE SET
+                mentions = mentions + excluded.mentions
+        """, [(g, start, table_name, topic, n) for (g, start, topic), n in increments.items()])
+        self.save(cursor)
+
+    def save(self, cursor):
+        """Write every detector's clock and baseline"""
+        for granularity, detector in self.detectors.items():
+            cursor.execute("""
+                INSERT OR REPLACE INTO topic_trend_clock
+                    (granularity, current_bucket, closed_buckets, late_mentions, updated_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, (granularity,
+                  detector.current_bucket.strftime(TIMESTAMP_FORMAT) if detector.current_bucket else None,
+                  detector.closed_buckets, detector.late_mentions))
+            cursor.execute("DELETE FROM topic_trend_baseline WHERE granularity = ?", (granularity,))
+            cursor.executemany("""
+                INSERT INTO topic_trend_baseline (granularity, topic, ewma_mean, ewma_var)
+                VALUES (?, ?, ?, ?)
+            """, [(granularity, topic, mean, var) for topic, (mean, var) in detector.baseline.items()])
+
+    def rebuild(self, cursor, survey_type: Optional[str] = None):
+        """
+        Replay the stored buckets in time order through fresh detectors
+        survey_type drops that table's buckets first (it is about to be re-enriched);
+        also folds late arrivals into the baseline without re-analyzing any comment
+        """
+        if survey_type is not None:
+            cursor.execute("DELETE FROM topic_time_buckets WHERE survey_type = ?", (survey_type,))
+
+        self.detectors = {g: _replay_buckets(cursor, g) for g in self.granularities}
+        self.save(cursor)
+
+    def emerging(self, granularity: str = 'hour') -> pd.DataFrame:
+        """Open-bucket topics scored against their baseline"""
+        return self.detectors[granularity].emerging()
+
+
+def _replay_buckets(cursor, granularity: str) -> TopicTrendDetector:
+    """Fresh detector fed every stored bucket of one granularity, oldest first"""
+    detector = TopicTrendDetector(granularity)
+    cursor.execute("""
+        SELECT bucket_start, topic, SUM(mentions) FROM topic_time_buckets
+        WHERE granularity = ?
+        GROUP BY bucket_start, topic
+        ORDER BY bucket_start
+    """, (granularity,))
+
+    bucket, counts = None, {}
+    for start, topic, mentions in cursor.fetchall():
+        if start != bucket:
+            if counts:
+                detector.add_bucket_counts(datetime.fromisoformat(bucket), counts)
+            bucket, counts = start, {}
+        counts[topic] = mentions
+    if counts:
+        detector.add_bucket_counts(datetime.fromisoformat(bucket), counts)
+    return detector
+
+
+def detect_emerging_topics(db_path: str = "visitor_feedback.db", granularity: str = 'hour') -> pd.DataFrame:
+    """Emerging topics in the latest bucket, replayed from stored counts (read-only)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if 'topic_time_buckets' not in tables:
+            return TopicTrendDetector(granularity).emerging()
+        return _replay_buckets(conn.cursor(), granularity).emerging()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("📈 EMERGING TOPICS")
+    print("=" * 70)
+    for granularity in GRANULARITIES:
+        trends = detect_emerging_topics(granularity=granularity)
+        print(f"\n{granularity.title()} buckets:")
+        if trends.empty:
+            print("  No enriched topics yet")
+        else:
+            print(trends.to_string(index=False))
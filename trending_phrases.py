@@ -0,0 +1,237 @@
+"""
+GEM Trending Phrases
+Streaming heavy hitters over comment bigrams/trigrams: a count-min sketch
+plus a top-K heap per survey, in fixed memory however many comments arrive
+"""
+
+import heapq
+import sqlite3
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from loyalty_engine import SURVEY_TYPES
+from sentiment_analysis import AdvancedTopicModeler
+
+SKETCH_DEPTH = 4
+SKETCH_WIDTH = 1 << 14  # overestimate <= total * e / width (~0.02%) with probability 1 - e^-depth
+SKETCH_SEED = 1
+TOP_K = 50
+
+SCHEMA_PATH = Path(__file__).parent / 'database' / 'phrases_schema.sql'
+
+# Universal hashing modulo a Mersenne prime, as in comment_dedup
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+_schema_applied = set()
+
+
+def ensure_phrases_schema(db_path: str):
+    """Apply the idempotent trending-phrases schema once per process"""
+    if db_path in _schema_applied:
+        return
+
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        schema_sql = f.read()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(schema_sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+    _schema_applied.add(db_path)
+
+
+class CountMinSketch:
+    """Approximate counts (never under, rarely over) in depth x width counters"""
+
+    def __init__(self, depth: int = SKETCH_DEPTH, width: int = SKETCH_WIDTH, seed: int = SKETCH_SEED,
+                 counts: Optional[np.ndarray] = None):
+        self.depth = depth
+        self.width = width
+        self.seed = seed
+        self.counts = np.zeros((depth, width), dtype=np.int64) if counts is None else counts
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=depth, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, 1 << 32, size=depth, dtype=np.uint64)[:, None]
+        self._rows = np.arange(depth)[:, None]
+
+    def _columns(self, items: List[str]) -> np.ndarray:
+        """depth x len(items) counter columns"""
+        hashes = np.fromiter((zlib.crc32(item.encode('utf-8')) for item in items),
+                             dtype=np.uint64, count=len(items))
+        return ((self._a * hashes + self._b) % _MERSENNE_PRIME % np.uint64(self.width)).astype(np.int64)
+
+    def add_many(self, counts: Dict[str, int]) -> Dict[str, int]:
+        """Add a batch of item counts; returns each item's estimate afterwards"""
+        if not counts:
+            return {}
+        items = list(counts)
+        columns = self._columns(items)
+        values = np.fromiter(counts.values(), dtype=np.int64, count=len(items))
+        np.add.at(self.counts, (np.broadcast_to(self._rows, columns.shape), columns), values)
+        return dict(zip(items, self.counts[self._rows, columns].min(axis=0).tolist()))
+
+    def estimate_many(self, items: Iterable[str]) -> Dict[str, int]:
+        """Estimated counts of several items"""
+        items = list(items)
+        if not items:
+            return {}
+        return dict(zip(items, self.counts[self._rows, self._columns(items)].min(axis=0).tolist()))
+
+    def merge(self, other: 'CountMinSketch') -> 'CountMinSketch':
+        """Sketch of both streams (counters simply add)"""
+        if (self.depth, self.width, self.seed) != (other.depth, other.width, other.seed):
+            raise ValueError("Only sketches with the same depth, width and seed can be merged")
+        return CountMinSketch(self.depth, self.width, self.seed, self.counts + other.counts)
+
+
+class PhraseHeavyHitters:
+    """Count-min sketch plus the K phrases with the highest estimates"""
+
+    def __init__(self, k: int = TOP_K, sketch: Optional[CountMinSketch] = None,
+                 top: Optional[Dict[str, int]] = None, total: int = 0):
+        self.k = k
+        self.sketch = sketch or CountMinSketch()
+        self.top = top or {}
+        self.total = total
+
+    def update(self, phrases: Iterable[str]):
+        """Count a batch of phrases and refresh the top-K"""
+        counts = Counter(phrases)
+        estimates = self.sketch.add_many(counts)
+        self.total += sum(counts.values())
+
+        # Batch estimates are fresh; untouched top-K entries cannot have changed
+        self.top.update(estimates)
+        self.top = dict(heapq.nlargest(self.k, self.top.items(), key=lambda item: (item[1], item[0])))
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Top phrases by estimated count"""
+        return sorted(self.top.items(), key=lambda item: (-item[1], item[0]))[:n]
+
+
+class PhraseTrendTracker:
+    """Per-survey heavy hitters persisted in SQLite, updated as comments are enriched"""
+
+    def __init__(self, db_path: str = "visitor_feedback.db", topic_modeler=None, k: int = TOP_K):
+        self.db_path = db_path
+        self.topic_modeler = topic_modeler or AdvancedTopicModeler()
+        self.k = k
+        self._hitters: Dict[str, PhraseHeavyHitters] = {}
+        ensure_phrases_schema(db_path)
+
+    def comment_phrases(self, comment) -> set:
+        """
+        Distinct bigrams/trigrams of one comment (a comment counts once per phrase)
+        Phrases with a one-letter word (e.g. "children s" from "children's") are skipped
+        """
+        phrases = self.topic_modeler.extract_phrases(self.topic_modeler.preprocess_text(comment))
+        return {p for p in phrases if min(map(len, p.split())) > 1}
+
+    def _get_hitters(self, cursor, table_name: str) -> PhraseHeavyHitters:
+        """Heavy hitters for a table, loaded from the database on first use"""
+        if table_name not in self._hitters:
+            cursor.execute("""
+                SELECT depth, width, seed, total_phrases, counts FROM phrase_sketches WHERE survey_type = ?
+            """, (table_name,))
+            row = cursor.fetchone()
+            if row:
+                depth, width, seed, total, blob = row
+                counts = np.frombuffer(blob, dtype=np.int64).reshape(depth, width).copy()
+                cursor.execute("SELECT phrase, estimate FROM trending_phrases WHERE survey_type = ?", (table_name,))
+                self._hitters[table_name] = PhraseHeavyHitters(
+                    self.k, CountMinSketch(depth, width, seed, counts), dict(cursor.fetchall()), total)
+            else:
+                self._hitters[table_name] = PhraseHeavyHitters(self.k)
+        return self._hitters[table_name]
+
+    def record_batch(self, cursor, table_name: str, comments: Iterable[str]):
+        """Count a batch of comments on the caller's cursor, inside its transaction"""
+        hitters = self._get_hitters(cursor, table_name)
+        hitters.update(phrase for comment in comments for phrase in self.comment_phrases(comment))
+        self._save(cursor, table_name, hitters)
+
+    def reset(self, cursor, table_name: str):
+        """Start a table's counts over (it is about to be re-enriched)"""
+        self._hitters[table_name] = PhraseHeavyHitters(self.k)
+        self._save(cursor, table_name, self._hitters[table_name])
+
+    def discard(self):
+        """Drop in-memory state, e.g. after the caller rolled back"""
+        self._hitters.clear()
+
+    def _save(self, cursor, table_name: str, hitters: PhraseHeavyHitters):
+        """Write a table's sketch and top-K"""
+        sketch = hitters.sketch
+        cursor.execute("""
+            INSERT OR REPLACE INTO phrase_sketches
+                (survey_type, depth, width, seed, total_phrases, counts, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, (table_name, sketch.depth, sketch.width, sketch.seed, hitters.total, sketch.counts.tobytes()))
+        cursor.execute("DELETE FROM trending_phrases WHERE survey_type = ?", (table_name,))
+        cursor.executemany("""
+            INSERT INTO trending_phrases (survey_type, phrase, estimate) VALUES (?, ?, ?)
+        """, [(table_name, phrase, estimate) for phrase, estimate in hitters.top.items()])
+
+
+# ============================================================
+# DASHBOARD READS
+# ============================================================
+
+def load_trending_phrases(db_path: str, survey_type: Optional[str] = None, limit: int = 20) -> pd.DataFrame:
+    """
+    Most frequent phrases for one survey table, or across all of them
+    The overall list re-estimates every survey's top-K phrases on the merged sketch
+    Returns: DataFrame (phrase, estimate), empty if nothing was counted yet
+    """
+    if survey_type is not None and survey_type not in SURVEY_TYPES:
+        raise ValueError(f"Unknown survey table: {survey_type}")
+
+    empty = pd.DataFrame(columns=['phrase', 'estimate'])
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if 'phrase_sketches' not in tables:
+            return empty
+
+        if survey_type is not None:
+            return pd.read_sql_query("""
+                SELECT phrase, estimate FROM trending_phrases
+                WHERE survey_type = ?
+                ORDER BY estimate DESC, phrase
+                LIMIT ?
+            """, conn, params=(survey_type, limit))
+
+        merged = None
+        for depth, width, seed, blob in conn.execute("SELECT depth, width, seed, counts FROM phrase_sketches"):
+            sketch = CountMinSketch(depth, width, seed,
+                                    np.frombuffer(blob, dtype=np.int64).reshape(depth, width))
+            merged = sketch if merged is None else merged.merge(sketch)
+        if merged is None:
+            return empty
+
+        candidates = [row[0] for row in conn.execute("SELECT DISTINCT phrase FROM trending_phrases")]
+        estimates = merged.estimate_many(candidates)
+        top = sorted(estimates.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return pd.DataFrame(top, columns=['phrase', 'estimate'])
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("🔥 TRENDING PHRASES")
+    print("=" * 70)
+    trending = load_trending_phrases("visitor_feedback.db")
+    if trending.empty:
+        print("No phrases counted yet - run comment_enrichment.py first")
+    else:
+        print(trending.to_string(index=False))
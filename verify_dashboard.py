@@ -7,42 +7,43 @@ print("🔍 Verifying Dashboard Structure...")
 with open('dashboard/staff_dashboard.py', 'r', encoding='utf-8') as f:
     content = f.read()
 
-# Check for all 7 tabs
-tabs = []
-for i in range(1, 8):
-    if f'with tab{i}:' in content:
-        tabs.append(i)
-        print(f"✅ Tab {i} found")
-    else:
-        print(f"❌ Tab {i} MISSING!")
-
-# Check tab headers
-expected_headers = [
-    ("tab1", "Dashboard Overview"),
-    ("tab2", "Visitor Demographics"),
-    ("tab3", "Survey Analysis"),
-    ("tab4", "🎮 Loyalty Points System"),
-    ("tab5", "🔍 Spam Detection"),
-    ("tab6", "📈 Marketing Insights"),
-    ("tab7", "💾 Data Export")
+# Check for all 7 sections (only the active one is executed per rerun)
+sections = [
+    ("📊 Overview", "Dashboard Overview"),
+    ("👥 Demographics", "Visitor Demographics"),
+    ("⭐ Survey Analysis", "Survey Analysis"),
+    ("🎮 Loyalty Points", "🎮 Loyalty Points System"),
+    ("🔍 Spam Detection", "🔍 Spam Detection"),
+    ("📈 Marketing", "📈 Marketing Insights"),
+    ("💾 Export", "💾 Data Export")
 ]
 
-print("\n📋 Checking Tab Headers:")
-for tab_var, expected_header in expected_headers:
-    # Find the tab section
-    tab_start = content.find(f'with {tab_var}:')
-    if tab_start != -1:
+if 'st.tabs(' in content:
+    print("⚠️  st.tabs found - it runs every tab body on each rerun")
+
+for i, (section, _) in enumerate(sections, 1):
+    if f'if show_section("{section}"):' in content:
+        print(f"✅ Section {i} found")
+    else:
+        print(f"❌ Section {i} MISSING!")
+
+# Check section headers
+print("\n📋 Checking Section Headers:")
+for section, expected_header in sections:
+    # Find the section body
+    section_start = content.find(f'if show_section("{section}"):')
+    if section_start != -1:
         # Look for st.header within next 200 chars
-        section = content[tab_start:tab_start+200]
-        if expected_header in section:
-            print(f"✅ {tab_var}: {expected_header}")
+        body = content[section_start:section_start+200]
+        if expected_header in body:
+            print(f"✅ {section}: {expected_header}")
         else:
-            print(f"⚠️  {tab_var}: Header may be different")
+            print(f"⚠️  {section}: Header may be different")
     else:
-        print(f"❌ {tab_var}: NOT FOUND")
+        print(f"❌ {section}: NOT FOUND")
 
 print("\n✅ Dashboard structure verification complete!")
-print("\n💡 Dashboard should now display:")
+print("\n💡 Dashboard navigation should offer:")
 print("   1. Overview")
 print("   2. Demographics")
 print("   3. Survey Analysis")